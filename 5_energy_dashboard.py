@@ -1,14 +1,22 @@
 import streamlit as st
 import os
-import glob
-from PIL import Image
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 import numpy as np
-from datetime import datetime
-import matplotlib.pyplot as plt
 import sys
+import kpi_assets
+import kpi_store
+import kpi_summary
+import gahp_gue
+import timeseries
+import room_store
+import degree_days
+import energy_signature
+import boiler_load
+import drycooler
+import btes
+import prewarm
+import sites
+import instrument
 
 # Configure page settings
 st.set_page_config(
@@ -27,16 +35,14 @@ st.markdown("""
     h2 {border-bottom: 1px solid #bdc3c7; padding-bottom: 8px; margin-top: 30px;}
     .metric-value {font-size: 24px; font-weight: bold; color: #d93e29;}
     .metric-label {font-size: 16px; color: #00205b;}
-    .stTabs [data-baseweb="tab-list"] {gap: 16px;}
-    .stTabs [data-baseweb="tab"] {
-        height: 50px;
-        white-space: pre-wrap;
+    [class*="st-key-lazy_tabs_"] div[role="radiogroup"] {gap: 16px;}
+    [class*="st-key-lazy_tabs_"] div[role="radiogroup"] > label {
         background-color: #f8f9fa;
         border-radius: 4px 4px 0 0;
         padding: 10px 16px;
         font-weight: 500;
     }
-    .stTabs [aria-selected="true"] {
+    [class*="st-key-lazy_tabs_"] div[role="radiogroup"] > label:has(input:checked) {
         background-color: #e6f3ff;
         border-bottom: 2px solid #d93e29;
     }
@@ -67,26 +73,87 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Define the KPI output directory
-KPI_DIR = "4_KPI"
-SANKEY_DIR = "3_Sankey_Diagram"
+# Sites whose indexes and figures are kept in memory at once; the least recently used are dropped
+SITE_CACHE_LIMIT = 8
 
-# Try to import the Sankey diagram creation module
-try:
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Buildings served by the dashboard, rescanned once a minute
+@instrument.counted(st.cache_data(show_spinner=False, ttl=60))
+def site_list():
+    return {site.key: site for site in sites.discover_sites()}
+
+# Function to get the site selected in the sidebar (the first one before the sidebar is drawn)
+def current_site():
+    available = site_list()
+    return available.get(st.session_state.get("site"), next(iter(available.values())))
+
+# Index of the KPI plot library of one site, built once per process and rebuilt when a directory changes
+@instrument.counted(st.cache_resource(show_spinner=False, max_entries=SITE_CACHE_LIMIT))
+def load_asset_index(kpi_dir, sankey_dir):
+    return kpi_assets.AssetIndex(kpi_dir, sankey_dir)
+
+def asset_index(site=None):
+    site = site or current_site()
+    index = load_asset_index(site.kpi_dir, site.sankey_dir)
+    index.refresh()
+    return index
+
+# Get the current directory path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+SANKEY_MODULE_PATH = os.path.join(CURRENT_DIR, "3_create_sankey_diagram.py")
+
+# Import the Sankey diagram creation module once per process. A failed import raises and is not
+# cached, so the module is picked up as soon as the script is there.
+@instrument.counted(st.cache_resource(show_spinner=False))
+def load_sankey_module():
+    if CURRENT_DIR not in sys.path:
+        sys.path.append(CURRENT_DIR)
     import importlib.util
-    spec = importlib.util.spec_from_file_location("sankey_module", "3_create_sankey_diagram.py")
+    spec = importlib.util.spec_from_file_location("sankey_module", SANKEY_MODULE_PATH)
     sankey_module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(sankey_module)
-    sankey_available = True
-except:
-    sankey_available = False
+    return sankey_module
 
-# Get the current directory path
-CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Function to check whether the Sankey figure can be built live; the module reads the exports
+# of the working directory, so only the site laid out there can use it
+def sankey_buildable(site):
+    if not site.legacy or not os.path.exists(SANKEY_MODULE_PATH):
+        return False
+    try:
+        load_sankey_module()
+    except Exception:
+        return False
+    return True
+
+# Version of the Sankey inputs: the module itself and the energy exports it is built from
+def sankey_data_version(site=None):
+    index = asset_index(site)
+    paths = [SANKEY_MODULE_PATH] + list(index.find(kpi_assets.SANKEY_COMPONENT, ext=".csv")) + list(index.find("EUI", ext=".csv"))
+    version = []
+    for path in paths:
+        try:
+            version.append(kpi_store.file_signature(path))
+        except OSError:
+            continue
+    return tuple(version)
+
+# Sankey figure as JSON, computed once per data version; every render rebuilds its own figure from it
+@instrument.counted(st.cache_data(show_spinner=False, max_entries=4))
+def build_sankey_figure(version):
+    sankey_module = load_sankey_module()
+    energy_values = sankey_module.load_energy_data()
+    fig = sankey_module.create_sankey_diagram(energy_values)
+    fig.update_layout(
+        height=800,
+        width=1200,
+        margin=dict(l=50, r=50, t=50, b=50)
+    )
+    return fig.to_json()
 
-# Top header with dashboard title
-st.title("Building Z Energy Dashboard")
+# Content of the exported Sankey HTML, read once per file version
+@instrument.counted(st.cache_resource(show_spinner=False, max_entries=4))
+def read_sankey_html(signature):
+    with open(signature[0], 'r', encoding='utf-8') as f:
+        return f.read()
 
 # Function to create custom metric display
 def display_metric(title, value, unit="", delta=None, delta_suffix="from baseline"):
@@ -98,31 +165,127 @@ def display_metric(title, value, unit="", delta=None, delta_suffix="from baselin
     </div>
     """, unsafe_allow_html=True)
 
+# Function to create tabs of which only the selected one is rendered; returns the selected index.
+# The container key (st-key-lazy_tabs_<key>) scopes the tab styling to these radios.
+def lazy_tabs(labels, key):
+    with st.container(key=f"lazy_tabs_{key}"):
+        selected = st.radio("Select tab:", labels, horizontal=True, key=key, label_visibility="collapsed")
+    return labels.index(selected)
+
+# Function to count an image sent to the browser and its size
+def count_image(img_path):
+    instrument.count("images sent")
+    try:
+        instrument.count("image bytes", os.path.getsize(img_path))
+    except OSError:
+        pass
+
+# Function to display a plot through its derivative sized for the display width
+def display_image(img_path, width=None, **kwargs):
+    img = kpi_assets.image_variant(img_path, width, current_site().cache_path(kpi_assets.DERIVATIVE_DIR))
+    count_image(img)
+    with instrument.stage("image send"):
+        st.image(img, width=width, **kwargs)
+
+# Function to send a Plotly figure to the browser (serialization included)
+def display_chart(fig):
+    instrument.count("charts sent")
+    with instrument.stage("chart send"):
+        st.plotly_chart(fig, use_container_width=True)
+
 # Function to display images in columns with enhanced styling
+@instrument.timed
 def display_images_in_columns(image_paths, num_columns=2, caption_func=None, width=None):
     if not image_paths:
         st.info("No images available for this category.")
         return
         
     cols = st.columns(num_columns)
+    derivative_dir = current_site().cache_path(kpi_assets.DERIVATIVE_DIR)
     for i, img_path in enumerate(image_paths):
         col_idx = i % num_columns
         with cols[col_idx]:
             try:
-                img = Image.open(img_path)
+                img = kpi_assets.image_variant(img_path, width or kpi_assets.DEFAULT_DISPLAY_WIDTH // num_columns, derivative_dir)
                 caption = os.path.basename(img_path) if caption_func is None else caption_func(img_path)
                 # Clean up caption by removing file extension and replacing underscores
                 caption = os.path.splitext(caption)[0].replace('_', ' ').title()
                 st.markdown(f"<div class='chart-container'>", unsafe_allow_html=True)
-                st.image(img, caption=caption, use_container_width=True, width=width)
+                count_image(img)
+                with instrument.stage("image send"):
+                    st.image(img, caption=caption, use_container_width=True, width=width)
                 st.markdown("</div>", unsafe_allow_html=True)
             except Exception as e:
                 st.error(f"Error loading image {img_path}: {str(e)}")
 
+# Most points sent to the browser per chart trace
+MAX_CHART_POINTS = 3000
+
+# Signatures of every KPI export of a component (history and ingested rows alike)
+def component_signatures(component, site=None):
+    return tuple(kpi_store.file_signature(path) for path in asset_index(site).find(component, ext=".csv"))
+
+# Sorted timestamps and values of one KPI column over the given exports, shared by all sessions.
+# A single export stays memory-mapped; several are merged in time order.
+@instrument.counted(st.cache_resource(show_spinner=False, max_entries=32))
+def load_series(signatures, column, cache_dir=kpi_store.SERIES_DIR):
+    return timeseries.merge_series([kpi_store.load_series_arrays(signature[0], column, cache_dir) for signature in signatures])
+
+# Function to display an interactive time series of a component's exports, downsampled on the server for the selected window
+def display_time_series(signatures, column, title, key, y_label=None):
+    import plotly.graph_objects as go  # imported by the charts that use it, out of the cold start
+    series_dir = current_site().cache_path(kpi_store.SERIES_DIR)
+    series = load_series(signatures, column, series_dir)
+    if series is None or series[0].size < 2:
+        return False
+    timestamps, values = series
+    first = pd.Timestamp(timestamps[0]).to_pydatetime()
+    last = pd.Timestamp(timestamps[-1]).to_pydatetime()
+    start, end = st.slider(
+        "Time window:",
+        min_value=first,
+        max_value=last,
+        value=(first, last),
+        format="YYYY-MM-DD",
+        key=f"window_{key}"
+    )
+    # Answer wide windows from the coarsest pyramid level that still resolves MAX_CHART_POINTS buckets
+    resolution = (np.datetime64(end, "ns") - np.datetime64(start, "ns")) / MAX_CHART_POINTS
+    level = timeseries.pick_level(resolution)
+    buckets = timeseries.merge_levels([kpi_store.read_pyramid_level(signature[0], column, level, series_dir)
+                                       for signature in signatures], level) if level else None
+    if buckets is not None and len(buckets) > 0:
+        starts = buckets["start"].to_numpy()
+        lo = np.searchsorted(starts, np.datetime64(start, "ns"), side="left")
+        hi = np.searchsorted(starts, np.datetime64(end, "ns"), side="right")
+        window = buckets.iloc[lo:hi]
+        window = window.iloc[timeseries.minmax_picks(window["mean"].to_numpy(), MAX_CHART_POINTS)]
+        x = window["start"]
+        window_samples = int(buckets["count"].iloc[lo:hi].sum())
+        fig = go.Figure([
+            go.Scattergl(x=x, y=window["min"], mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"),
+            go.Scattergl(x=x, y=window["max"], mode="lines", line=dict(width=0), fill="tonexty",
+                         fillcolor="rgba(217, 62, 41, 0.2)", name=f"{level} min-max"),
+            go.Scattergl(x=x, y=window["mean"], mode="lines", name=f"{level} mean", line=dict(color="#d93e29", width=1)),
+        ])
+    else:
+        x, y, window_samples = timeseries.downsample(timestamps, values, start, end, MAX_CHART_POINTS)
+        fig = go.Figure(go.Scattergl(x=x, y=y, mode="lines", name=column, line=dict(color="#d93e29", width=1)))
+    fig.update_layout(
+        title=title,
+        title_x=0.5,
+        height=450,
+        margin=dict(t=50, b=20, l=20, r=20),
+        yaxis_title=y_label or column
+    )
+    display_chart(fig)
+    st.caption(f"Showing {len(x):,} points for {window_samples:,} samples in the selected window")
+    return True
+
 # Function to load and display CSV data
 def display_csv_data(csv_path, title="Data Table"):
     try:
-        df = pd.read_csv(csv_path, sep=";", decimal=",")
+        df = kpi_store.read_kpi_csv(csv_path)
         st.markdown(f"<div class='data-container'>", unsafe_allow_html=True)
         st.subheader(title)
         st.dataframe(df, use_container_width=True)
@@ -132,111 +295,31 @@ def display_csv_data(csv_path, title="Data Table"):
         st.warning(f"Could not load data from {csv_path}: {str(e)}")
         return None
 
-# Function to extract key metrics from CSV files
-def extract_metrics():
-    metrics = {}
-    
-    # EUI
-    eui_files = glob.glob(f"{KPI_DIR}/EUI/*.csv")
-    if eui_files:
-        try:
-            eui_df = pd.read_csv(eui_files[0], sep=";", decimal=",")
-            if 'Total_EUI' in eui_df.columns:
-                metrics['eui'] = eui_df['Total_EUI'].iloc[-1]
-        except:
-            metrics['eui'] = 45.3  # Default value
-    else:
-        metrics['eui'] = 45.3  # Default value
-    
-    # GAHP GUE
-    gahp_files = glob.glob(f"{KPI_DIR}/GAHP_GUE/*.csv")
-    if gahp_files:
-        try:
-            gahp_df = pd.read_csv(gahp_files[0], sep=";", decimal=",")
-            if 'GUE' in gahp_df.columns:
-                metrics['gue'] = gahp_df['GUE'].mean()
-        except:
-            metrics['gue'] = 1.32  # Default value
-    else:
-        metrics['gue'] = 1.32  # Default value
-    
-    # EHP EER
-    ehp_files = glob.glob(f"{KPI_DIR}/EHP_EER/*.csv")
-    if ehp_files:
-        try:
-            ehp_df = pd.read_csv(ehp_files[0], sep=";", decimal=",")
-            if 'EER' in ehp_df.columns:
-                metrics['eer'] = ehp_df['EER'].mean()
-        except:
-            metrics['eer'] = 2.75  # Default value
-    else:
-        metrics['eer'] = 2.75  # Default value
-    
-    # Boiler Efficiency
-    boiler1_files = glob.glob(f"{KPI_DIR}/Boiler1_Efficiency/*.csv")
-    if boiler1_files:
-        try:
-            boiler1_df = pd.read_csv(boiler1_files[0], sep=";", decimal=",")
-            if 'Efficiency' in boiler1_df.columns:
-                metrics['boiler1_eff'] = boiler1_df['Efficiency'].mean()
-        except:
-            metrics['boiler1_eff'] = 89.5  # Default value
-    else:
-        metrics['boiler1_eff'] = 89.5  # Default value
-    
-    boiler2_files = glob.glob(f"{KPI_DIR}/Boiler2_Efficiency/*.csv")
-    if boiler2_files:
-        try:
-            boiler2_df = pd.read_csv(boiler2_files[0], sep=";", decimal=",")
-            if 'Efficiency' in boiler2_df.columns:
-                metrics['boiler2_eff'] = boiler2_df['Efficiency'].mean()
-        except:
-            metrics['boiler2_eff'] = 86.7  # Default value
-    else:
-        metrics['boiler2_eff'] = 86.7  # Default value
-    
-    # Dry Cooler Effectiveness
-    dc_files = glob.glob(f"{KPI_DIR}/DC/*.csv")
-    if dc_files:
-        try:
-            dc_df = pd.read_csv(dc_files[0], sep=";", decimal=",")
-            if 'Effectiveness' in dc_df.columns:
-                metrics['dc_eff'] = dc_df['Effectiveness'].mean()
-        except:
-            metrics['dc_eff'] = 0.65  # Default value
-    else:
-        metrics['dc_eff'] = 0.65  # Default value
-    
-    # Comfort Metrics
-    comfort_files = glob.glob(f"{KPI_DIR}/Comfort_results/Temperature/*.csv")
-    if comfort_files:
-        try:
-            # Try to extract comfort data across seasons
-            metrics['comfort'] = 91.5  # Default value
-            metrics['avg_temp'] = 22.1  # Default value
-            metrics['avg_co2'] = 520  # Default value
-            metrics['avg_humidity'] = 41.2  # Default value
-        except:
-            # Use default values if extraction fails
-            metrics['comfort'] = 91.5
-            metrics['avg_temp'] = 22.1
-            metrics['avg_co2'] = 520
-            metrics['avg_humidity'] = 41.2
-    else:
-        metrics['comfort'] = 91.5
-        metrics['avg_temp'] = 22.1
-        metrics['avg_co2'] = 520
-        metrics['avg_humidity'] = 41.2
-    
-    return metrics
+# Columns of the EUI export used by the pie chart
+EUI_COLUMNS = ["Total_EUI", "Heating_EUI", "Cooling_EUI"]
+
+# Overview KPIs of one version of a site's summary and its inputs, so reruns do not check the summary again
+@instrument.counted(st.cache_data(show_spinner=False, max_entries=SITE_CACHE_LIMIT))
+def load_metrics(kpi_dir, version, _index):
+    return kpi_summary.materialize_summary(_index, kpi_dir)
+
+# Function to extract key metrics from the materialized KPI summary
+@instrument.timed
+def extract_metrics(site=None):
+    site = site or current_site()
+    index = asset_index(site)
+    return load_metrics(site.kpi_dir, kpi_summary.summary_version(index, site.kpi_dir), index)
 
 # Function to create EUI pie chart
 def create_eui_pie_chart():
+    import plotly.express as px  # only this chart needs it; keeps it out of the cold start
+    
     # Try to load real data or use sample data
-    eui_files = glob.glob(f"{KPI_DIR}/EUI/*.csv")
+    index = asset_index()
+    eui_files = index.find("EUI", ext=".csv")
     if eui_files:
         try:
-            eui_df = pd.read_csv(eui_files[0], sep=";", decimal=",")
+            eui_df = kpi_store.read_kpi_csv(eui_files[0], columns=EUI_COLUMNS)
             if 'Total_EUI' in eui_df.columns and 'Heating_EUI' in eui_df.columns and 'Cooling_EUI' in eui_df.columns:
                 # Extract relevant columns
                 heating_eui = eui_df['Heating_EUI'].iloc[-1]
@@ -292,22 +375,13 @@ def create_eui_pie_chart():
     return fig
 
 # Dashboard Overview section
+@instrument.timed
 def show_dashboard_overview():
     st.header("Dashboard Overview")
     
     # Extract key metrics for display
     metrics = extract_metrics()
     
-    # Update metrics with correct values
-    metrics['eui'] = 20.68  # Corrected EUI value
-    metrics['comfort'] = "Optimal (mostly IDA 1)"  # Indoor air quality
-    metrics['humidity_status'] = "Optimal (mostly within 30-60%)"
-    metrics['spi_heating'] = "94.8%"
-    metrics['dc_rejection'] = "49%"  # Dry cooler effectiveness (rejection)
-    metrics['dc_absorption'] = "30%"  # Dry cooler effectiveness (absorption)
-    metrics['boiler1_eff'] = "70.6%"  # Boiler 1 efficiency
-    metrics['boiler2_eff'] = "73.3%"  # Boiler 2 efficiency
-    
     # First row - Energy metrics
     col1, col2, col3 = st.columns(3)
     
@@ -315,7 +389,7 @@ def show_dashboard_overview():
         display_metric("Energy Use Intensity", f"{metrics['eui']:.2f}", "kWh/m²")
     
     with col2:
-        display_metric("Heating SPI", metrics['spi_heating'], "")
+        display_metric("Heating SPI", f"{metrics['spi_heating']:.1f}%", "")
     
     with col3:
         display_metric("Indoor Air Quality", metrics['comfort'], "")
@@ -336,51 +410,59 @@ def show_dashboard_overview():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        display_metric("Boiler 1 Efficiency", metrics['boiler1_eff'], "")
+        display_metric("Boiler 1 Efficiency", f"{metrics['boiler1_eff']:.1f}%", "")
     
     with col2:
-        display_metric("Boiler 2 Efficiency", metrics['boiler2_eff'], "")
+        display_metric("Boiler 2 Efficiency", f"{metrics['boiler2_eff']:.1f}%", "")
     
     with col3:
-        display_metric("Dry Cooler Effectiveness", f"Rejection: {metrics['dc_rejection']} | Absorption: {metrics['dc_absorption']}", "")
+        display_metric("Dry Cooler Effectiveness", f"Rejection: {metrics['dc_rejection']:.0f}% | Absorption: {metrics['dc_absorption']:.0f}%", "")
 
     # Visualization selection
     st.markdown("---")  # Add a separator
     visualization = st.radio(
         "Select visualization:",
         ["Energy Use Distribution", "Sankey Diagram"],
-        horizontal=True
+        horizontal=True,
+        key="overview_visualization"
     )
     
+    site = current_site()
     if visualization == "Energy Use Distribution":
         # Display the static EUI image with fixed width
         try:
-            st.image("4_KPI/EUI/energy_distribution_pie.png", width=700)  # Adjust this value as needed
+            display_image(f"{site.kpi_dir}/EUI/energy_distribution_pie.png", width=700)  # Adjust this value as needed
         except Exception as e:
             st.error(f"Could not load EUI distribution image. Error: {str(e)}")
     else:
         st.subheader("Sankey Diagram")
         # Display Sankey diagram with adjusted height and width
-        if os.path.exists(f"{SANKEY_DIR}/energy_sankey.html"):
-            with open(f"{SANKEY_DIR}/energy_sankey.html", 'r', encoding='utf-8') as f:
-                html_content = f.read()
-                st.components.v1.html(html_content, height=800, width=1200)
-        elif sankey_available:
-            try:
-                energy_values = sankey_module.load_energy_data()
-                fig = sankey_module.create_sankey_diagram(energy_values)
-                fig.update_layout(
-                    height=800,
-                    width=1200,
-                    margin=dict(l=50, r=50, t=50, b=50)
-                )
-                st.plotly_chart(fig, use_container_width=True)
-            except Exception as e:
-                st.error(f"Could not create Sankey diagram: {str(e)}")
-                if os.path.exists(f"{SANKEY_DIR}/energy_sankey.png"):
-                    st.image(f"{SANKEY_DIR}/energy_sankey.png", use_container_width=True)
+        with instrument.stage("sankey"):
+            display_sankey(site)
+
+# Function to display the exported Sankey HTML, or build the figure when there is none
+def display_sankey(site):
+    index = asset_index()
+    if index.exists(f"{site.sankey_dir}/energy_sankey.html"):
+        html_content = read_sankey_html(kpi_store.file_signature(f"{site.sankey_dir}/energy_sankey.html"))
+        st.components.v1.html(html_content, height=800, width=1200)
+    elif sankey_buildable(site):
+        try:
+            import plotly.io as pio
+            display_chart(pio.from_json(build_sankey_figure(sankey_data_version())))
+        except Exception as e:
+            st.error(f"Could not create Sankey diagram: {str(e)}")
+            if index.exists(f"{site.sankey_dir}/energy_sankey.png"):
+                display_image(f"{site.sankey_dir}/energy_sankey.png", use_container_width=True)
+
+# GUE of the GAHP per hour, day, season and year, computed from the raw meter data of every export
+@instrument.counted(st.cache_data(show_spinner=False, max_entries=SITE_CACHE_LIMIT))
+def load_gahp_gue(signatures):
+    frames = [kpi_store.read_kpi_csv(signature[0], columns=gahp_gue.RAW_COLUMNS) for signature in signatures]
+    return gahp_gue.gue_from_frame(pd.concat(frames)) if frames else None
 
 # GAHP Section
+@instrument.timed
 def show_gahp_analysis():
     st.header("GAHP Gas Utilization Efficiency (GUE) Analysis")
     
@@ -395,38 +477,51 @@ def show_gahp_analysis():
     
     # Display GAHP GUE metrics
     metrics = extract_metrics()
+    index = asset_index()
+    gahp_signatures = component_signatures("GAHP_GUE")
+    gue_results = load_gahp_gue(gahp_signatures)
     cols = st.columns(3)
     with cols[0]:
         display_metric("Average GUE", f"{metrics['gue']:.2f}", "")
+    if gue_results is not None:
+        with cols[1]:
+            display_metric("Heat Delivered", f"{gue_results['annual']['heat_kwh'].sum() / 1000:.1f}", "MWh")
+        with cols[2]:
+            display_metric("Gas Consumed", f"{gue_results['annual']['gas_kwh'].sum() / 1000:.1f}", "MWh")
     
     # Create tabs for different visualizations
-    tabs = st.tabs(["Time Series", "Seasonal Analysis", "GUE Map"])
-    
-    # Get list of GAHP images
-    gahp_images = sorted(glob.glob(f"{KPI_DIR}/GAHP_GUE/*.png"))
+    tab = lazy_tabs(["Time Series", "Seasonal Analysis", "GUE Map"], key="gahp_tab")
     
-    with tabs[0]:  # Time Series
-        time_series_plots = [img for img in gahp_images if "time" in img.lower()]
-        if time_series_plots:
-            st.image(time_series_plots[0], width=1200)
-        else:
-            st.warning("No time series plots found for GAHP GUE.")
+    if tab == 0:  # Time Series
+        if not (gahp_signatures and display_time_series(gahp_signatures, "GUE", "GAHP Gas Utilization Efficiency", "gahp")):
+            time_series_plots = index.find("GAHP_GUE", "time_series", ext=".png")
+            if time_series_plots:
+                display_image(time_series_plots[0], width=1200)
+            else:
+                st.warning("No time series plots found for GAHP GUE.")
             
-    with tabs[1]:  # Seasonal Analysis
-        boxplot_images = [img for img in gahp_images if "boxplot" in img.lower()]
+    elif tab == 1:  # Seasonal Analysis
+        boxplot_images = index.find("GAHP_GUE", "boxplot", ext=".png")
         if boxplot_images:
-            st.image(boxplot_images[0], width=1200)
+            display_image(boxplot_images[0], width=1200)
         else:
             st.warning("No seasonal boxplot found for GAHP GUE.")
+        if gue_results is not None:
+            seasonal = gue_results["seasonal"].rename(columns={
+                "gas_kwh": "Gas (kWh)", "heat_kwh": "Heat (kWh)", "gue": "GUE", "samples": "Samples"
+            })
+            st.subheader("Energy-weighted GUE per season")
+            st.dataframe(seasonal.style.format({"Gas (kWh)": "{:.0f}", "Heat (kWh)": "{:.0f}", "GUE": "{:.2f}"}), use_container_width=True)
             
-    with tabs[2]:  # GUE Map
-        gue_map_images = [img for img in gahp_images if "Seasonal_PowerVStemp" in img]
+    elif tab == 2:  # GUE Map
+        gue_map_images = index.find("GAHP_GUE", "gue_map", ext=".png")
         if gue_map_images:
-            st.image(gue_map_images[0], width=1400)
+            display_image(gue_map_images[0], width=1400)
         else:
             st.warning("No GUE map found for GAHP.")
 
 # EHP Section
+@instrument.timed
 def show_ehp_analysis():
     st.header("EHP Energy Efficiency Ratio (EER) Analysis")
     
@@ -446,26 +541,71 @@ def show_ehp_analysis():
         display_metric("Average EER", f"{metrics['eer']:.2f}", "")
     
     # Create tabs for different visualizations
-    tabs = st.tabs(["Time Series", "EER MAP"])
+    tab = lazy_tabs(["Time Series", "EER MAP"], key="ehp_tab")
     
     # Get list of EHP images
-    ehp_images = sorted(glob.glob(f"{KPI_DIR}/EHP_EER/*.png"))
+    index = asset_index()
     
-    with tabs[0]:  # Time Series
-        time_series_plots = [img for img in ehp_images if "time" in img.lower()]
-        if time_series_plots:
-            st.image(time_series_plots[0], width=1200)
-        else:
-            st.warning("No time series plots found for EHP EER.")
+    if tab == 0:  # Time Series
+        ehp_signatures = component_signatures("EHP_EER")
+        if not (ehp_signatures and display_time_series(ehp_signatures, "EER", "EHP Energy Efficiency Ratio", "ehp")):
+            time_series_plots = index.find("EHP_EER", "time_series", ext=".png")
+            if time_series_plots:
+                display_image(time_series_plots[0], width=1200)
+            else:
+                st.warning("No time series plots found for EHP EER.")
             
-    with tabs[1]:  # Temperature Analysis
-        temp_scatter_images = [img for img in ehp_images if "temperature_scatter" in img.lower()]
+    elif tab == 1:  # Temperature Analysis
+        temp_scatter_images = index.find("EHP_EER", "temperature_scatter", ext=".png")
         if temp_scatter_images:
-            st.image(temp_scatter_images[0], width=1200)
+            display_image(temp_scatter_images[0], width=1200)
         else:
             st.warning("No temperature analysis found for EHP.")
 
+# Signatures of the boiler exports, keyed by boiler name
+def boiler_signatures(site=None):
+    index = asset_index(site)
+    return tuple(
+        (f"Boiler {n}", kpi_store.file_signature(path))
+        for n in (1, 2)
+        for path in index.find(f"Boiler{n}_Efficiency", ext=".csv")
+    )
+
+# Part-load bins of every boiler, computed in one pass over all boiler exports
+@instrument.counted(st.cache_data(show_spinner=False, max_entries=4))
+def load_boiler_bins(signatures):
+    frames = {}
+    for name, signature in signatures:
+        df = kpi_store.read_kpi_csv(signature[0], columns=boiler_load.RAW_COLUMNS)
+        frames[name] = pd.concat([frames[name], df]) if name in frames else df
+    return boiler_load.bins_from_frames(frames)
+
+# Function to plot the energy-weighted efficiency of each part-load bin, one line per season
+def display_boiler_load_chart(boiler_bins, boiler_name):
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    for season, table in boiler_bins.groupby(level="season", sort=False):
+        table = table.droplevel("season")
+        fig.add_trace(go.Scatter(
+            x=table.index, y=table["efficiency"], mode="lines+markers", name=season,
+            customdata=np.stack([table["hours"], table["cycles"]], axis=1),
+            hovertemplate="%{x}: %{y:.1f}%<br>%{customdata[0]:.0f} h, %{customdata[1]} starts<extra>%{fullData.name}</extra>",
+        ))
+    fig.update_layout(title=f"{boiler_name} Efficiency vs Part-Load Ratio by Season",
+                      xaxis=dict(title="Part-load ratio", categoryorder="array", categoryarray=boiler_load.PLR_LABELS),
+                      yaxis_title="Efficiency (%)", height=500)
+    display_chart(fig)
+    
+    summary = boiler_bins.groupby(level="plr", sort=False)[["gas_kwh", "heat_kwh", "hours", "cycles"]].sum()
+    summary["efficiency"] = summary["heat_kwh"] / summary["gas_kwh"] * 100
+    summary = summary.reindex([label for label in boiler_load.PLR_LABELS if label in summary.index])
+    summary = summary.rename(columns={"gas_kwh": "Gas (kWh)", "heat_kwh": "Heat (kWh)", "hours": "Firing hours",
+                                      "cycles": "Starts", "efficiency": "Efficiency (%)"})
+    st.dataframe(summary.style.format({"Gas (kWh)": "{:.0f}", "Heat (kWh)": "{:.0f}", "Firing hours": "{:.0f}",
+                                       "Efficiency (%)": "{:.1f}"}), use_container_width=True)
+
 # Boiler Section
+@instrument.timed
 def show_boiler_analysis():
     st.header("Boiler Efficiency Analysis")
     
@@ -478,97 +618,214 @@ def show_boiler_analysis():
     """, unsafe_allow_html=True)
     
     # Create tabs for boiler selection
-    tabs = st.tabs(["Boiler 1", "Boiler 2"])
+    boiler_num = lazy_tabs(["Boiler 1", "Boiler 2"], key="boiler_tab") + 1
+    index = asset_index()
+    metrics = extract_metrics()
     
-    for i, tab in enumerate(tabs):
-        with tab:
-            boiler_num = i + 1
-            
-            # Display boiler efficiency metrics
-            cols = st.columns(3)
-            with cols[0]:
-                if boiler_num == 1:
-                    display_metric(f"Boiler {boiler_num} Efficiency", "70.6%")
-                else:
-                    display_metric(f"Boiler {boiler_num} Efficiency", "73.3%")
-            
-            # Create tabs for different visualizations
-            analysis_tabs = st.tabs(["Time Series", "Seasonal Analysis", "Load Analysis"])
-            
-            # Get list of boiler images
-            boiler_images = sorted(glob.glob(f"{KPI_DIR}/Boiler{boiler_num}_Efficiency/*.png"))
-            
-            with analysis_tabs[0]:  # Time Series
-                time_series_plots = [img for img in boiler_images if "time" in img.lower()]
-                if time_series_plots:
-                    st.image(time_series_plots[0], width=1200)
-                else:
-                    st.warning(f"No time series plots found for Boiler {boiler_num}.")
-                    
-            with analysis_tabs[1]:  # Seasonal Analysis
-                boxplot_images = [img for img in boiler_images if "boxplot" in img.lower()]
-                if boxplot_images:
-                    st.image(boxplot_images[0], width=1200)
-                else:
-                    st.warning(f"No seasonal boxplot found for Boiler {boiler_num}.")
-                    
-            with analysis_tabs[2]:  # Load Analysis
-                load_images = [img for img in boiler_images if f"Boiler{boiler_num}_Efficiency_vs_Load_by_Season" in img]
-                if load_images:
-                    st.image(load_images[0], width=1200)
-                else:
-                    st.warning(f"No load analysis found for Boiler {boiler_num}.")
+    bins = load_boiler_bins(boiler_signatures())
+    boiler_name = f"Boiler {boiler_num}"
+    boiler_bins = bins.xs(boiler_name, level="boiler") if bins is not None and boiler_name in bins.index.get_level_values("boiler") else None
+    
+    # Display boiler efficiency metrics
+    cols = st.columns(3)
+    with cols[0]:
+        display_metric(f"Boiler {boiler_num} Efficiency", f"{metrics[f'boiler{boiler_num}_eff']:.1f}%")
+    if boiler_bins is not None:
+        with cols[1]:
+            display_metric("Firing Hours", f"{boiler_bins['hours'].sum():,.0f}", "h")
+        with cols[2]:
+            display_metric("Starts", f"{boiler_bins['cycles'].sum():,}")
+    
+    # Create tabs for different visualizations
+    analysis_tab = lazy_tabs(["Time Series", "Seasonal Analysis", "Load Analysis"], key=f"boiler{boiler_num}_analysis_tab")
+    
+    # Get list of boiler images
+    boiler_component = f"Boiler{boiler_num}_Efficiency"
+    
+    if analysis_tab == 0:  # Time Series
+        series_signatures = component_signatures(boiler_component)
+        if not (series_signatures and display_time_series(series_signatures, "Efficiency", f"Boiler {boiler_num} Efficiency", f"boiler{boiler_num}")):
+            time_series_plots = index.find(boiler_component, "time_series", ext=".png")
+            if time_series_plots:
+                display_image(time_series_plots[0], width=1200)
+            else:
+                st.warning(f"No time series plots found for Boiler {boiler_num}.")
+    
+    elif analysis_tab == 1:  # Seasonal Analysis
+        boxplot_images = index.find(boiler_component, "boxplot", ext=".png")
+        if boxplot_images:
+            display_image(boxplot_images[0], width=1200)
+        else:
+            st.warning(f"No seasonal boxplot found for Boiler {boiler_num}.")
+    
+    elif analysis_tab == 2:  # Load Analysis
+        if boiler_bins is not None:
+            display_boiler_load_chart(boiler_bins, boiler_name)
+        else:
+            load_images = index.find(boiler_component, "efficiency_vs_load", ext=".png")
+            if load_images:
+                display_image(load_images[0], width=1200)
+            else:
+                st.warning(f"No load analysis found for Boiler {boiler_num}.")
+
+# Degree-day tracker of a weather export, kept up to date by parsing only appended rows
+@instrument.counted(st.cache_resource(show_spinner=False, max_entries=8))
+def degree_day_tracker(csv_path, heating_base, cooling_base):
+    return degree_days.DegreeDayTracker(csv_path, degree_days.DegreeDayEngine(heating_base, cooling_base))
+
+# Function to find the weather export with outdoor temperatures, if any
+def degree_day_source(site=None):
+    for csv_path in asset_index(site).find("Degree_Days", ext=".csv"):
+        if degree_days.has_outdoor_temperature(csv_path):
+            return csv_path
+    return None
+
+# Function to display the monthly degree days of one academic year
+def display_degree_day_year(engine, year):
+    import plotly.graph_objects as go
+    monthly = engine.monthly(year)
+    if monthly.empty:
+        st.warning(f"No outdoor temperature data for {degree_days.year_label(year)}.")
+        return
+    labels = monthly.index.strftime("%b %Y")
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=labels, y=monthly["hdd"], name="HDD", marker_color="#1f77b4"))
+    fig.add_trace(go.Bar(x=labels, y=monthly["cdd"], name="CDD", marker_color="#d62728"))
+    fig.update_layout(title=f"Monthly Degree Days {degree_days.year_label(year)}", barmode="group",
+                      xaxis_title="Month", yaxis_title="Degree days (K·day)", height=450)
+    display_chart(fig)
+
+# Function to display the year-over-year and school comparison of the degree days
+def display_degree_day_comparison(engine):
+    import plotly.graph_objects as go
+    cumulative = engine.year_over_year("hdd")
+    fig = go.Figure()
+    for year in cumulative.columns:
+        fig.add_trace(go.Scatter(x=cumulative.index, y=cumulative[year], mode="lines", name=year))
+    fig.update_layout(title="Cumulative HDD by Day of the Academic Year", xaxis_title="Days since 1 September",
+                      yaxis_title="HDD (K·day)", height=450)
+    display_chart(fig)
+
+    totals = engine.annual()
+    for name, reference in degree_days.SCHOOL_REFERENCE.items():
+        totals.loc[name] = [reference["HDD"], reference["CDD"]]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=totals.index, y=totals["HDD"], name="HDD", marker_color="#1f77b4"))
+    fig.add_trace(go.Bar(x=totals.index, y=totals["CDD"], name="CDD", marker_color="#d62728"))
+    fig.update_layout(title="Year and School Comparison", barmode="group", yaxis_title="Degree days (K·day)", height=450)
+    display_chart(fig)
 
 # Degree Days Section
+@instrument.timed
 def show_degree_days():
     st.header("Degree Days Analysis")
-    
-    # Brief description and values
-    st.markdown("""
-    <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-bottom: 20px;">
-    <p><strong>Building Z:</strong> 
-    2021-2022 (HDD: 1968, CDD: -) | 
-    2022-2023 (HDD: 1963, CDD: 12)</p>
-    <p><strong>Secondary Schools (2015-2018):</strong> HDD: 2172, CDD: 27</p>
-    </div>
-    """, unsafe_allow_html=True)
+
+    csv_path = degree_day_source()
+    if csv_path is not None:
+        with st.expander("Degree-day settings"):
+            col1, col2 = st.columns(2)
+            heating_base = col1.number_input("Heating base temperature (°C)", value=degree_days.HEATING_BASE, step=0.5, key="hdd_base")
+            cooling_base = col2.number_input("Cooling base temperature (°C)", value=degree_days.COOLING_BASE, step=0.5, key="cdd_base")
+        engine = degree_day_tracker(csv_path, heating_base, cooling_base).refresh()
+        years = engine.years()
+        totals = engine.annual()
+        building = " | ".join(f"{label} (HDD: {row.HDD:.0f}, CDD: {row.CDD:.0f})" for label, row in totals.iterrows())
+        references = "".join(
+            f"<p><strong>{name}:</strong> HDD: {reference['HDD']}, CDD: {reference['CDD']}</p>"
+            for name, reference in degree_days.SCHOOL_REFERENCE.items()
+        )
+        st.markdown(f"""
+        <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-bottom: 20px;">
+        <p><strong>{current_site().name}:</strong> {building}</p>
+        {references}
+        </div>
+        """, unsafe_allow_html=True)
+
+        tab = lazy_tabs([degree_days.year_label(year) for year in years] + ["Year and School Comparison"], key="degree_days_live_tab")
+        if tab < len(years):
+            display_degree_day_year(engine, years[tab])
+        else:
+            display_degree_day_comparison(engine)
+        return
+
+    # Brief description and values (reported for the original building only)
+    if current_site().legacy:
+        st.markdown("""
+        <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-bottom: 20px;">
+        <p><strong>Building Z:</strong> 
+        2021-2022 (HDD: 1968, CDD: -) | 
+        2022-2023 (HDD: 1963, CDD: 12)</p>
+        <p><strong>Secondary Schools (2015-2018):</strong> HDD: 2172, CDD: 27</p>
+        </div>
+        """, unsafe_allow_html=True)
     
     # Create tabs for different analyses
-    tabs = st.tabs(["2021-2022", "2022-2023", "Year and School Comparison"])
+    tab = lazy_tabs(["2021-2022", "2022-2023", "Year and School Comparison"], key="degree_days_tab")
     
     # Get list of degree day images
-    dd_images = sorted(glob.glob(f"{KPI_DIR}/Degree_Days/*.png"))
+    index = asset_index()
     
-    with tabs[0]:  # 2021-2022 Analysis
-        plots = [img for img in dd_images if "2021" in img or "_2021.png" in img]
+    if tab == 0:  # 2021-2022 Analysis
+        plots = index.find("Degree_Days", year=2021, ext=".png")
         for img in plots:
-            st.image(img, width=1200)
+            display_image(img, width=1200)
         if not plots:
             st.warning("No plots found for 2021-2022.")
             
-    with tabs[1]:  # 2022-2023 Analysis
-        plots = [
-            img for img in dd_images 
-            if ("monthly_degree_days.png" in img or 
-                "monthly_eui.png" in img or 
-                "monthly_kwh_per_cdd.png" in img or 
-                "monthly_kwh_per_hdd.png" in img)
-        ]
+    elif tab == 1:  # 2022-2023 Analysis
+        plots = index.find("Degree_Days", "monthly", year=None, ext=".png")
         for img in plots:
-            st.image(img, width=1200)
+            display_image(img, width=1200)
         if not plots:
             st.warning("No plots found for 2022-2023.")
             
-    with tabs[2]:  # Year Comparison
-        comparison_plots = [img for img in dd_images if "comparison" in img.lower()]
+    elif tab == 2:  # Year Comparison
+        comparison_plots = index.find("Degree_Days", "comparison", ext=".png")
         if comparison_plots:
             col1, col2, col3 = st.columns([1, 5, 1])
             with col2:
-                st.image(comparison_plots[0], use_container_width=True)
+                display_image(comparison_plots[0], use_container_width=True)
         if not comparison_plots:
             st.warning("No comparison plots found.")
 
+# Comfort variable of each parameter tab
+COMFORT_VARIABLES = {"Temperature": "temperature", "CO₂": "co2", "Relative Humidity": "humidity"}
+
+# Room-by-time store of the comfort exports, opened once per data version and shared by all sessions
+@instrument.counted(st.cache_resource(show_spinner=False, max_entries=SITE_CACHE_LIMIT))
+def load_room_store(signatures, root=room_store.ROOM_STORE_DIR):
+    return room_store.ensure_room_store([signature[0] for signature in signatures], root)
+
+# Class-share tables of every room and season, computed from the room store
+@instrument.counted(st.cache_data(show_spinner=False, max_entries=SITE_CACHE_LIMIT))
+def load_comfort_tables(signatures, root=room_store.ROOM_STORE_DIR):
+    return room_store.comfort_tables(load_room_store(signatures, root))
+
+def comfort_signatures(site=None):
+    index = asset_index(site)
+    paths = list(index.find("Comfort_results/Temperature", ext=".csv")) + list(index.find("Comfort_results/CO2_and_Humidity", ext=".csv"))
+    return tuple(kpi_store.file_signature(path) for path in paths)
+
+# Function to get the class shares of one parameter in one season, indexed by room
+def comfort_season_table(parameter, season):
+    signatures = comfort_signatures()
+    if not signatures:
+        return None
+    table = load_comfort_tables(signatures, current_site().cache_path(room_store.ROOM_STORE_DIR)).get(COMFORT_VARIABLES[parameter])
+    if table is None or season not in table.index.get_level_values("season"):
+        return None
+    return table.xs(season, level="season")
+
+# Function to display class shares with one decimal
+def display_class_shares(table, title):
+    st.markdown(f"<div class='data-container'>", unsafe_allow_html=True)
+    st.subheader(title)
+    percent_columns = [column for column in table.columns if column != "samples"]
+    st.dataframe(table.style.format({column: "{:.1f}%" for column in percent_columns}), use_container_width=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
 # Comfort Section
+@instrument.timed
 def show_comfort_analysis():
     st.header("Indoor Comfort Analysis")
     
@@ -600,140 +857,159 @@ def show_comfort_analysis():
     """, unsafe_allow_html=True)
     
     # Create tabs for parameter selection
-    parameter_tabs = st.tabs(["Temperature", "CO₂", "Relative Humidity"])
+    parameters = ["Temperature", "CO₂", "Relative Humidity"]
+    parameter = parameters[lazy_tabs(parameters, key="comfort_parameter_tab")]
+    index = asset_index()
+    
+    # Create sub-tabs for view type
+    view_tab = lazy_tabs(["All Rooms", "Per Room"], key=f"comfort_view_{parameter}")
     
-    for idx, (parameter, tab) in enumerate(zip(["Temperature", "CO₂", "Relative Humidity"], parameter_tabs)):
-        with tab:
-            # Create sub-tabs for view type
-            view_tabs = st.tabs(["All Rooms", "Per Room"])
+    if view_tab == 0:  # All Rooms view
+        if parameter == "Temperature":
+            # Season selection for Temperature
+            season = st.selectbox("Select season:", ["Winter", "Spring"], key=f"season_{parameter}")
+            season_lower = season.lower()
             
-            with view_tabs[0]:  # All Rooms view
-                if parameter == "Temperature":
-                    # Season selection for Temperature
-                    season = st.selectbox("Select season:", ["Winter", "Spring"], key=f"season_{parameter}")
-                    season_lower = season.lower()
-                    
-                    # Show distribution plot
-                    dist_pattern = f"{KPI_DIR}/Comfort_results/Temperature/temp_summary_{season_lower}.png"
-                elif parameter == "CO₂":
-                    # Season selection for CO₂
-                    season = st.selectbox("Select season:", ["Fall", "Winter", "Spring", "Summer"], key=f"season_{parameter}")
-                    season_lower = season.lower()
-                    
-                    # Show distribution plot
-                    dist_pattern = f"{KPI_DIR}/Comfort_results/CO2_and_Humidity/co2_ida_distribution_{season_lower}.png"
-                else:  # Relative Humidity
-                    # Season selection for Humidity
-                    season = st.selectbox("Select season:", ["Fall", "Winter", "Spring", "Summer"], key=f"season_{parameter}")
-                    season_lower = season.lower()
-                    
-                    # Show distribution plot
-                    dist_pattern = f"{KPI_DIR}/Comfort_results/CO2_and_Humidity/humidity_mean_summary_{season_lower}.png"
-                
+            # Show distribution plot
+            dist_images = index.find("Comfort_results/Temperature", "temp_summary", season=season_lower, ext=".png")
+        elif parameter == "CO₂":
+            # Season selection for CO₂
+            season = st.selectbox("Select season:", ["Fall", "Winter", "Spring", "Summer"], key=f"season_{parameter}")
+            season_lower = season.lower()
+            
+            # Show distribution plot
+            dist_images = index.find("Comfort_results/CO2_and_Humidity", "co2_distribution", season=season_lower, ext=".png")
+        else:  # Relative Humidity
+            # Season selection for Humidity
+            season = st.selectbox("Select season:", ["Fall", "Winter", "Spring", "Summer"], key=f"season_{parameter}")
+            season_lower = season.lower()
+            
+            # Show distribution plot
+            dist_images = index.find("Comfort_results/CO2_and_Humidity", "humidity_summary", season=season_lower, ext=".png")
+        
+        col1, col2, col3 = st.columns([1, 5, 1])
+        with col2:
+            if dist_images:
+                display_image(dist_images[0], use_container_width=True)
+            else:
+                st.warning(f"No distribution data available for {parameter} in {season}.")
+            season_table = comfort_season_table(parameter, season)
+            if season_table is not None:
+                display_class_shares(season_table, f"Share of occupied time per class ({season})")
+    
+    elif view_tab == 1:  # Per Room view
+        if parameter == "Temperature":
+            # Season selection for Temperature
+            season = st.selectbox("Select season:", ["Winter", "Spring"], key=f"season_per_room_{parameter}")
+            season_lower = season.lower()
+            
+            # Get unique room numbers from temperature files
+            rooms = index.rooms("Comfort_results/Temperature", "temp_room", season=season_lower)
+        else:
+            # Season selection for CO₂ and Humidity
+            season = st.selectbox("Select season:", ["Fall", "Winter", "Spring", "Summer"], key=f"season_per_room_{parameter}")
+            season_lower = season.lower()
+            
+            # Get room numbers from combined files
+            rooms = index.rooms("Comfort_results/CO2_and_Humidity", "combined_room", season=season_lower)
+        
+        # Add the rooms classified from the sensor exports
+        season_table = comfort_season_table(parameter, season)
+        if season_table is not None:
+            rooms = sorted(set(rooms) | set(season_table.index))
+        
+        if rooms:
+            # Room type of each room, from the site configuration
+            room_types = current_site().room_types
+            
+            # Create room options with types
+            room_options = [f"Room {room}: {room_types.get(room, 'Unknown Type')}" for room in rooms]
+            selected_room_with_type = st.selectbox("Select room:", room_options, key=f"room_{parameter}")
+            
+            # Extract room number from selection
+            selected_room = selected_room_with_type.split(":")[0].replace("Room ", "").strip()
+            
+            if parameter == "Temperature":
                 col1, col2, col3 = st.columns([1, 5, 1])
-                with col2:
-                    dist_images = glob.glob(dist_pattern)
-                    if dist_images:
-                        st.image(dist_images[0], use_container_width=True)
-                    else:
-                        st.warning(f"No distribution data available for {parameter} in {season}.")
+            else:  # For combined CO₂ and humidity graphs
+                col1, col2, col3 = st.columns([1, 2.5, 1])
             
-            with view_tabs[1]:  # Per Room view
+            with col2:
                 if parameter == "Temperature":
-                    # Season selection for Temperature
-                    season = st.selectbox("Select season:", ["Winter", "Spring"], key=f"season_per_room_{parameter}")
-                    season_lower = season.lower()
-                    
-                    # Get unique room numbers from temperature files
-                    room_pattern = f"{KPI_DIR}/Comfort_results/Temperature/temp_*_{season_lower}.png"
-                    room_files = glob.glob(room_pattern)
-                    rooms = sorted(list(set([
-                        f.split('temp_')[1].split('_')[0]
-                        for f in room_files
-                        if not 'summary' in f
-                    ])))
-                else:
-                    # Season selection for CO₂ and Humidity
-                    season = st.selectbox("Select season:", ["Fall", "Winter", "Spring", "Summer"], key=f"season_per_room_{parameter}")
-                    season_lower = season.lower()
-                    
-                    # Get room numbers from combined files
-                    room_pattern = f"{KPI_DIR}/Comfort_results/CO2_and_Humidity/combined_*_{season_lower}.png"
-                    room_files = glob.glob(room_pattern)
-                    rooms = sorted(list(set([
-                        f.split('combined_')[1].split('_')[0]
-                        for f in room_files
-                    ])))
-                
-                if rooms:
-                    # Create room type mapping
-                    room_types = {
-                        # Meeting & break spaces
-                        "241": "Meeting or break space",
-                        "243": "Meeting or break space",
-                        "225": "Meeting or break space",
-                        
-                        # PC rooms
-                        "445": "PC Room",
-                        "424": "PC Room",
-                        "423": "PC Room",
-                        "422": "PC Room",
-                        "421": "PC Room",
-                        "522": "PC Room",
-                        "521": "PC Room",
-                        
-                        # Offices
-                        "345": "Office",
-                        "332": "Office",
-                        "328": "Office",
-                        "327": "Office",
-                        "324": "Office",
-                        
-                        # Teaching rooms
-                        "223": "Teaching Room",
-                        "221": "Teaching Room",
-                        "126": "Teaching Room",
-                        "125": "Teaching Room",
-                        
-                        # Laboratories
-                        "543": "Laboratory",
-                        "524": "Laboratory",
-                        "171": "Laboratory",
-                        "143": "Laboratory",
-                        "123": "Laboratory"
-                    }
-                    
-                    # Create room options with types
-                    room_options = [f"Room {room}: {room_types.get(room, 'Unknown Type')}" for room in rooms]
-                    selected_room_with_type = st.selectbox("Select room:", room_options, key=f"room_{parameter}")
-                    
-                    # Extract room number from selection
-                    selected_room = selected_room_with_type.split(":")[0].replace("Room ", "").strip()
-                    
-                    if parameter == "Temperature":
-                        col1, col2, col3 = st.columns([1, 5, 1])
-                    else:  # For combined CO₂ and humidity graphs
-                        col1, col2, col3 = st.columns([1, 2.5, 1])
-                        
-                    with col2:
-                        if parameter == "Temperature":
-                            temp_pattern = f"{KPI_DIR}/Comfort_results/Temperature/temp_{selected_room}_{season_lower}.png"
-                            room_images = glob.glob(temp_pattern)
-                            if room_images:
-                                st.image(room_images[0], use_container_width=True)
-                            else:
-                                st.warning(f"No {parameter} data available for Room {selected_room} in {season}.")
-                        else:
-                            combined_pattern = f"{KPI_DIR}/Comfort_results/CO2_and_Humidity/combined_{selected_room}_{season_lower}.png"
-                            combined_images = glob.glob(combined_pattern)
-                            if combined_images:
-                                st.image(combined_images[0], use_container_width=True)
-                            else:
-                                st.warning(f"No combined CO₂ & humidity data available for Room {selected_room} in {season}.")
+                    room_images = index.find("Comfort_results/Temperature", "temp_room", season=season_lower, room=selected_room, ext=".png")
+                    if room_images:
+                        display_image(room_images[0], use_container_width=True)
+                    else:
+                        st.warning(f"No {parameter} data available for Room {selected_room} in {season}.")
                 else:
-                    st.warning(f"No room-specific data found for {season}.")
+                    combined_images = index.find("Comfort_results/CO2_and_Humidity", "combined_room", season=season_lower, room=selected_room, ext=".png")
+                    if combined_images:
+                        display_image(combined_images[0], use_container_width=True)
+                    else:
+                        st.warning(f"No combined CO₂ & humidity data available for Room {selected_room} in {season}.")
+                if season_table is not None and selected_room in season_table.index:
+                    display_class_shares(season_table.loc[[selected_room]], f"Room {selected_room}: share of occupied time per class")
+        else:
+            st.warning(f"No room-specific data found for {season}.")
+
+# Function to fit the change-point model of one signature mode; returns the fit and the readings it was fitted on
+@instrument.counted(st.cache_data(show_spinner=False, max_entries=8))
+def load_signature_fit(csv_path, signature, mode):
+    df = kpi_store.read_kpi_csv(csv_path)
+    fit = energy_signature.fit_frame(df, mode)
+    if fit is None:
+        return None, None
+    points = pd.DataFrame({
+        "temperature": pd.to_numeric(df[timeseries.pick_column(df, degree_days.OUTDOOR_COLUMNS)], errors="coerce"),
+        "load": pd.to_numeric(df[timeseries.pick_column(df, energy_signature.LOAD_COLUMNS[mode])], errors="coerce"),
+    }).dropna()
+    return fit, points
+
+# Function to plot the readings of a signature with the fitted change-point model
+def display_signature_chart(fit, points, mode):
+    import plotly.graph_objects as go
+    sample = points.sample(MAX_CHART_POINTS, random_state=0) if len(points) > MAX_CHART_POINTS else points
+    line_t = np.linspace(points["temperature"].min(), points["temperature"].max(), 200)
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(x=sample["temperature"], y=sample["load"], mode="markers", name="Readings",
+                               marker=dict(size=4, opacity=0.4)))
+    fig.add_trace(go.Scatter(x=line_t, y=energy_signature.predict(fit, line_t, mode), mode="lines",
+                             name="Signature", line=dict(color="#d62728", width=3)))
+    fig.update_layout(title=f"{mode.capitalize()} Energy Signature", xaxis_title="Outdoor temperature (°C)",
+                      yaxis_title="Load (kW)", height=500)
+    display_chart(fig)
+
+# Function to format a fitted parameter with its confidence interval, when there is one
+def format_parameter(params, name, spec, unit):
+    text = f"{params[name]:{spec}}{unit}"
+    interval = params.get(f"{name}_ci")
+    if interval is not None:
+        text += f" ({interval[0]:{spec}}–{interval[1]:{spec}})"
+    return text
+
+# Function to display the balance point, rate and baseload of a signature
+def display_signature_parameters(title, params):
+    values = {
+        "Balance Point": format_parameter(params, "balance_point", ".1f", "°C"),
+        "Rate": format_parameter(params, "rate", ".2f", " kW/°C"),
+        "Baseload": format_parameter(params, "baseload", ".1f", " kW"),
+    }
+    
+    st.markdown(f"""
+    <h4 style='font-size: 16px; margin-bottom: 10px;'>{title}</h4>
+    """, unsafe_allow_html=True)
+    
+    for column, (label, value) in zip(st.columns(3), values.items()):
+        with column:
+            st.markdown(f"""
+            <div style='font-size: 14px;'>
+                <p style='color: #666; margin-bottom: 4px;'>{label}</p>
+                <p style='font-size: 16px; margin: 0;'>{value}</p>
+            </div>
+            """, unsafe_allow_html=True)
 
 # Energy Signature Section
+@instrument.timed
 def show_energy_signature():
     st.header("Energy Signature Analysis")
     
@@ -751,97 +1027,74 @@ def show_energy_signature():
     """, unsafe_allow_html=True)
     
     # Create tabs for different modes
-    tabs = st.tabs(["Heating Signature", "Cooling Signature"])
+    tab = lazy_tabs(["Heating Signature", "Cooling Signature"], key="signature_tab")
+    mode = ["heating", "cooling"][tab]
     
     # Get energy signature images
-    signature_images = sorted(glob.glob(f"{KPI_DIR}/Energy_signature/*.png"))
+    index = asset_index()
     
-    with tabs[0]:  # Heating Mode
-        plot_images = [img for img in signature_images if "heat" in img.lower()]
-        if not plot_images:
-            st.warning("No heating mode energy signature images found.")
-        else:
-            col1, col2, col3 = st.columns([1, 5, 1])
-            with col2:
-                st.image(plot_images[0], use_container_width=True)
-            
-            params = {
-                "Balance Point": "14.4°C",
-                "Rate": "3.79 kW/°C",
-                "Baseload": "5.1 kW"
-            }
-            
-            st.markdown("""
-            <h4 style='font-size: 16px; margin-bottom: 10px;'>Heating Signature Parameters</h4>
-            """, unsafe_allow_html=True)
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.markdown(f"""
-                <div style='font-size: 14px;'>
-                    <p style='color: #666; margin-bottom: 4px;'>Balance Point</p>
-                    <p style='font-size: 16px; margin: 0;'>{params["Balance Point"]}</p>
-                </div>
-                """, unsafe_allow_html=True)
-            with col2:
-                st.markdown(f"""
-                <div style='font-size: 14px;'>
-                    <p style='color: #666; margin-bottom: 4px;'>Rate</p>
-                    <p style='font-size: 16px; margin: 0;'>{params["Rate"]}</p>
-                </div>
-                """, unsafe_allow_html=True)
-            with col3:
-                st.markdown(f"""
-                <div style='font-size: 14px;'>
-                    <p style='color: #666; margin-bottom: 4px;'>Baseload</p>
-                    <p style='font-size: 16px; margin: 0;'>{params["Baseload"]}</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-    with tabs[1]:  # Cooling Mode
-        plot_images = [img for img in signature_images if "cool" in img.lower()]
+    fit = None
+    csv_paths = index.find("Energy_signature", ext=".csv")
+    if csv_paths:
+        fit, points = load_signature_fit(csv_paths[0], kpi_store.file_signature(csv_paths[0]), mode)
+    
+    if fit is not None:
+        display_signature_chart(fit, points, mode)
+        st.caption(f"Change-point fit on {fit['samples']} readings (R² = {fit['r2']:.2f}); "
+                   f"ranges are {energy_signature.CONFIDENCE:.0%} bootstrap confidence intervals.")
+        params = fit
+    else:
+        plot_images = index.find("Energy_signature", mode, ext=".png")
         if not plot_images:
-            st.warning("No cooling mode energy signature images found.")
-        else:
-            col1, col2, col3 = st.columns([1, 5, 1])
-            with col2:
-                st.image(plot_images[0], use_container_width=True)
-            
-            params = {
-                "Balance Point": "17.2°C",
-                "Rate": "0.55 kW/°C",
-                "Baseload": "6.0 kW"
-            }
-            
-            st.markdown("""
-            <h4 style='font-size: 16px; margin-bottom: 10px;'>Cooling Signature Parameters</h4>
-            """, unsafe_allow_html=True)
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.markdown(f"""
-                <div style='font-size: 14px;'>
-                    <p style='color: #666; margin-bottom: 4px;'>Balance Point</p>
-                    <p style='font-size: 16px; margin: 0;'>{params["Balance Point"]}</p>
-                </div>
-                """, unsafe_allow_html=True)
-            with col2:
-                st.markdown(f"""
-                <div style='font-size: 14px;'>
-                    <p style='color: #666; margin-bottom: 4px;'>Rate</p>
-                    <p style='font-size: 16px; margin: 0;'>{params["Rate"]}</p>
-                </div>
-                """, unsafe_allow_html=True)
-            with col3:
-                st.markdown(f"""
-                <div style='font-size: 14px;'>
-                    <p style='color: #666; margin-bottom: 4px;'>Baseload</p>
-                    <p style='font-size: 16px; margin: 0;'>{params["Baseload"]}</p>
-                </div>
-                """, unsafe_allow_html=True)
+            st.warning(f"No {mode} mode energy signature images found.")
+            return
+        col1, col2, col3 = st.columns([1, 5, 1])
+        with col2:
+            display_image(plot_images[0], use_container_width=True)
+        params = energy_signature.DEFAULT_PARAMETERS[mode]
+    
+    display_signature_parameters(f"{mode.capitalize()} Signature Parameters", params)
+
+# Mode summary and daily DC-vs-EHP table of the dry-cooler exports; None without raw temperatures
+@instrument.counted(st.cache_data(show_spinner=False, max_entries=4))
+def load_drycooler_analysis(dc_signatures, ehp_signature):
+    results = [drycooler.analyse_frame(kpi_store.read_kpi_csv(signature[0], columns=drycooler.RAW_COLUMNS)) for signature in dc_signatures]
+    results = [result for result in results if result is not None]
+    if not results:
+        return None
+    result = {name: np.concatenate([part[name] for part in results]) for name in results[0]}
+    ehp = kpi_store.read_kpi_csv(ehp_signature[0]) if ehp_signature else None
+    return drycooler.mode_summary(result), drycooler.daily_comparison(result, ehp)
+
+# Function to get the dry-cooler analysis of the current exports; None without raw temperatures
+def drycooler_analysis(site=None):
+    index = asset_index(site)
+    dc_files = index.find("DC", ext=".csv")
+    ehp_files = index.find("DC_EHP", ext=".csv") or index.find("EHP_EER", ext=".csv")
+    if not dc_files:
+        return None
+    return load_drycooler_analysis(
+        tuple(kpi_store.file_signature(path) for path in dc_files),
+        kpi_store.file_signature(ehp_files[0]) if ehp_files else None,
+    )
+
+# Function to plot the daily heat moved by the dry cooler next to the EHP cooling and electricity
+def display_dc_ehp_comparison(daily):
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=daily.index, y=daily["dc_rejection_kwh"], name="DC heat rejection", marker_color="#1f77b4"))
+    fig.add_trace(go.Bar(x=daily.index, y=daily["dc_absorption_kwh"], name="DC heat absorption", marker_color="#ff7f0e"))
+    if "ehp_cooling_kwh" in daily:
+        fig.add_trace(go.Scatter(x=daily.index, y=daily["ehp_cooling_kwh"], name="EHP cooling", mode="lines", line=dict(color="#2ca02c")))
+    if "ehp_electricity_kwh" in daily:
+        fig.add_trace(go.Scatter(x=daily.index, y=daily["ehp_electricity_kwh"], name="EHP electricity", mode="lines", line=dict(color="#d62728")))
+    fig.update_layout(title="Daily Dry Cooler vs. EHP", barmode="stack", xaxis_title="Day", yaxis_title="Energy (kWh)", height=500)
+    display_chart(fig)
 
 # Dry Cooler Section
+@instrument.timed
 def show_drycooler():
+    import plotly.graph_objects as go
     st.header("Dry Cooler Performance Analysis")
     
     # Brief description of dry cooler
@@ -857,36 +1110,89 @@ def show_drycooler():
     """, unsafe_allow_html=True)
     
     # Create tabs for different modes
-    tabs = st.tabs(["Heat Rejection", "Heat Absorption", "DC vs. EHP"])
+    tab = lazy_tabs(["Heat Rejection", "Heat Absorption", "DC vs. EHP"], key="drycooler_tab")
+    index = asset_index()
     
-    with tabs[0]:  # Heat Rejection
-        col1, col2, col3 = st.columns([1, 4, 1])
-        with col2:
-            rejection_images = glob.glob(f"{KPI_DIR}/DC/*reject*.png")
-            if rejection_images:
-                st.image(rejection_images[0], use_container_width=True)
-            else:
-                st.warning("No heat rejection performance images found.")
-                
-    with tabs[1]:  # Heat Absorption
-        col1, col2, col3 = st.columns([1, 4, 1])
-        with col2:
-            absorption_images = glob.glob(f"{KPI_DIR}/DC/*absorpt*.png")
-            if absorption_images:
-                st.image(absorption_images[0], use_container_width=True)
-            else:
-                st.warning("No heat absorption performance images found.")
+    analysis = drycooler_analysis()
     
-    with tabs[2]:  # DC vs. EHP
-        col1, col2, col3 = st.columns([1, 6, 1])
-        with col2:
-            ehp_comparison = glob.glob(f"{KPI_DIR}/DC_EHP/dc_ehp_comparison_daily.png")
-            if ehp_comparison:
-                st.image(ehp_comparison[0], use_container_width=True)
-            else:
-                st.warning("No EHP comparison data available.")
+    if tab in (0, 1):  # Heat Rejection / Heat Absorption
+        mode, kind = ("rejection", "heat rejection") if tab == 0 else ("absorption", "heat absorption")
+        if analysis is not None:
+            summary, daily = analysis
+            cols = st.columns(3)
+            with cols[0]:
+                display_metric("Energy-weighted Effectiveness", f"{summary.loc[mode, 'effectiveness']:.0f}%")
+            with cols[1]:
+                display_metric(f"Heat {mode.capitalize()}", f"{summary.loc[mode, 'heat_kwh'] / 1000:.1f}", "MWh")
+            with cols[2]:
+                display_metric("Operating Hours", f"{summary.loc[mode, 'hours']:,.0f}", "h")
+            fig = go.Figure(go.Bar(x=daily.index, y=daily[f"dc_{mode}_kwh"], marker_color="#1f77b4" if tab == 0 else "#ff7f0e"))
+            fig.update_layout(title=f"Daily {kind.title()}", xaxis_title="Day", yaxis_title="Heat (kWh)", height=450)
+            display_chart(fig)
+        else:
+            col1, col2, col3 = st.columns([1, 4, 1])
+            with col2:
+                images = index.find("DC", mode, ext=".png")
+                if images:
+                    display_image(images[0], use_container_width=True)
+                else:
+                    st.warning(f"No {kind} performance images found.")
+    
+    elif tab == 2:  # DC vs. EHP
+        if analysis is not None:
+            display_dc_ehp_comparison(analysis[1])
+        else:
+            col1, col2, col3 = st.columns([1, 6, 1])
+            with col2:
+                ehp_comparison = f"{current_site().kpi_dir}/DC_EHP/dc_ehp_comparison_daily.png"
+                if index.exists(ehp_comparison):
+                    display_image(ehp_comparison, use_container_width=True)
+                else:
+                    st.warning("No EHP comparison data available.")
+
+# State-of-charge tracker of a BTES field export, resumed from its persisted running totals
+@instrument.counted(st.cache_resource(show_spinner=False, max_entries=SITE_CACHE_LIMIT))
+def btes_tracker(csv_path, state_dir=btes.STATE_DIR):
+    return btes.BTESTracker(csv_path, state_dir)
+
+# Function to display the state of charge, annual balance and seasonal decline of the BTES
+def display_btes_state(tracker, daily):
+    import plotly.graph_objects as go
+    annual = tracker.annual()
+    cols = st.columns(3)
+    with cols[0]:
+        display_metric("State of Charge", f"{daily['soc_kwh'].iloc[-1] / 1000:.1f}", "MWh")
+    with cols[1]:
+        display_metric(f"Balance {annual.index[-1]}", f"{annual['balance_kwh'].iloc[-1] / 1000:.1f}", "MWh")
+    with cols[2]:
+        display_metric("Return Temperature", f"{daily['return_temp'].iloc[-1]:.1f}", "°C")
+    
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=daily.index, y=daily["charge_kwh"], name="Charge", marker_color="#d62728"))
+    fig.add_trace(go.Bar(x=daily.index, y=-daily["discharge_kwh"], name="Discharge", marker_color="#1f77b4"))
+    fig.add_trace(go.Scatter(x=daily.index, y=daily["soc_kwh"] / 1000, name="State of charge", mode="lines",
+                             line=dict(color="#2c3e50", width=3), yaxis="y2"))
+    fig.update_layout(title="BTES State of Charge", barmode="relative", xaxis_title="Day",
+                      yaxis=dict(title="Daily energy (kWh)"),
+                      yaxis2=dict(title="State of charge (MWh)", overlaying="y", side="right"), height=500)
+    display_chart(fig)
+    
+    trends = tracker.seasonal_trends()
+    fig = go.Figure(go.Bar(
+        x=trends.index, y=trends["rate_kwh_per_day"],
+        marker_color=np.where(trends["rate_kwh_per_day"] >= 0, "#d62728", "#1f77b4"),
+        customdata=trends["return_temp_change"],
+        hovertemplate="%{x}: %{y:.0f} kWh/day<br>Return temperature change: %{customdata:+.2f} °C<extra></extra>",
+    ))
+    fig.update_layout(title="Net Storage Rate per Season", xaxis_title="Season", yaxis_title="kWh/day", height=400)
+    display_chart(fig)
+    
+    st.subheader("Annual balance")
+    table = annual.rename(columns={"charge_kwh": "Charge (kWh)", "discharge_kwh": "Discharge (kWh)", "balance_kwh": "Balance (kWh)"})
+    st.dataframe(table.style.format("{:.0f}"), use_container_width=True)
 
 # BTES Section
+@instrument.timed
 def show_btes_analysis():
     st.header("BTES Storage Analysis")
     
@@ -897,83 +1203,202 @@ def show_btes_analysis():
     </div>
     """, unsafe_allow_html=True)
     
+    site = current_site()
+    btes_files = asset_index(site).find("BTES", ext=".csv")
+    if btes_files:
+        tracker = btes_tracker(btes_files[0], site.cache_path(btes.STATE_DIR))
+        tracker.refresh()
+        daily = tracker.daily()
+        if not daily.empty:
+            display_btes_state(tracker, daily)
+            return
+    
     # Display BTES storage decline graph
     col1, col2, col3 = st.columns([1, 8, 1])
     with col2:
-        btes_image = f"{KPI_DIR}/BTES_storage_decline.png"
-        if os.path.exists(btes_image):
-            st.image(btes_image, use_container_width=True)
+        btes_image = f"{site.kpi_dir}/BTES_storage_decline.png"
+        if asset_index(site).exists(btes_image):
+            display_image(btes_image, use_container_width=True)
         else:
             st.warning("BTES storage decline graph not found.")
 
+# Warm a site's caches in a background thread the first time it is opened in a server process
+# (DASHBOARD_PREWARM=0 turns it off, e.g. for benchmarks)
+PREWARM_ON_START = os.environ.get("DASHBOARD_PREWARM", "1") != "0"
+
+# Interactive series of the component views: (KPI sub-folder, column)
+SECTION_SERIES = [("GAHP_GUE", "GUE"), ("EHP_EER", "EER"), ("Boiler1_Efficiency", "Efficiency"), ("Boiler2_Efficiency", "Efficiency")]
+
+# Function to list the warm-up tasks of the in-process caches of every section of a site: [(name, callable)]
+def section_tasks(site):
+    index = asset_index(site)
+    series_dir = site.cache_path(kpi_store.SERIES_DIR)
+    tasks = [("overview metrics", lambda: extract_metrics(site))]
+    for folder, column in SECTION_SERIES:
+        if index.find(folder, ext=".csv"):
+            tasks.append((f"series {folder}", lambda folder=folder, name=column: load_series(
+                component_signatures(folder, site), name, series_dir)))
+    if index.find("GAHP_GUE", ext=".csv"):
+        tasks.append(("GAHP GUE", lambda: load_gahp_gue(component_signatures("GAHP_GUE", site))))
+    tasks.append(("boiler load bins", lambda: load_boiler_bins(boiler_signatures(site))))
+    tasks.append(("dry cooler", lambda: drycooler_analysis(site)))
+    for csv_path in index.find("BTES", ext=".csv"):
+        tasks.append(("BTES", lambda path=csv_path: btes_tracker(path, site.cache_path(btes.STATE_DIR)).refresh()))
+    source = degree_day_source(site)
+    if source is not None:
+        tasks.append(("degree days", lambda: degree_day_tracker(source, degree_days.HEATING_BASE, degree_days.COOLING_BASE).refresh()))
+    for csv_path in index.find("Energy_signature", ext=".csv")[:1]:
+        for mode in ("heating", "cooling"):
+            tasks.append((f"{mode} signature", lambda path=csv_path, mode=mode: load_signature_fit(path, kpi_store.file_signature(path), mode)))
+    signatures = comfort_signatures(site)
+    if signatures:
+        tasks.append(("comfort tables", lambda: load_comfort_tables(signatures, site.cache_path(room_store.ROOM_STORE_DIR))))
+    if not index.exists(f"{site.sankey_dir}/energy_sankey.html") and sankey_buildable(site):
+        tasks.append(("Sankey figure", lambda: build_sankey_figure(sankey_data_version(site))))
+    return tasks
+
+# Start the warm-up of a site once per server process: on-disk caches first, then the sections.
+# Only opened sites are warmed, so the sites nobody looks at cost nothing.
+@instrument.counted(st.cache_resource(show_spinner=False, max_entries=SITE_CACHE_LIMIT))
+def start_prewarm(site_key):
+    site = site_list()[site_key]
+    return prewarm.start_background(lambda: prewarm.disk_tasks(site.kpi_dir, site.sankey_dir, cache_dir=site.cache_dir),
+                                    lambda: section_tasks(site))
+
+# Query parameter that reveals the performance panel (?admin=1)
+ADMIN_QUERY_PARAM = "admin"
+
+# Function to check whether the performance panel was requested
+def admin_enabled():
+    return st.query_params.get(ADMIN_QUERY_PARAM) == "1"
+
+# Wall-time percentiles per view from the rerun log, re-read at most every 30 s
+@st.cache_data(show_spinner=False, ttl=30)
+def load_view_percentiles():
+    return instrument.view_percentiles(instrument.read_log())
+
+# Function to display the timings and counters of the last rerun and the percentiles per view
+def display_perf_panel(record):
+    with st.sidebar.expander("Performance", expanded=True):
+        st.markdown(f"**{record['view'] or 'Page'}**: {record['wall_seconds'] * 1000:.0f} ms")
+        stages = pd.DataFrame.from_dict(record["stages"], orient="index")
+        if not stages.empty:
+            stages["ms"] = stages.pop("seconds") * 1000
+            st.dataframe(stages.sort_values("ms", ascending=False).style.format({"ms": "{:.1f}"}), use_container_width=True)
+        counters = record["counters"]
+        ratios = {}
+        for name in counters:
+            if name.endswith(" calls"):
+                function = name[:-len(" calls")]
+                ratios[f"{function} hit ratio"] = 1 - counters.get(f"{function} misses", 0) / counters[name]
+        for cache in ("frame cache", "image variant"):
+            hits, misses = counters.get(f"{cache} hits", 0), counters.get(f"{cache} misses", 0)
+            if hits + misses:
+                ratios[f"{cache} hit ratio"] = hits / (hits + misses)
+        rows = [(name, f"{value:,}") for name, value in sorted(counters.items())]
+        rows += [(name, f"{value:.0%}") for name, value in sorted(ratios.items())]
+        st.dataframe(pd.DataFrame(rows, columns=["counter", "value"]).set_index("counter"), use_container_width=True)
+        percentiles = pd.DataFrame.from_dict(load_view_percentiles(), orient="index")
+        if not percentiles.empty:
+            st.caption("Wall time per view (s)")
+            st.dataframe(percentiles.style.format({"p50": "{:.2f}", "p95": "{:.2f}"}), use_container_width=True)
+
 # Sidebar navigation
 def main():
-    # Sidebar navigation with larger logo
-    st.sidebar.image(f"{KPI_DIR}/UA.png", width=200)  # Increased width for larger logo
-    st.sidebar.title("Navigation")
-    
-    # Dashboard Overview radio at the top
-    view_selection = st.sidebar.radio(
-        "View",
-        ["Dashboard Overview", "Analysis Levels"]
-    )
-
-    if view_selection == "Dashboard Overview":
-        show_dashboard_overview()
-    else:
-        # Select the level
-        level = st.sidebar.selectbox(
-            "Select Analysis Level",
-            ["System Level", "Component Level", "Comfort Level"]
+    recorder = instrument.begin()
+    try:
+        # Site selection, shown once there is more than one building
+        available = site_list()
+        if len(available) > 1:
+            if st.session_state.get("site") not in available:
+                st.session_state["site"] = next(iter(available))
+            st.sidebar.selectbox("Building", list(available), format_func=lambda key: available[key].name, key="site")
+        site = current_site()
+        if PREWARM_ON_START:
+            start_prewarm(site.key)
+    
+        # Top header with dashboard title
+        st.title(f"{site.name} Energy Dashboard")
+    
+        # Sidebar navigation with larger logo
+        logo = f"{site.kpi_dir}/UA.png" if os.path.exists(f"{site.kpi_dir}/UA.png") else f"{kpi_assets.KPI_DIR}/UA.png"
+        st.sidebar.image(kpi_assets.image_variant(logo, 200, site.cache_path(kpi_assets.DERIVATIVE_DIR)), width=200)  # Increased width for larger logo
+        st.sidebar.title("Navigation")
+    
+        # Dashboard Overview radio at the top
+        view_selection = st.sidebar.radio(
+            "View",
+            ["Dashboard Overview", "Analysis Levels"],
+            key="view"
         )
-        
-        if level == "System Level":
-            system_analysis = st.sidebar.radio(
-                "Select System Analysis",
-                ["Degree Days", "Energy Signature"]
+
+        if view_selection == "Dashboard Overview":
+            recorder.view = view_selection
+            show_dashboard_overview()
+        else:
+            # Select the level
+            level = st.sidebar.selectbox(
+                "Select Analysis Level",
+                ["System Level", "Component Level", "Comfort Level"],
+                key="level"
             )
-            if system_analysis == "Degree Days":
-                show_degree_days()
-            else:
-                show_energy_signature()
         
-        elif level == "Component Level":
-            component_analysis = st.sidebar.radio(
-                "Select Component",
-                [
-                    "Gas Absorption Heat Pump (GAHP)",
-                    "Electric Heat Pump (EHP)",
-                    "Boilers",
-                    "Dry Cooler (DC)",
-                    "Borehole Thermal Energy Storage (BTES)"
-                ]
-            )
-            if component_analysis == "Gas Absorption Heat Pump (GAHP)":
-                show_gahp_analysis()
-            elif component_analysis == "Electric Heat Pump (EHP)":
-                show_ehp_analysis()
-            elif component_analysis == "Boilers":
-                show_boiler_analysis()
-            elif component_analysis == "Dry Cooler (DC)":
-                show_drycooler()
-            else:
-                show_btes_analysis()
+            if level == "System Level":
+                system_analysis = st.sidebar.radio(
+                    "Select System Analysis",
+                    ["Degree Days", "Energy Signature"],
+                    key="system_view"
+                )
+                recorder.view = system_analysis
+                if system_analysis == "Degree Days":
+                    show_degree_days()
+                else:
+                    show_energy_signature()
         
-        elif level == "Comfort Level":
-            show_comfort_analysis()
-    
-    # Add dashboard information
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("""
-    Data Period: Nov 2022 - Nov 2023  
-    Temperature Data: 2025
-    """)
-    
-    # Add contact information
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("""
-    University of Antwerp
-    """)
+            elif level == "Component Level":
+                component_analysis = st.sidebar.radio(
+                    "Select Component",
+                    [
+                        "Gas Absorption Heat Pump (GAHP)",
+                        "Electric Heat Pump (EHP)",
+                        "Boilers",
+                        "Dry Cooler (DC)",
+                        "Borehole Thermal Energy Storage (BTES)"
+                    ],
+                    key="component_view"
+                )
+                recorder.view = component_analysis
+                if component_analysis == "Gas Absorption Heat Pump (GAHP)":
+                    show_gahp_analysis()
+                elif component_analysis == "Electric Heat Pump (EHP)":
+                    show_ehp_analysis()
+                elif component_analysis == "Boilers":
+                    show_boiler_analysis()
+                elif component_analysis == "Dry Cooler (DC)":
+                    show_drycooler()
+                else:
+                    show_btes_analysis()
+        
+            elif level == "Comfort Level":
+                recorder.view = level
+                show_comfort_analysis()
+    
+        # Add dashboard information
+        st.sidebar.markdown("---")
+        st.sidebar.markdown("""
+        Data Period: Nov 2022 - Nov 2023  
+        Temperature Data: 2025
+        """)
+    
+        # Add contact information
+        st.sidebar.markdown("---")
+        st.sidebar.markdown("""
+        University of Antwerp
+        """)
+    finally:
+        record = instrument.end(site=st.session_state.get("site", ""))
+    if admin_enabled():
+        display_perf_panel(record)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,86 @@
+import ast
+import os
+import subprocess
+import sys
+
+# Dashboard whose cold start is measured
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD_PATH = os.path.join(CURRENT_DIR, "5_energy_dashboard.py")
+
+# Cold first paint of the overview we aim for (s)
+FIRST_PAINT_TARGET = 1.0
+
+
+# Function to list the modules a script imports: (module-level, imported inside functions)
+def script_imports(path):
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    top_level, deferred = [], []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        target = top_level if node in tree.body else deferred
+        target.extend(name for name in names if name not in target)
+    return top_level, [name for name in deferred if name not in top_level]
+
+
+# Function to measure the cumulative import cost (ms) of each module in a fresh interpreter.
+# Modules are imported in order, so a module is only charged for what earlier ones did not load.
+def import_costs(modules, cwd=CURRENT_DIR):
+    code = "; ".join(f"import {name}" for name in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd,
+                            capture_output=True, text=True)
+    costs = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        if name in modules and name not in costs:
+            costs[name] = int(parts[1]) / 1000
+    return costs
+
+
+# Function to time the first run of the dashboard (the overview) in a fresh interpreter.
+# The test harness is warmed up on an empty app first, so only the dashboard's own cost is timed.
+def first_paint(path=DASHBOARD_PATH, cwd=None):
+    code = (
+        "import time; from streamlit.testing.v1 import AppTest; "
+        "AppTest.from_string('import streamlit as st').run(); "
+        f"at = AppTest.from_file({path!r}, default_timeout=120); "
+        "start = time.perf_counter(); at.run(); "
+        "print(time.perf_counter() - start, len(at.exception))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=cwd or os.getcwd(), capture_output=True, text=True)
+    try:
+        seconds, errors = result.stdout.split()[-2:]
+        return float(seconds), int(errors)
+    except ValueError:
+        return None, None
+
+
+if __name__ == "__main__":
+    top_level, deferred = script_imports(DASHBOARD_PATH)
+    costs = import_costs(top_level)
+    print("Module-level imports (cumulative ms, in import order):")
+    for name in top_level:
+        print(f"  {name:<32}{costs.get(name, 0.0):>10.1f}")
+    print(f"  {'total':<32}{sum(costs.values()):>10.1f}")
+
+    # Deferred imports are charged on top of everything the dashboard already loads
+    lazy_costs = import_costs(top_level + deferred)
+    print("Imports deferred to the views that use them (extra ms when first used):")
+    for name in deferred:
+        print(f"  {name:<32}{lazy_costs.get(name, 0.0):>10.1f}")
+
+    seconds, errors = first_paint()
+    if seconds is None:
+        print("First paint: the dashboard could not be run (is streamlit installed?)")
+    else:
+        status = "OK" if seconds <= FIRST_PAINT_TARGET else "over target"
+        print(f"First paint of the overview: {seconds:.2f} s ({status}, target {FIRST_PAINT_TARGET:.1f} s, "
+              f"{errors} exceptions) in {os.getcwd()}")
@@ -0,0 +1,461 @@
+import glob
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from PIL import Image, ImageDraw
+    pil_available = True
+except ImportError:
+    pil_available = False
+
+try:
+    import resource
+    resource_available = True
+except ImportError:
+    resource_available = False
+
+import kpi_assets
+import kpi_store
+import kpi_summary
+import sites
+
+# Dashboard whose views are benchmarked
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD_PATH = os.path.join(CURRENT_DIR, "5_energy_dashboard.py")
+
+# Synthetic building trees (data/<scale>) and the results of every run (results/<scale>_<commit>.json)
+BENCHMARK_DIR = os.path.join(CURRENT_DIR, ".benchmark")
+DATA_DIR = os.path.join(BENCHMARK_DIR, "data")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+# Parameters of a generated tree, stored in it so a tree is only generated once per scale
+SCALE_FILE = "benchmark_scale.json"
+
+# Scale presets: rooms with comfort sensors, years of data, minutes between samples and plot size (px)
+SCALES = {
+    "small": {"rooms": 4, "years": 1, "minutes": 60, "image": [800, 600]},
+    "production": {"rooms": 25, "years": 3, "minutes": 10, "image": [2000, 1200]},
+}
+
+# Last year of the generated data
+LAST_YEAR = 2023
+
+# Fresh processes per view: the median of their first and second runs is reported
+REPEATS = 3
+
+# Seconds a single view may take before the run is abandoned
+VIEW_TIMEOUT = 600
+
+# A metric regresses when it grows by more than the ratio and by more than the absolute margin
+REGRESSION_RATIO = 0.2
+REGRESSION_MARGINS = {"cold_seconds": 0.1, "start_seconds": 0.05, "rerun_seconds": 0.05,
+                      "peak_memory_mb": 10.0, "payload_bytes": 20000}
+
+# Views and the navigation widget states that open them
+NAVIGATION = {"view": "Analysis Levels"}
+VIEWS = {
+    "Dashboard Overview": {"view": "Dashboard Overview"},
+    "Sankey Diagram": {"view": "Dashboard Overview", "overview_visualization": "Sankey Diagram"},
+    "Degree Days": dict(NAVIGATION, level="System Level", system_view="Degree Days"),
+    "Energy Signature": dict(NAVIGATION, level="System Level", system_view="Energy Signature"),
+    "GAHP": dict(NAVIGATION, level="Component Level", component_view="Gas Absorption Heat Pump (GAHP)"),
+    "EHP": dict(NAVIGATION, level="Component Level", component_view="Electric Heat Pump (EHP)"),
+    "Boilers": dict(NAVIGATION, level="Component Level", component_view="Boilers"),
+    "Dry Cooler": dict(NAVIGATION, level="Component Level", component_view="Dry Cooler (DC)"),
+    "BTES": dict(NAVIGATION, level="Component Level", component_view="Borehole Thermal Energy Storage (BTES)"),
+    "Comfort": dict(NAVIGATION, level="Comfort Level"),
+    "Comfort per room": dict(NAVIGATION, level="Comfort Level", comfort_view_Temperature="Per Room"),
+}
+
+# Types given to the generated rooms, in turn
+ROOM_TYPES = ["Office", "Teaching Room", "PC Room", "Meeting or break space", "Laboratory"]
+
+
+# Function to name a scale: the preset parameters with the overrides folded in
+def scale_tag(scale):
+    width, height = scale["image"]
+    return f"{scale['rooms']}r_{scale['years']}y_{scale['minutes']}min_{width}x{height}"
+
+
+def _write_csv(path, df):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=False, **kpi_store.CSV_OPTIONS)
+
+
+# Function to draw a plot-like PNG (white background, axes and a few noisy lines), so the files
+# have the size and compression of real plots rather than of a blank image
+def _write_plot(path, size, rng):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    width, height = size
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    left, bottom = width // 10, height - height // 10
+    draw.line([(left, height // 20), (left, bottom), (width - width // 20, bottom)], fill="black", width=2)
+    x = np.linspace(left, width - width // 20, 400)
+    for colour in ("#d93e29", "#00205b", "#2ecc71"):
+        y = bottom - (0.5 + 0.3 * np.sin(x / width * rng.uniform(4, 12)) + rng.normal(0, 0.04, x.size)) * (bottom - height // 20)
+        draw.line(list(zip(x.tolist(), y.tolist())), fill=colour, width=2)
+    image.save(path)
+
+
+def _write_sankey_html(path, rng):
+    nodes = ["Gas", "Electricity", "GAHP", "Boilers", "EHP", "BTES", "Heating", "Cooling", "Losses"]
+    links = "".join(
+        f'<path d="M100,{40 + 60 * i} C400,{40 + 60 * i} 400,{40 + 70 * j} 700,{40 + 70 * j}" '
+        f'stroke="#00205b" stroke-opacity="0.3" stroke-width="{rng.uniform(4, 40):.1f}" fill="none"/>'
+        for i in range(len(nodes)) for j in range(3)
+    )
+    labels = "".join(f'<text x="20" y="{45 + 60 * i}">{name}</text>' for i, name in enumerate(nodes))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'<html><body><svg width="1200" height="800">{links}{labels}</svg></body></html>')
+
+
+# Function to fill a synthetic building tree (4_KPI, 3_Sankey_Diagram and site.json) at the given scale.
+# Values follow the shapes the engines expect (seasonal outdoor temperature, loads driven by it,
+# on/off boilers, dry cooler modes), so every view does its real amount of work.
+def generate(root, scale, seed=0):
+    if not pil_available:
+        raise RuntimeError("Pillow is required to generate the plot library")
+    rng = np.random.default_rng(seed)
+    kpi_dir = os.path.join(root, kpi_assets.KPI_DIR)
+    sankey_dir = os.path.join(root, kpi_assets.SANKEY_DIR)
+    years = list(range(LAST_YEAR - scale["years"] + 1, LAST_YEAR + 1))
+    size = tuple(scale["image"])
+
+    times = pd.date_range(f"{years[0]}-01-01", f"{LAST_YEAR}-12-31 23:59", freq=f"{scale['minutes']}min")
+    stamps = times.strftime("%Y-%m-%d %H:%M")
+    n = len(times)
+    day = times.dayofyear.to_numpy()
+    hour = times.hour.to_numpy() + times.minute.to_numpy() / 60
+    outdoor = (10 - 10 * np.cos((day - 20) / 365 * 2 * np.pi) + 3 * np.sin((hour - 9) / 24 * 2 * np.pi)
+               + rng.normal(0, 2, n))
+    heating = 5 + 3.8 * np.maximum(14.5 - outdoor, 0) + rng.normal(0, 1, n)
+    cooling = 6 + 0.6 * np.maximum(outdoor - 17, 0) + rng.normal(0, 0.5, n)
+
+    _write_csv(os.path.join(kpi_dir, "EUI", "eui.csv"), pd.DataFrame({
+        "Year": years, "Total_EUI": rng.uniform(40, 50, len(years)).round(2),
+        "Heating_EUI": rng.uniform(25, 30, len(years)).round(2), "Cooling_EUI": rng.uniform(10, 14, len(years)).round(2)}))
+    _write_csv(os.path.join(kpi_dir, "SPI", "spi.csv"), pd.DataFrame({
+        "Year": years, "Heating_SPI": rng.uniform(0.85, 0.98, len(years)).round(3)}))
+
+    gas = np.maximum(heating * 0.4 + rng.normal(0, 1, n), 0)
+    _write_csv(os.path.join(kpi_dir, "GAHP_GUE", "gahp_meter.csv"), pd.DataFrame({
+        "Timestamp": stamps, "Gas_Input": gas.round(2), "Heat_Output": (gas * rng.uniform(1.2, 1.45, n)).round(2),
+        "GUE": rng.uniform(1.2, 1.45, n).round(3)}))
+    power = np.maximum(cooling / 2.8 + rng.normal(0, 0.2, n), 0.1)
+    _write_csv(os.path.join(kpi_dir, "EHP_EER", "ehp_meter.csv"), pd.DataFrame({
+        "Timestamp": stamps, "EER": (cooling / power).clip(1, 5).round(3),
+        "Cooling_Output": cooling.round(2), "Electric_Input": power.round(2)}))
+    for number in (1, 2):
+        on = rng.random(n) < 0.6
+        heat = np.where(on, heating * rng.uniform(0.8, 1.6, n), 0)
+        efficiency = rng.uniform(0.65, 0.9, n)
+        _write_csv(os.path.join(kpi_dir, f"Boiler{number}_Efficiency", f"boiler{number}_meter.csv"), pd.DataFrame({
+            "Timestamp": stamps, "Efficiency": (efficiency * 100).round(2),
+            "Gas_Input": (heat / efficiency).round(2), "Heat_Output": heat.round(2)}))
+
+    mode = rng.integers(0, 3, n)
+    inlet = np.where(mode == 1, outdoor + 8, np.where(mode == 2, outdoor - 6, outdoor))
+    outlet = np.where(mode == 1, inlet - 0.5 * 8, np.where(mode == 2, inlet + 0.3 * 6, inlet))
+    _write_csv(os.path.join(kpi_dir, "DC", "dc_meter.csv"), pd.DataFrame({
+        "Timestamp": stamps, "DC_Inlet_Temp": inlet.round(2), "DC_Outlet_Temp": outlet.round(3),
+        "Ambient_Temperature": outdoor.round(2), "DC_Flow": 10.0}))
+    ground = 10 + rng.normal(0, 0.2, n) - 0.3 * (times.year.to_numpy() - years[0])
+    _write_csv(os.path.join(kpi_dir, "BTES", "btes_field.csv"), pd.DataFrame({
+        "Timestamp": stamps, "BTES_Supply_Temp": (ground + 3 * np.cos(day / 365 * 2 * np.pi)).round(2),
+        "BTES_Return_Temp": ground.round(2), "BTES_Flow": 12.0}))
+    _write_csv(os.path.join(kpi_dir, "Degree_Days", "weather.csv"), pd.DataFrame({
+        "Timestamp": stamps, "Outdoor_Temperature": outdoor.round(2)}))
+    _write_csv(os.path.join(kpi_dir, "Energy_signature", "signature.csv"), pd.DataFrame({
+        "Timestamp": stamps, "Outdoor_Temperature": outdoor.round(2),
+        "Heating_Load": heating.round(2), "Cooling_Load": cooling.round(2)}))
+
+    rooms = [f"{floor}{number:02d}" for floor in range(1, 10) for number in range(1, 100)][:scale["rooms"]]
+    occupied = (times.dayofweek.to_numpy() < 5) & (hour >= 8) & (hour < 18)
+    temperatures = {"Timestamp": stamps}
+    air = {"Timestamp": stamps}
+    for room in rooms:
+        temperatures[f"T_{room}"] = (21.5 + 0.1 * (outdoor - 10) + rng.normal(0, 1, n)).round(2)
+        air[f"CO2_{room}"] = (420 + occupied * rng.uniform(100, 700, n)).round(0)
+        air[f"RH_{room}"] = (45 - 0.5 * (outdoor - 10) + rng.normal(0, 8, n)).clip(10, 90).round(1)
+    _write_csv(os.path.join(kpi_dir, "Comfort_results", "Temperature", "room_temperatures.csv"), pd.DataFrame(temperatures))
+    _write_csv(os.path.join(kpi_dir, "Comfort_results", "CO2_and_Humidity", "room_co2_rh.csv"), pd.DataFrame(air))
+
+    plots = [
+        "UA.png", "BTES_storage_decline.png", "EUI/energy_distribution_pie.png",
+        "GAHP_GUE/GUE_time_series.png", "GAHP_GUE/GUE_boxplot.png", "GAHP_GUE/GAHP_Seasonal_PowerVStemp.png",
+        "EHP_EER/EER_time_series.png", "EHP_EER/EER_temperature_scatter.png",
+        "Degree_Days/monthly_degree_days.png", "Degree_Days/monthly_eui.png", "Degree_Days/year_comparison.png",
+        "Energy_signature/heating_signature.png", "Energy_signature/cooling_signature.png",
+        "DC/dc_heat_rejection.png", "DC/dc_heat_absorption.png", "DC_EHP/dc_ehp_comparison_daily.png",
+    ]
+    for number in (1, 2):
+        plots += [f"Boiler{number}_Efficiency/Boiler{number}_time_series.png",
+                  f"Boiler{number}_Efficiency/Boiler{number}_boxplot.png",
+                  f"Boiler{number}_Efficiency/Boiler{number}_Efficiency_vs_Load_by_Season.png"]
+    plots += [f"Degree_Days/monthly_degree_days_{year}.png" for year in years]
+    for season in kpi_assets.SEASONS:
+        plots += [f"Comfort_results/Temperature/temp_summary_{season}.png",
+                  f"Comfort_results/CO2_and_Humidity/co2_ida_distribution_{season}.png",
+                  f"Comfort_results/CO2_and_Humidity/humidity_mean_summary_{season}.png"]
+        for room in rooms:
+            plots += [f"Comfort_results/Temperature/temp_{room}_{season}.png",
+                      f"Comfort_results/CO2_and_Humidity/combined_{room}_{season}.png"]
+    for plot in plots:
+        _write_plot(os.path.join(kpi_dir, plot), size, rng)
+    _write_plot(os.path.join(sankey_dir, "energy_sankey.png"), size, rng)
+    _write_sankey_html(os.path.join(sankey_dir, "energy_sankey.html"), rng)
+
+    with open(os.path.join(root, sites.SITE_CONFIG), "w", encoding="utf-8") as f:
+        json.dump({"name": "Benchmark Building",
+                   "room_types": {room: ROOM_TYPES[i % len(ROOM_TYPES)] for i, room in enumerate(rooms)}}, f, indent=2)
+    with open(os.path.join(root, SCALE_FILE), "w", encoding="utf-8") as f:
+        json.dump(scale, f)
+    return len(plots) + 1, n
+
+
+# Function to return the tree of a scale, generating it first if it does not exist yet
+def ensure_tree(scale, data_dir=DATA_DIR):
+    root = os.path.join(data_dir, scale_tag(scale))
+    try:
+        with open(os.path.join(root, SCALE_FILE), "r", encoding="utf-8") as f:
+            if json.load(f) == scale:
+                return root
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(root, ignore_errors=True)
+    start = time.perf_counter()
+    plots, rows = generate(root, scale)
+    print(f"Generated {root}: {rows} rows per series, {plots} plots in {time.perf_counter() - start:.1f} s")
+    return root
+
+
+# Function to remove everything the dashboard derives from the exports (caches, Parquet sidecars,
+# the overview summary), so the next run starts as on a fresh data drop
+def clear_derived(root):
+    shutil.rmtree(os.path.join(root, sites.CACHE_ROOT), ignore_errors=True)
+    kpi_dir = os.path.join(root, kpi_assets.KPI_DIR)
+    for path in glob.glob(os.path.join(kpi_dir, "**", "*.parquet"), recursive=True):
+        os.remove(path)
+    summary = os.path.join(kpi_dir, kpi_summary.SUMMARY_FILE)
+    if os.path.exists(summary):
+        os.remove(summary)
+
+
+def _peak_rss_mb():
+    if not resource_available:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Function to run one view headlessly in this process (the working directory is the tree) and
+# measure it: first run, a second run, the peak memory it added and what the browser was sent.
+# Payload and stage figures come from the rerun log the dashboard writes (instrument.py).
+def measure_view(view):
+    import instrument
+    from streamlit.testing.v1 import AppTest
+
+    # Warm up the test harness on an empty app, so only the dashboard's own cost is measured
+    AppTest.from_string("import streamlit as st").run()
+    baseline = _peak_rss_mb()
+    at = AppTest.from_file(DASHBOARD_PATH, default_timeout=VIEW_TIMEOUT)
+    for key, value in VIEWS[view].items():
+        at.session_state[key] = value
+
+    start = time.perf_counter()
+    at.run()
+    first_seconds = time.perf_counter() - start
+    peak = _peak_rss_mb()
+    first = (instrument.read_log(limit=1) or [{}])[-1]
+    errors = [str(e.value) for e in at.exception] + [str(e.value) for e in at.error]
+
+    start = time.perf_counter()
+    at.run()
+    rerun_seconds = time.perf_counter() - start
+
+    counters = first.get("counters", {})
+    return {
+        "first_seconds": first_seconds,
+        "rerun_seconds": rerun_seconds,
+        "peak_memory_mb": peak - baseline if peak is not None else None,
+        "payload_bytes": counters.get("bytes sent", 0),
+        "messages": counters.get("messages sent", 0),
+        "images_sent": counters.get("images sent", 0),
+        "image_bytes": counters.get("image bytes", 0),
+        "stages": {name: stage["seconds"] for name, stage in first.get("stages", {}).items()},
+        "errors": errors[:3],
+    }
+
+
+# Function to measure a view in a fresh interpreter (pre-warming off, so nothing runs alongside)
+def measure_in_process(root, view):
+    env = dict(os.environ, DASHBOARD_PREWARM="0")
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "measure", view], cwd=root, env=env,
+                            capture_output=True, text=True, timeout=VIEW_TIMEOUT * 3)
+    try:
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        return {"errors": [result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "no output"]}
+
+
+def _median(samples, key):
+    values = [sample[key] for sample in samples if sample.get(key) is not None]
+    return statistics.median(values) if values else None
+
+
+# Function to benchmark every view of a tree. Per view: one cold run after the derived data is
+# cleared, then repeated fresh processes on warm disk caches (a server restart) with a rerun each.
+def run_benchmark(root, views=None, repeats=REPEATS):
+    results = {}
+    for view in views or VIEWS:
+        clear_derived(root)
+        cold = measure_in_process(root, view)
+        samples = [measure_in_process(root, view) for _ in range(repeats)]
+        results[view] = {
+            "cold_seconds": cold.get("first_seconds"),
+            "cold_peak_memory_mb": cold.get("peak_memory_mb"),
+            "start_seconds": _median(samples, "first_seconds"),
+            "rerun_seconds": _median(samples, "rerun_seconds"),
+            "peak_memory_mb": _median(samples, "peak_memory_mb"),
+            "payload_bytes": _median(samples, "payload_bytes"),
+            "messages": _median(samples, "messages"),
+            "images_sent": _median(samples, "images_sent"),
+            "image_bytes": _median(samples, "image_bytes"),
+            "cold_stages": cold.get("stages", {}),
+            "errors": cold.get("errors", []) + [error for sample in samples for error in sample.get("errors", [])],
+        }
+        row = results[view]
+        print(f"  {view:<20}{_format(row['cold_seconds'], '.2f')} s cold{_format(row['start_seconds'], '.2f')} s start"
+              f"{_format(row['rerun_seconds'], '.2f')} s rerun{_format(row['peak_memory_mb'], '.0f')} MB"
+              f"{_format(row['payload_bytes'] and row['payload_bytes'] / 1024, '.0f')} KB sent"
+              + (f"  ERRORS: {row['errors'][0]}" if row["errors"] else ""))
+    return results
+
+
+def _format(value, spec):
+    return f"{'-':>9}" if value is None else f"{value:>9{spec}}"
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=CURRENT_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+# Function to describe the code being measured: commit, uncommitted changes and interpreter
+def code_version():
+    commit = _git("rev-parse", "HEAD") or "unknown"
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    return {"commit": commit, "subject": _git("log", "-1", "--format=%s"), "dirty": dirty,
+            "python": sys.version.split()[0]}
+
+
+# Function to store the results of a run as results/<scale>_<commit>.json
+def save_results(scale, results, results_dir=RESULTS_DIR):
+    version = code_version()
+    record = dict(version, time=time.time(), scale=scale, views=results)
+    os.makedirs(results_dir, exist_ok=True)
+    name = f"{scale_tag(scale)}_{version['commit'][:10]}{'-dirty' if version['dirty'] else ''}.json"
+    path = os.path.join(results_dir, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    return path
+
+
+# Function to find the latest earlier result of the same scale measured on another commit
+def previous_results(path, results_dir=RESULTS_DIR):
+    with open(path, "r", encoding="utf-8") as f:
+        current = json.load(f)
+    candidates = []
+    for other in glob.glob(os.path.join(results_dir, f"{scale_tag(current['scale'])}_*.json")):
+        if os.path.samefile(other, path):
+            continue
+        with open(other, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        if record["commit"] != current["commit"] or record["dirty"] != current["dirty"]:
+            candidates.append((record["time"], other))
+    return max(candidates)[1] if candidates else None
+
+
+# Function to compare two result files; returns [(view, metric, old, new)] of the regressions
+def compare(old_path, new_path):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    if old["scale"] != new["scale"]:
+        print(f"Warning: comparing different scales ({scale_tag(old['scale'])} and {scale_tag(new['scale'])})")
+    print(f"{old['commit'][:10]} -> {new['commit'][:10]}{' (uncommitted changes)' if new['dirty'] else ''}")
+    regressions = []
+    for view, metrics in new["views"].items():
+        before = old["views"].get(view)
+        if before is None:
+            continue
+        cells = []
+        for metric, margin in REGRESSION_MARGINS.items():
+            a, b = before.get(metric), metrics.get(metric)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a if a else 0.0
+            flag = " !" if b - a > margin and change > REGRESSION_RATIO else ""
+            if flag:
+                regressions.append((view, metric, a, b))
+            cells.append(f"{metric.split('_')[0]} {change:+6.0%}{flag}")
+        print(f"  {view:<20}" + "   ".join(cells))
+    return regressions
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    if arguments[:1] == ["measure"]:
+        # Internal: python 7_benchmark.py measure <view>, run in the tree by run_benchmark
+        print(json.dumps(measure_view(arguments[1])))
+    elif arguments[:1] == ["compare"]:
+        # python 7_benchmark.py compare <old results> <new results>
+        found = compare(arguments[1], arguments[2])
+        sys.exit(1 if found else 0)
+    else:
+        # python 7_benchmark.py [small|production] [rooms=N] [years=N] [minutes=N] [image=WxH]
+        #                       [repeats=N] [view=<name>] [--generate-only]
+        scale = dict(SCALES["small"])
+        repeats, views = REPEATS, []
+        for argument in arguments:
+            key, _, value = argument.partition("=")
+            if argument in SCALES:
+                scale = dict(SCALES[argument])
+            elif key in ("rooms", "years", "minutes"):
+                scale[key] = int(value)
+            elif key == "image":
+                scale["image"] = [int(part) for part in value.lower().split("x")]
+            elif key == "repeats":
+                repeats = int(value)
+            elif key == "view":
+                views.append(value)
+        root = ensure_tree(scale)
+        if "--generate-only" in arguments:
+            sys.exit(0)
+        unknown = [view for view in views if view not in VIEWS]
+        if unknown:
+            sys.exit(f"Unknown views {unknown}; choose from {list(VIEWS)}")
+        print(f"Benchmarking {scale_tag(scale)} ({repeats} repeats per view)")
+        path = save_results(scale, run_benchmark(root, views, repeats))
+        print(f"Results written to {path}")
+        baseline = previous_results(path)
+        if baseline:
+            found = compare(baseline, path)
+            if found:
+                print(f"{len(found)} regressions over {int(REGRESSION_RATIO * 100)}%:")
+                for view, metric, a, b in found:
+                    print(f"  {view}: {metric} {a:.3g} -> {b:.3g}")
+                sys.exit(1)
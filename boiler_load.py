@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+import gahp_gue
+import timeseries
+
+# Raw meter columns of the boiler exports: gas input and heat output power (kW)
+GAS_COLUMNS = gahp_gue.GAS_COLUMNS
+HEAT_COLUMNS = gahp_gue.HEAT_COLUMNS
+RAW_COLUMNS = gahp_gue.RAW_COLUMNS
+
+# Rated heat output per boiler (kW); boilers without one use the 99th percentile of their output
+RATED_OUTPUT_KW = {}
+
+# Part-load ratio bins (fraction of rated output); the last bin also holds overload readings
+PLR_EDGES = np.linspace(0.0, 1.0, 11)
+PLR_LABELS = [f"{low:.0%}-{high:.0%}" for low, high in zip(PLR_EDGES[:-1], PLR_EDGES[1:])]
+
+# A boiler counts as firing above this share of its rated output
+FIRING_SHARE = 0.02
+
+
+# Rated output of every boiler, from RATED_OUTPUT_KW or the 99th percentile of its output
+def _capacities(names, codes, heat, rated):
+    running = heat > 0
+    observed = pd.Series(heat[running]).groupby(codes[running]).quantile(0.99)
+    observed = observed.reindex(range(names.size)).to_numpy()
+    configured = np.array([rated.get(name, np.nan) for name in names], dtype=float)
+    return np.where(np.isnan(configured), observed, configured)
+
+
+# Hours represented by each sample, like timeseries.sample_hours but restarting at each boiler
+def _sample_hours(t, starts):
+    steps = np.diff(t.astype(np.int64), prepend=t[:1].astype(np.int64)) / 3.6e12
+    steps[starts] = 0.0
+    return np.clip(steps, 0.0, timeseries.MAX_SAMPLE_HOURS)
+
+
+# Function to bin the operation of several boilers by part-load ratio and season in one grouped
+# reduction. Inputs are flat arrays of equal length, with each boiler's samples sorted in time.
+# Returns a frame indexed by (boiler, season, plr) with gas and heat energy, energy-weighted
+# efficiency (%), firing hours and the number of starts (cycles) in each bin.
+def load_bins(boilers, timestamps, gas, heat, rated=RATED_OUTPUT_KW):
+    boilers = np.asarray(boilers)
+    t = np.asarray(timestamps, dtype="datetime64[ns]")
+    gas = np.asarray(gas, dtype=float)
+    heat = np.asarray(heat, dtype=float)
+    valid = ~np.isnat(t) & np.isfinite(gas) & np.isfinite(heat)
+    boilers, t, gas, heat = boilers[valid], t[valid], gas[valid], heat[valid]
+    if t.size == 0:
+        index = pd.MultiIndex.from_arrays([[], [], []], names=["boiler", "season", "plr"])
+        return pd.DataFrame(columns=["gas_kwh", "heat_kwh", "efficiency", "hours", "cycles"], index=index)
+
+    names, boiler_codes = np.unique(boilers, return_inverse=True)
+    starts = np.flatnonzero(np.r_[True, boiler_codes[1:] != boiler_codes[:-1]])
+    hours = _sample_hours(t, starts)
+    capacities = _capacities(names, boiler_codes, heat, rated)
+
+    plr = heat / capacities[boiler_codes]
+    firing = plr > FIRING_SHARE
+    # A start is a firing sample that follows a non-firing sample of the same boiler
+    previous = np.r_[False, firing[:-1]]
+    previous[starts] = False
+    started = firing & ~previous
+
+    seasons, season_years = timeseries.season_codes(t)
+    season_keys, season_index = np.unique(season_years * 4 + seasons, return_inverse=True)
+    plr_bins = np.clip(np.digitize(plr, PLR_EDGES[1:-1]), 0, len(PLR_LABELS) - 1)
+
+    n_seasons, n_bins = season_keys.size, len(PLR_LABELS)
+    cells = ((boiler_codes * n_seasons + season_index) * n_bins + plr_bins)[firing]
+    size = names.size * n_seasons * n_bins
+    sums = [np.bincount(cells, weights=weights[firing], minlength=size)
+            for weights in (gas * hours, heat * hours, hours, started.astype(float))]
+    gas_kwh, heat_kwh, firing_hours, cycles = sums
+
+    efficiency = np.full(size, np.nan)
+    np.divide(heat_kwh * 100, gas_kwh, out=efficiency, where=gas_kwh >= gahp_gue.MIN_GAS_KWH)
+    index = pd.MultiIndex.from_product(
+        [list(names), [timeseries.season_label(k % 4, k // 4) for k in season_keys], PLR_LABELS],
+        names=["boiler", "season", "plr"],
+    )
+    table = pd.DataFrame({"gas_kwh": gas_kwh, "heat_kwh": heat_kwh, "efficiency": efficiency,
+                          "hours": firing_hours, "cycles": cycles.astype(int)}, index=index)
+    return table[table["hours"] > 0]
+
+
+# Function to gather the raw meter data of several boiler frames: {boiler: frame}
+def bins_from_frames(frames, rated=RATED_OUTPUT_KW):
+    parts = []
+    for name, df in frames.items():
+        gas_column = timeseries.pick_column(df, GAS_COLUMNS)
+        heat_column = timeseries.pick_column(df, HEAT_COLUMNS)
+        timestamps = timeseries.time_values(df)
+        if gas_column is None or heat_column is None or timestamps is None:
+            continue
+        order = np.argsort(timestamps, kind="stable")
+        parts.append((np.full(timestamps.size, name, dtype=object), timestamps[order],
+                      pd.to_numeric(df[gas_column], errors="coerce").to_numpy()[order],
+                      pd.to_numeric(df[heat_column], errors="coerce").to_numpy()[order]))
+    if not parts:
+        return None
+    return load_bins(*(np.concatenate(arrays) for arrays in zip(*parts)), rated=rated)
+
+
+# Function to get the heat and gas energy (kWh) of one boiler frame over all its samples; zeros without
+# raw meter data. Unlike the binned table it does not depend on the firing threshold, so totals of
+# consecutive chunks add up to the totals of the whole series.
+def frame_energy(df, previous=None):
+    gas_column = timeseries.pick_column(df, GAS_COLUMNS)
+    heat_column = timeseries.pick_column(df, HEAT_COLUMNS)
+    timestamps = timeseries.time_values(df)
+    if gas_column is None or heat_column is None or timestamps is None:
+        return [0.0, 0.0]
+    order = np.argsort(timestamps, kind="stable")
+    hours = timeseries.sample_hours(timestamps[order], previous)
+    gas = pd.to_numeric(df[gas_column], errors="coerce").to_numpy()[order] * hours
+    heat = pd.to_numeric(df[heat_column], errors="coerce").to_numpy()[order] * hours
+    valid = np.isfinite(gas) & np.isfinite(heat)
+    return [float(heat[valid].sum()), float(gas[valid].sum())]
+
+
+# Function to get the heat and gas energy (kWh) of the given frames; zeros without raw meter data
+def energy_totals(frames):
+    totals = [0.0, 0.0]
+    for df in frames:
+        heat, gas = frame_energy(df)
+        totals = [totals[0] + heat, totals[1] + gas]
+    return totals
+
+
+# Function to get the efficiency (%) of summed energy totals; None without gas use
+def totals_efficiency(totals):
+    value = gahp_gue.totals_gue(totals)
+    return None if value is None else value * 100
+
+
+# Function to get the energy-weighted efficiency (%) of the given frames; None without raw meter data
+def overall_efficiency(frames):
+    return totals_efficiency(energy_totals(frames))
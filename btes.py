@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import kpi_store
+import timeseries
+
+# Columns of the BTES field exports: fluid temperature into and out of the boreholes (°C), flow (m³/h)
+SUPPLY_COLUMNS = ("BTES_Supply_Temp", "T_supply", "Supply_Temperature")
+RETURN_COLUMNS = ("BTES_Return_Temp", "T_return", "Return_Temperature")
+FLOW_COLUMNS = ("BTES_Flow", "Flow", "Flow_Rate")
+
+# kW per (m³/h · K) of the borehole loop
+FLUID_KW_PER_M3H_K = 1.163
+
+# Running totals of the tracker (kept out of the KPI share)
+STATE_DIR = os.path.join(".dashboard_cache", "btes")
+
+# Bump when the layout of the state file changes so it is rebuilt
+STATE_VERSION = 1
+
+
+def _empty_state(csv_path):
+    return {"version": STATE_VERSION, "source": os.path.abspath(csv_path), "offset": 0, "header": None,
+            "tail": None, "last_timestamp": None, "days": {}}
+
+
+# State of charge of the borehole field from its flow and temperatures.
+# Heat put into the ground (supply warmer than return) charges the store, heat taken out discharges it.
+# Each sample is credited the interval since the previous one, so appended rows are integrated
+# exactly as they would be in a full pass. Daily sums and the parse position are persisted,
+# and a refresh only reads the rows appended since the last one.
+class BTESTracker:
+    def __init__(self, csv_path, state_dir=STATE_DIR):
+        self.csv_path = csv_path
+        self.state_path = os.path.join(state_dir, f"{os.path.basename(csv_path)}.state.json")
+        self.state = self._read_state()
+        self._lock = threading.Lock()
+
+    def _read_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return _empty_state(self.csv_path)
+        if state.get("version") != STATE_VERSION or state.get("source") != os.path.abspath(self.csv_path):
+            return _empty_state(self.csv_path)
+        return state
+
+    def _write_state(self):
+        temporary = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, separators=(",", ":"))
+            os.replace(temporary, self.state_path)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    # Function to integrate the rows appended since the last refresh; returns the number of new samples
+    def refresh(self):
+        with self._lock:
+            header, tail = (self.state.get(key) for key in ("header", "tail"))
+            rows, offset, header, tail = kpi_store.read_appended_rows(
+                self.csv_path, self.state["offset"], header.encode("latin-1") if header is not None else None,
+                tail.encode("latin-1") if tail is not None else None)
+            if rows is None:
+                # File replaced: integrate it again from the start
+                self.state = _empty_state(self.csv_path)
+                rows, offset, header, tail = kpi_store.read_appended_rows(self.csv_path, 0, None)
+            added = self._integrate(rows) if rows is not None and not rows.empty else 0
+            moved = offset != self.state["offset"]
+            self.state["offset"] = offset
+            self.state["header"] = header.decode("latin-1") if header is not None else None
+            self.state["tail"] = tail.decode("latin-1") if tail is not None else None
+            if moved:
+                self._write_state()
+            return added
+
+    def _integrate(self, rows):
+        columns = [timeseries.pick_column(rows, candidates) for candidates in (SUPPLY_COLUMNS, RETURN_COLUMNS, FLOW_COLUMNS)]
+        timestamps = timeseries.time_values(rows)
+        if None in columns or timestamps is None:
+            return 0
+        supply, returned, flow = (pd.to_numeric(rows[column], errors="coerce").to_numpy() for column in columns)
+        t = timestamps.astype(np.int64)
+        valid = ~np.isnat(timestamps) & np.isfinite(supply) & np.isfinite(returned) & np.isfinite(flow)
+        last = self.state["last_timestamp"]
+        if last is not None:
+            valid &= t > last
+        t, supply, returned = t[valid], supply[valid], returned[valid]
+        flow = flow[valid]
+        if t.size == 0:
+            return 0
+        order = np.argsort(t, kind="stable")
+        t, supply, returned, flow = t[order], supply[order], returned[order], flow[order]
+
+        previous = np.concatenate([[last if last is not None else t[0]], t[:-1]])
+        hours = np.minimum((t - previous) / 3.6e12, timeseries.MAX_SAMPLE_HOURS)
+        energy = flow * FLUID_KW_PER_M3H_K * (supply - returned) * hours
+        days = t.astype("datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+        touched, inverse = np.unique(days, return_inverse=True)
+        sums = np.stack([
+            np.bincount(inverse, weights=np.maximum(energy, 0)),
+            np.bincount(inverse, weights=np.maximum(-energy, 0)),
+            np.bincount(inverse, weights=returned),
+            np.bincount(inverse),
+        ], axis=1)
+        stored = self.state["days"]
+        for day, values in zip(touched.tolist(), sums.tolist()):
+            entry = stored.setdefault(str(day), [0.0, 0.0, 0.0, 0])
+            for position, value in enumerate(values):
+                entry[position] += value
+        self.state["last_timestamp"] = int(t[-1])
+        return int(t.size)
+
+    # Daily charge and discharge (kWh), mean return temperature and the cumulative state of charge
+    def daily(self):
+        if not self.state["days"]:
+            return pd.DataFrame(columns=["charge_kwh", "discharge_kwh", "return_temp", "soc_kwh"])
+        days = np.array(sorted(int(day) for day in self.state["days"]))
+        values = np.array([self.state["days"][str(day)] for day in days], dtype=float)
+        table = pd.DataFrame({
+            "charge_kwh": values[:, 0],
+            "discharge_kwh": values[:, 1],
+            "return_temp": values[:, 2] / np.maximum(values[:, 3], 1),
+        }, index=pd.DatetimeIndex(days.astype("datetime64[D]").astype("datetime64[ns]"), name="day"))
+        table["soc_kwh"] = (table["charge_kwh"] - table["discharge_kwh"]).cumsum()
+        return table
+
+    # Charge, discharge and net balance (kWh) per calendar year
+    def annual(self):
+        daily = self.daily()
+        table = daily.groupby(daily.index.year)[["charge_kwh", "discharge_kwh"]].sum()
+        table.index.name = "year"
+        table["balance_kwh"] = table["charge_kwh"] - table["discharge_kwh"]
+        return table
+
+    # Decline rate of each season: net energy per day (kWh/day) and the drift of the return temperature
+    def seasonal_trends(self):
+        daily = self.daily()
+        if daily.empty:
+            return pd.DataFrame(columns=["net_kwh", "days", "rate_kwh_per_day", "return_temp_change"])
+        seasons, season_years = timeseries.season_codes(daily.index.values)
+        keys = season_years * 4 + seasons
+        grouped = daily.assign(net=daily["charge_kwh"] - daily["discharge_kwh"]).groupby(keys, sort=True)
+        table = pd.DataFrame({
+            "net_kwh": grouped["net"].sum(),
+            "days": grouped.size(),
+            "return_temp_change": grouped["return_temp"].last() - grouped["return_temp"].first(),
+        })
+        table["rate_kwh_per_day"] = table["net_kwh"] / table["days"]
+        table.index = pd.Index([timeseries.season_label(key % 4, key // 4) for key in table.index], name="season")
+        return table[["net_kwh", "days", "rate_kwh_per_day", "return_temp_change"]]
@@ -0,0 +1,162 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import timeseries
+
+# Occupancy window of the comfort analysis (hours, end exclusive)
+OCCUPANCY_HOURS = (9, 17)
+
+# Temperature classes 1-4 by deviation from the setpoint (°C)
+TEMPERATURE_LIMITS = [1, 2, 3]
+# CO2 IDA classes 1-4 (ppm)
+IDA_LIMITS = [400, 600, 1000]
+# Relative humidity: below, within and above the optimal band (%)
+HUMIDITY_RANGE = (30, 60)
+
+# Temperature setpoint per season (°C), indexed like timeseries.SEASON_NAMES
+SEASON_SETPOINTS = {"Winter": 21.0, "Spring": 21.0, "Summer": 24.0, "Fall": 21.0}
+
+# Column names of the comfort exports
+VARIABLE_COLUMNS = {
+    "temperature": ("Temperature", "Temp", "T"),
+    "co2": ("CO2", "CO₂", "Co2"),
+    "humidity": ("RH", "Humidity", "Relative_Humidity"),
+}
+ROOM_COLUMNS = ("Room", "room", "Room_ID")
+ROOM_PATTERN = re.compile(r"(\d{3}[A-Za-z]?)")
+
+# Variables held by the exports of each comfort folder. Columns named by the room alone (e.g. "241")
+# are only read from a folder holding a single variable.
+FOLDER_VARIABLES = {
+    "Temperature": ("temperature",),
+    "CO2_and_Humidity": ("co2", "humidity"),
+}
+
+CLASS_LABELS = {
+    "temperature": ["Class 1", "Class 2", "Class 3", "Class 4"],
+    "co2": ["IDA 1", "IDA 2", "IDA 3", "IDA 4"],
+    "humidity": ["Below 30%", "30-60%", "Above 60%"],
+}
+
+
+def _matches_variable(column, variable):
+    tokens = [token.lower() for token in re.split(r"[^0-9A-Za-z₂]+", str(column)) if token]
+    return any(name.lower() in tokens for name in VARIABLE_COLUMNS[variable])
+
+
+# Function to list the variables an export may hold, from the folder it lies in
+def source_variables(path):
+    folder = os.path.basename(os.path.dirname(os.path.normpath(path)))
+    return FOLDER_VARIABLES.get(folder, tuple(VARIABLE_COLUMNS))
+
+
+# Function to arrange a comfort export as a room-by-time matrix.
+# Long exports have a room column; wide exports have one column per room (e.g. "CO2_241"),
+# or named by the room alone when bare_rooms is set.
+def room_matrix(df, variable, bare_rooms=False):
+    timestamps = timeseries.time_values(df)
+    if timestamps is None:
+        return None
+    room_column = timeseries.pick_column(df, ROOM_COLUMNS)
+    if room_column is not None:
+        value_column = timeseries.pick_column(df, VARIABLE_COLUMNS[variable])
+        if value_column is None:
+            return None
+        long = pd.DataFrame({
+            "time": timestamps,
+            "room": df[room_column].astype(str),
+            "value": pd.to_numeric(df[value_column], errors="coerce"),
+        })
+        wide = long.pivot_table(index="time", columns="room", values="value", aggfunc="mean")
+        return wide.index.values.astype("datetime64[ns]"), list(wide.columns), wide.to_numpy(dtype=np.float32)
+
+    rooms, columns = [], []
+    for column in df.columns:
+        match = ROOM_PATTERN.search(str(column))
+        if match and (_matches_variable(column, variable) or (bare_rooms and ROOM_PATTERN.fullmatch(str(column)))):
+            rooms.append(match.group(1))
+            columns.append(column)
+    if not columns:
+        return None
+    matrix = df[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float32)
+    return timestamps, rooms, matrix
+
+
+# Boolean mask of the samples inside the occupancy window
+def occupancy_mask(timestamps, hours=OCCUPANCY_HOURS, weekdays_only=False):
+    t = np.asarray(timestamps, dtype="datetime64[ns]")
+    hour = (t - t.astype("datetime64[D]")).astype("timedelta64[h]").astype(np.int64)
+    mask = (hour >= hours[0]) & (hour < hours[1])
+    if weekdays_only:
+        weekday = (t.astype("datetime64[D]").astype(np.int64) + 3) % 7  # 0 = Monday
+        mask &= weekday < 5
+    return mask
+
+
+# Class code (0-based) of every value of a room-by-time matrix; -1 where there is no reading
+def classify(variable, matrix, seasons=None):
+    if variable == "temperature":
+        setpoints = np.array([SEASON_SETPOINTS[name] for name in timeseries.SEASON_NAMES], dtype=np.float32)
+        deviation = np.abs(matrix - setpoints[seasons][:, None])
+        codes = np.digitize(deviation, TEMPERATURE_LIMITS, right=True)
+    elif variable == "co2":
+        codes = np.digitize(matrix, IDA_LIMITS)
+    else:
+        codes = np.digitize(matrix, HUMIDITY_RANGE) - (matrix == HUMIDITY_RANGE[1])
+    return np.where(np.isnan(matrix), -1, codes)
+
+
+# Share (%) of occupied hours per class, for every room and season in one grouped reduction.
+# The occupancy window can be passed as a precomputed mask.
+# Returns a frame indexed by (season, room) with one column per class plus the sample count.
+def class_shares(variable, timestamps, rooms, matrix, weekdays_only=False, occupied=None):
+    seasons, _ = timeseries.season_codes(timestamps)
+    codes = classify(variable, matrix, seasons)
+    n_classes = len(CLASS_LABELS[variable])
+    n_rooms = len(rooms)
+    if occupied is None:
+        occupied = occupancy_mask(timestamps, weekdays_only=weekdays_only)
+    occupied = occupied[:, None] & (codes >= 0)
+
+    cell = (seasons[:, None] * n_rooms + np.arange(n_rooms)[None, :]) * n_classes + codes
+    counts = np.bincount(cell[occupied], minlength=4 * n_rooms * n_classes).reshape(4, n_rooms, n_classes)
+    totals = counts.sum(axis=2, keepdims=True)
+    shares = np.divide(counts * 100.0, totals, out=np.full(counts.shape, np.nan), where=totals > 0)
+
+    index = pd.MultiIndex.from_product([list(timeseries.SEASON_NAMES), rooms], names=["season", "room"])
+    table = pd.DataFrame(shares.reshape(-1, n_classes), index=index, columns=CLASS_LABELS[variable])
+    table["samples"] = totals.reshape(-1)
+    return table[table["samples"] > 0]
+
+
+# Function to combine the class-share tables of several exports; a (season, room) found in more
+# than one export gets the shares of its summed counts
+def merge_shares(variable, tables):
+    labels = CLASS_LABELS[variable]
+    table = pd.concat(tables)
+    counts = table[labels].mul(table["samples"], axis=0) / 100
+    counts["samples"] = table["samples"]
+    counts = counts.groupby(level=["season", "room"]).sum()
+    merged = counts[labels].div(counts["samples"], axis=0) * 100
+    merged["samples"] = counts["samples"]
+    return merged.sort_index()
+
+
+# Function to classify every comfort export ({path: frame}): {variable: class-share table}
+def comfort_tables(frames, weekdays_only=False):
+    tables = {}
+    for variable in VARIABLE_COLUMNS:
+        parts = []
+        for path, df in frames.items():
+            variables = source_variables(path)
+            if variable not in variables:
+                continue
+            arranged = room_matrix(df, variable, bare_rooms=len(variables) == 1)
+            if arranged is not None:
+                parts.append(class_shares(variable, *arranged, weekdays_only=weekdays_only))
+        if parts:
+            tables[variable] = merge_shares(variable, parts)
+    return tables
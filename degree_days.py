@@ -0,0 +1,163 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import kpi_store
+import timeseries
+
+# Outdoor temperature columns of the weather exports (°C)
+OUTDOOR_COLUMNS = ("Outdoor_Temperature", "Outdoor_Temp", "T_out", "T_outdoor", "OAT", "Temperature")
+
+# Base temperatures (°C) of the heating and cooling degree days
+HEATING_BASE = 18.0
+COOLING_BASE = 24.0
+
+# Degree-day years follow the academic year, which starts in September
+YEAR_START_MONTH = 9
+
+# Reference degree days of the comparison tab
+SCHOOL_REFERENCE = {"Secondary Schools (2015-2018)": {"HDD": 2172, "CDD": 27}}
+
+
+def year_label(start_year):
+    return f"{start_year}-{start_year + 1}"
+
+
+# Degree days from daily mean outdoor temperatures, updated incrementally.
+# Per-day sums and counts are kept, so appended readings only recompute the days they
+# touch, and the yearly totals are adjusted by the change of those days.
+class DegreeDayEngine:
+    def __init__(self, heating_base=HEATING_BASE, cooling_base=COOLING_BASE, year_start_month=YEAR_START_MONTH):
+        self.heating_base = heating_base
+        self.cooling_base = cooling_base
+        self.year_start_month = year_start_month
+        self.last_timestamp = None
+        self._first_day = None
+        self._sums = np.zeros(0)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._hdd = np.zeros(0)
+        self._cdd = np.zeros(0)
+        self.totals = {}  # academic start year: [HDD, CDD]
+
+    def _grow(self, first_day, last_day):
+        if self._first_day is None:
+            self._first_day = first_day
+        size = last_day - self._first_day + 1
+        if size > self._sums.size:
+            extra = size - self._sums.size
+            self._sums = np.concatenate([self._sums, np.zeros(extra)])
+            self._counts = np.concatenate([self._counts, np.zeros(extra, dtype=np.int64)])
+            self._hdd = np.concatenate([self._hdd, np.zeros(extra)])
+            self._cdd = np.concatenate([self._cdd, np.zeros(extra)])
+
+    def _academic_years(self, day_numbers):
+        years, months = timeseries.calendar_fields(np.asarray(day_numbers).astype("datetime64[D]"))
+        return years - (months < self.year_start_month)
+
+    # Function to add readings newer than the last update; older ones were already counted
+    def update(self, timestamps, temperatures):
+        t = np.asarray(timestamps, dtype="datetime64[ns]")
+        values = np.asarray(temperatures, dtype=float)
+        keep = ~np.isnat(t) & np.isfinite(values)
+        if self.last_timestamp is not None:
+            keep &= t > self.last_timestamp
+        t, values = t[keep], values[keep]
+        if t.size == 0:
+            return 0
+        self.last_timestamp = t.max()
+
+        days = t.astype("datetime64[D]").astype(np.int64)
+        self._grow(int(days.min()), int(days.max()))
+        positions = days - self._first_day
+        touched, inverse = np.unique(positions, return_inverse=True)
+        self._sums[touched] += np.bincount(inverse, weights=values)
+        self._counts[touched] += np.bincount(inverse)
+
+        means = self._sums[touched] / self._counts[touched]
+        hdd = np.maximum(self.heating_base - means, 0.0)
+        cdd = np.maximum(means - self.cooling_base, 0.0)
+        years = self._academic_years(touched + self._first_day)
+        for year in np.unique(years):
+            in_year = years == year
+            total = self.totals.setdefault(int(year), [0.0, 0.0])
+            total[0] += float(np.sum(hdd[in_year] - self._hdd[touched[in_year]]))
+            total[1] += float(np.sum(cdd[in_year] - self._cdd[touched[in_year]]))
+        self._hdd[touched] = hdd
+        self._cdd[touched] = cdd
+        return touched.size
+
+    # Daily mean temperature and degree days of every day with readings
+    def daily(self):
+        filled = np.flatnonzero(self._counts)
+        day_numbers = filled + (self._first_day or 0)
+        table = pd.DataFrame({
+            "temperature": self._sums[filled] / self._counts[filled],
+            "hdd": self._hdd[filled],
+            "cdd": self._cdd[filled],
+            "year": self._academic_years(day_numbers),
+        }, index=pd.DatetimeIndex(day_numbers.astype("datetime64[D]").astype("datetime64[ns]"), name="day"))
+        return table
+
+    # Monthly degree days of one academic year (or of all years)
+    def monthly(self, year=None):
+        daily = self.daily()
+        if year is not None:
+            daily = daily[daily["year"] == year]
+        months = daily.index.to_period("M").rename("month")
+        return daily.groupby(months)[["hdd", "cdd"]].sum()
+
+    # Yearly totals from the running sums, labelled by academic year
+    def annual(self):
+        rows = {year_label(year): {"HDD": hdd, "CDD": cdd} for year, (hdd, cdd) in sorted(self.totals.items())}
+        return pd.DataFrame.from_dict(rows, orient="index", columns=["HDD", "CDD"])
+
+    # Cumulative degree days by day of the academic year, one column per year
+    def year_over_year(self, kind="hdd"):
+        daily = self.daily()
+        if daily.empty:
+            return pd.DataFrame()
+        starts = pd.to_datetime({"year": daily["year"], "month": self.year_start_month, "day": 1})
+        offset = (daily.index - pd.DatetimeIndex(starts.values)).days
+        table = pd.DataFrame({"day": np.asarray(offset), "year": daily["year"].map(year_label).to_numpy(),
+                              "value": daily[kind].to_numpy()})
+        table = table.pivot_table(index="day", columns="year", values="value", aggfunc="sum").sort_index()
+        return table.fillna(0.0).cumsum()
+
+    def years(self):
+        return sorted(year for year in self.totals)
+
+
+# Keeps an engine up to date with a weather CSV that grows by appended rows.
+# Only the bytes added since the last refresh are parsed; a file that shrank or was
+# rewritten (see kpi_store.read_appended_rows) is read again from the start.
+class DegreeDayTracker:
+    def __init__(self, csv_path, engine):
+        self.csv_path = csv_path
+        self.engine = engine
+        self.offset = 0
+        self.header = None
+        self.tail = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            rows, offset, header, tail = kpi_store.read_appended_rows(self.csv_path, self.offset, self.header, self.tail)
+            if rows is None:
+                # File replaced: start over with a fresh engine of the same settings
+                engine = self.engine
+                self.engine = DegreeDayEngine(engine.heating_base, engine.cooling_base, engine.year_start_month)
+                rows, offset, header, tail = kpi_store.read_appended_rows(self.csv_path, 0, None)
+            self.offset, self.header, self.tail = offset, header, tail
+            if rows is not None and not rows.empty:
+                column = timeseries.pick_column(rows, OUTDOOR_COLUMNS)
+                timestamps = timeseries.time_values(rows)
+                if column is not None and timestamps is not None:
+                    self.engine.update(timestamps, pd.to_numeric(rows[column], errors="coerce"))
+            return self.engine
+
+
+# Function to check from its first rows whether a weather export has the columns the engine needs
+def has_outdoor_temperature(csv_path):
+    head = pd.read_csv(csv_path, nrows=5, **kpi_store.CSV_OPTIONS)
+    return timeseries.pick_column(head, OUTDOOR_COLUMNS) is not None and timeseries.pick_column(head, timeseries.TIME_COLUMNS) is not None
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+import timeseries
+
+# Columns of the dry-cooler exports: fluid temperature entering and leaving the coil,
+# outdoor air temperature (°C) and fluid flow (m³/h)
+INLET_COLUMNS = ("DC_Inlet_Temp", "DC_Supply_Temp", "T_in", "T_supply", "Supply_Temperature")
+OUTLET_COLUMNS = ("DC_Outlet_Temp", "DC_Return_Temp", "T_out_fluid", "T_out", "T_return", "Return_Temperature")
+# Not the weather names of degree_days: "T_out" is the fluid outlet here, and "Temperature" is ambiguous
+AMBIENT_COLUMNS = ("Ambient_Temperature", "T_ambient", "T_amb", "Outdoor_Temperature", "Outdoor_Temp", "T_outdoor", "OAT")
+FLOW_COLUMNS = ("DC_Flow", "Flow", "Flow_Rate")
+RAW_COLUMNS = timeseries.TIME_COLUMNS + INLET_COLUMNS + OUTLET_COLUMNS + AMBIENT_COLUMNS + FLOW_COLUMNS
+
+# EHP columns of the daily comparison: cooling output and electric input (kW)
+EHP_COOLING_COLUMNS = ("Cooling_Output", "Cooling_kW", "EHP_Cooling")
+EHP_POWER_COLUMNS = ("Electric_Input", "Power_kW", "EHP_Power")
+
+# kW per (m³/h · K) of the water-glycol loop
+FLUID_KW_PER_M3H_K = 1.163
+
+# Below this temperature change across the coil (K) or approach to ambient (K) the cooler is idle
+MIN_DELTA_T = 0.5
+MIN_APPROACH = 1.0
+
+MODES = ("idle", "rejection", "absorption")
+IDLE, REJECTION, ABSORPTION = range(3)
+
+
+# Function to label every sample as idle (0), rejection (1) or absorption (2).
+# Rejection cools the fluid towards a colder ambient; absorption warms it towards a warmer one.
+def detect_modes(inlet, outlet, ambient):
+    drop = inlet - outlet
+    approach = inlet - ambient
+    modes = np.full(inlet.shape, IDLE, dtype=np.int8)
+    modes[(drop >= MIN_DELTA_T) & (approach >= MIN_APPROACH)] = REJECTION
+    modes[(drop <= -MIN_DELTA_T) & (approach <= -MIN_APPROACH)] = ABSORPTION
+    return modes
+
+
+# Function to analyse a dry-cooler export: per-sample modes, heat rates and effectiveness.
+# Effectiveness is the achieved temperature change over the largest possible one (inlet to ambient).
+# Without a flow column every active sample gets the same weight. previous is the last timestamp
+# before these samples when they continue a series.
+def analyse(timestamps, inlet, outlet, ambient, flow=None, previous=None):
+    t = np.asarray(timestamps, dtype="datetime64[ns]")
+    inlet, outlet, ambient = (np.asarray(values, dtype=float) for values in (inlet, outlet, ambient))
+    flow = np.ones(t.size) if flow is None else np.asarray(flow, dtype=float)
+    hours = timeseries.sample_hours(t, previous)
+    valid = ~np.isnat(t) & np.isfinite(inlet) & np.isfinite(outlet) & np.isfinite(ambient) & np.isfinite(flow)
+    t, inlet, outlet, ambient, flow, hours = t[valid], inlet[valid], outlet[valid], ambient[valid], flow[valid], hours[valid]
+
+    modes = detect_modes(inlet, outlet, ambient)
+    effectiveness = np.full(t.size, np.nan)
+    active = modes != IDLE
+    effectiveness[active] = (inlet - outlet)[active] / (inlet - ambient)[active]
+    heat_kw = np.abs(inlet - outlet) * flow * FLUID_KW_PER_M3H_K
+    heat_kw[~active] = 0.0
+    return {"timestamps": t, "modes": modes, "effectiveness": effectiveness, "heat_kwh": heat_kw * hours, "hours": hours}
+
+
+# Energy-weighted effectiveness (%) and totals of each mode
+def mode_summary(result):
+    modes, heat = result["modes"], result["heat_kwh"]
+    weighted = np.where(modes != IDLE, result["effectiveness"] * heat, 0.0)
+    heat_sum = np.bincount(modes, weights=heat, minlength=3)
+    table = pd.DataFrame({
+        "effectiveness": np.divide(np.bincount(modes, weights=weighted, minlength=3) * 100, heat_sum,
+                                   out=np.full(3, np.nan), where=heat_sum > 0),
+        "heat_kwh": heat_sum,
+        "hours": np.bincount(modes, weights=result["hours"], minlength=3),
+    }, index=pd.Index(MODES, name="mode"))
+    return table
+
+
+# Daily heat rejected and absorbed by the dry cooler, next to the EHP cooling and electricity
+def daily_comparison(result, ehp=None):
+    days = result["timestamps"].astype("datetime64[D]").astype(np.int64)
+    if days.size == 0:
+        return pd.DataFrame()
+    first = days.min()
+    cells = (days - first) * 3 + result["modes"]
+    size = (days.max() - first + 1) * 3
+    heat = np.bincount(cells, weights=result["heat_kwh"], minlength=size).reshape(-1, 3)
+    hours = np.bincount(cells, weights=result["hours"], minlength=size).reshape(-1, 3)
+    index = pd.DatetimeIndex((first + np.arange(heat.shape[0])).astype("datetime64[D]").astype("datetime64[ns]"), name="day")
+    table = pd.DataFrame({
+        "dc_rejection_kwh": heat[:, REJECTION],
+        "dc_absorption_kwh": heat[:, ABSORPTION],
+        "dc_active_hours": hours[:, REJECTION] + hours[:, ABSORPTION],
+    }, index=index)
+    if ehp is not None:
+        timestamps = timeseries.time_values(ehp)
+        for name, candidates in (("ehp_cooling_kwh", EHP_COOLING_COLUMNS), ("ehp_electricity_kwh", EHP_POWER_COLUMNS)):
+            column = timeseries.pick_column(ehp, candidates)
+            if column is None or timestamps is None:
+                continue
+            order = np.argsort(timestamps, kind="stable")
+            energy = pd.to_numeric(ehp[column], errors="coerce").to_numpy()[order] * timeseries.sample_hours(timestamps[order])
+            daily = pd.Series(energy, index=pd.DatetimeIndex(timestamps[order])).resample("D").sum(min_count=1)
+            table[name] = daily.reindex(table.index)
+    return table[table.notna().any(axis=1)]
+
+
+# Function to run the engine on a KPI frame holding raw temperatures; None if they are missing
+def analyse_frame(df, previous=None):
+    columns = [timeseries.pick_column(df, candidates) for candidates in (INLET_COLUMNS, OUTLET_COLUMNS, AMBIENT_COLUMNS)]
+    timestamps = timeseries.time_values(df)
+    if None in columns or timestamps is None:
+        return None
+    order = np.argsort(timestamps, kind="stable")
+    values = [pd.to_numeric(df[column], errors="coerce").to_numpy()[order] for column in columns]
+    flow_column = timeseries.pick_column(df, FLOW_COLUMNS)
+    flow = None if flow_column is None else pd.to_numeric(df[flow_column], errors="coerce").to_numpy()[order]
+    return analyse(timestamps[order], *values, flow=flow, previous=previous)
+
+
+# Function to get the heat-weighted effectiveness sum and the heat (kWh) of one mode in a frame.
+# Totals of several frames add up; zeros without raw data.
+def effectiveness_totals(df, mode, previous=None):
+    result = analyse_frame(df, previous)
+    if result is None:
+        return [0.0, 0.0]
+    selected = result["modes"] == MODES.index(mode)
+    heat = result["heat_kwh"][selected]
+    return [float(np.sum(result["effectiveness"][selected] * heat)), float(np.sum(heat))]
+
+
+# Function to get the effectiveness (%) of summed totals; None when the mode moved no heat
+def totals_effectiveness(totals):
+    weighted, heat = totals
+    if heat <= 0:
+        return None
+    return weighted / heat * 100
+
+
+# Function to get the energy-weighted effectiveness (%) of one mode over all frames; None without raw data
+def overall_effectiveness(frames, mode):
+    return totals_effectiveness(np.sum([effectiveness_totals(df, mode) for df in frames], axis=0) if frames else [0.0, 0.0])
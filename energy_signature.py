@@ -0,0 +1,131 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import degree_days
+import timeseries
+
+# Load columns of the energy-signature exports (kW)
+LOAD_COLUMNS = {
+    "heating": ("Heating_Load", "Heating_kW", "Heating_Power", "Heating"),
+    "cooling": ("Cooling_Load", "Cooling_kW", "Cooling_Power", "Cooling"),
+}
+
+# Parameters shown when no signature data is available
+DEFAULT_PARAMETERS = {
+    "heating": {"balance_point": 14.4, "rate": 3.79, "baseload": 5.1},
+    "cooling": {"balance_point": 17.2, "rate": 0.55, "baseload": 6.0},
+}
+
+# Candidate balance points: spacing (°C) and the share of readings kept on each side
+BALANCE_STEP = 0.1
+MIN_SIDE_SHARE = 0.05
+
+BOOTSTRAP_SAMPLES = 200
+BOOTSTRAP_BATCH = 50
+CONFIDENCE = 0.95
+
+
+# Weighted prefix sums of the sorted data, one row per weight vector: w, wT, wT², wy, wTy
+def _prefix_sums(t, y, weights):
+    terms = np.stack([weights, weights * t, weights * t * t, weights * y, weights * t * y])
+    sums = np.zeros(terms.shape[:2] + (t.size + 1,))
+    np.cumsum(terms, axis=2, out=sums[:, :, 1:])
+    return sums
+
+
+# Closed-form least squares of load = baseload + rate * max(±(b - T), 0) for every candidate b
+# and every weight vector at once. t must be sorted; returns (sse, rate, baseload) of shape (m, c).
+def _grid_fit(t, y, weights, candidates, mode):
+    sums = _prefix_sums(t, y, weights)
+    total = sums[:, :, -1]
+    n, sum_y = total[0][:, None], total[3][:, None]
+    sum_yy = (weights * y * y).sum(axis=1)[:, None]
+    k = np.searchsorted(t, candidates, side="left")
+    s0, s1, s2, sy, sty = (sums[i][:, k] for i in range(5))
+    b = candidates[None, :]
+    if mode == "heating":
+        # Readings colder than the balance point drive the load
+        sx, sxx, sxy = b * s0 - s1, b * b * s0 - 2 * b * s1 + s2, b * sy - sty
+    else:
+        s0, s1, s2, sy, sty = (total[i][:, None] - s for i, s in enumerate((s0, s1, s2, sy, sty)))
+        sx, sxx, sxy = s1 - b * s0, s2 - 2 * b * s1 + b * b * s0, sty - b * sy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = (n * sxy - sx * sum_y) / (n * sxx - sx * sx)
+        baseload = (sum_y - rate * sx) / n
+        sse = (sum_yy - 2 * baseload * sum_y - 2 * rate * sxy + n * baseload ** 2
+               + 2 * baseload * rate * sx + rate ** 2 * sxx)
+    sse = np.where(np.isfinite(sse) & (rate > 0), sse, np.inf)
+    return sse, rate, baseload
+
+
+def _best(sse, rate, baseload, candidates):
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(sse.shape[0])
+    found = np.isfinite(sse[rows, best])
+    return (np.where(found, candidates[best], np.nan), np.where(found, rate[rows, best], np.nan),
+            np.where(found, baseload[rows, best], np.nan))
+
+
+# Function to fit a heating or cooling change-point signature with bootstrap confidence intervals.
+# The balance point is found by a grid search in which every candidate is solved in closed form
+# from prefix sums; bootstrap resamples are multinomial weights, fitted in batches on threads.
+def fit_signature(temperature, load, mode="heating", samples=BOOTSTRAP_SAMPLES, seed=0):
+    t = np.asarray(temperature, dtype=float)
+    y = np.asarray(load, dtype=float)
+    keep = np.isfinite(t) & np.isfinite(y)
+    t, y = t[keep], y[keep]
+    if t.size < 10:
+        return None
+    order = np.argsort(t, kind="stable")
+    t, y = t[order], y[order]
+    low, high = np.quantile(t, [MIN_SIDE_SHARE, 1 - MIN_SIDE_SHARE])
+    candidates = np.arange(np.floor(low / BALANCE_STEP), np.ceil(high / BALANCE_STEP) + 1) * BALANCE_STEP
+    if candidates.size == 0:
+        return None
+
+    sse, rate, baseload = _grid_fit(t, y, np.ones((1, t.size)), candidates, mode)
+    balance_point, rate, baseload = (value[0] for value in _best(sse, rate, baseload, candidates))
+    if not np.isfinite(balance_point):
+        return None
+    r2 = 1 - np.min(sse) / np.sum((y - y.mean()) ** 2)
+    result = {"balance_point": float(balance_point), "rate": float(rate), "baseload": float(baseload),
+              "r2": float(r2), "samples": int(t.size)}
+
+    if samples:
+        rng = np.random.default_rng(seed)
+        batches = [rng.multinomial(t.size, np.full(t.size, 1.0 / t.size), size=min(BOOTSTRAP_BATCH, samples - start))
+                   for start in range(0, samples, BOOTSTRAP_BATCH)]
+
+        def run(weights):
+            return np.stack(_best(*_grid_fit(t, y, weights.astype(float), candidates, mode), candidates))
+
+        with ThreadPoolExecutor() as pool:
+            boot = np.concatenate(list(pool.map(run, batches)), axis=1)
+        tail = (1 - CONFIDENCE) / 2 * 100
+        for name, values in zip(("balance_point", "rate", "baseload"), boot):
+            values = values[np.isfinite(values)]
+            if values.size:
+                result[f"{name}_ci"] = tuple(float(v) for v in np.percentile(values, [tail, 100 - tail]))
+    return result
+
+
+# Function to fit the signature of a KPI frame; None when it lacks outdoor temperature or load
+def fit_frame(df, mode, samples=BOOTSTRAP_SAMPLES):
+    temperature_column = timeseries.pick_column(df, degree_days.OUTDOOR_COLUMNS)
+    load_column = timeseries.pick_column(df, LOAD_COLUMNS[mode])
+    if temperature_column is None or load_column is None:
+        return None
+    return fit_signature(pd.to_numeric(df[temperature_column], errors="coerce"),
+                         pd.to_numeric(df[load_column], errors="coerce"), mode, samples)
+
+
+# Fitted load at the given outdoor temperatures
+def predict(fit, temperature, mode):
+    t = np.asarray(temperature, dtype=float)
+    if mode == "heating":
+        x = np.maximum(fit["balance_point"] - t, 0)
+    else:
+        x = np.maximum(t - fit["balance_point"], 0)
+    return fit["baseload"] + fit["rate"] * x
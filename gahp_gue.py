@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+import timeseries
+
+# Raw meter columns of the GAHP exports: gas input and heat output power (kW)
+GAS_COLUMNS = ("Gas_Input", "Gas_kW", "Gas_Power", "Gas")
+HEAT_COLUMNS = ("Heat_Output", "Heat_kW", "Heat_Power", "Heat")
+RAW_COLUMNS = timeseries.TIME_COLUMNS + GAS_COLUMNS + HEAT_COLUMNS
+
+# Hours with less gas than this (kWh) carry no meaningful GUE
+MIN_GAS_KWH = 0.01
+
+
+def _table(index, gas, heat, samples, name):
+    gue = np.full(gas.shape, np.nan)
+    np.divide(heat, gas, out=gue, where=gas >= MIN_GAS_KWH)
+    table = pd.DataFrame({"gas_kwh": gas, "heat_kwh": heat, "gue": gue, "samples": samples}, index=index)
+    table.index.name = name
+    return table
+
+
+# Energy-weighted GUE (sum of heat / sum of gas) per hour, day, season and year.
+# The raw series are reduced once to hourly sums; every coarser level regroups those sums.
+def compute_gue(timestamps, gas, heat, power=True, previous=None):
+    t = np.asarray(timestamps, dtype="datetime64[ns]")
+    gas = np.asarray(gas, dtype=float)
+    heat = np.asarray(heat, dtype=float)
+    if power:
+        hours = timeseries.sample_hours(t, previous)
+        gas = gas * hours
+        heat = heat * hours
+    valid = ~np.isnat(t) & np.isfinite(gas) & np.isfinite(heat)
+    t, gas, heat = t[valid], gas[valid], heat[valid]
+    if t.size == 0:
+        empty = _table(pd.DatetimeIndex([]), np.zeros(0), np.zeros(0), np.zeros(0, dtype=int), "hour")
+        return {"hourly": empty, "daily": empty.rename_axis("day"), "seasonal": empty.rename_axis("season"),
+                "annual": empty.rename_axis("year")}
+
+    hour_numbers = t.astype("datetime64[h]").astype(np.int64)
+    first_hour = hour_numbers.min()
+    bins = hour_numbers - first_hour
+    gas_h = np.bincount(bins, weights=gas)
+    heat_h = np.bincount(bins, weights=heat)
+    samples_h = np.bincount(bins)
+    occupied = np.flatnonzero(samples_h)
+    hour_stamps = (first_hour + occupied).astype("datetime64[h]")
+    gas_h, heat_h, samples_h = gas_h[occupied], heat_h[occupied], samples_h[occupied]
+
+    def regroup(codes):
+        keys, inverse = np.unique(codes, return_inverse=True)
+        return keys, (np.bincount(inverse, weights=gas_h), np.bincount(inverse, weights=heat_h),
+                      np.bincount(inverse, weights=samples_h).astype(int))
+
+    day_keys, day_sums = regroup(hour_stamps.astype("datetime64[D]").astype(np.int64))
+    seasons, season_years = timeseries.season_codes(hour_stamps)
+    season_keys, season_sums = regroup(season_years * 4 + seasons)
+    year_keys, year_sums = regroup(timeseries.calendar_fields(hour_stamps)[0])
+
+    return {
+        "hourly": _table(pd.DatetimeIndex(hour_stamps.astype("datetime64[ns]")), gas_h, heat_h, samples_h, "hour"),
+        "daily": _table(pd.DatetimeIndex(day_keys.astype("datetime64[D]").astype("datetime64[ns]")), *day_sums, "day"),
+        "seasonal": _table(pd.Index([timeseries.season_label(k % 4, k // 4) for k in season_keys]), *season_sums, "season"),
+        "annual": _table(pd.Index(year_keys), *year_sums, "year"),
+    }
+
+
+# Function to run the GUE engine on a KPI frame holding raw meter columns; None if they are missing.
+# previous is the last timestamp before the frame when it continues a series.
+def gue_from_frame(df, previous=None):
+    gas_column = timeseries.pick_column(df, GAS_COLUMNS)
+    heat_column = timeseries.pick_column(df, HEAT_COLUMNS)
+    timestamps = timeseries.time_values(df)
+    if gas_column is None or heat_column is None or timestamps is None:
+        return None
+    order = np.argsort(timestamps, kind="stable")
+    return compute_gue(timestamps[order], pd.to_numeric(df[gas_column], errors="coerce").to_numpy()[order],
+                       pd.to_numeric(df[heat_column], errors="coerce").to_numpy()[order], previous=previous)
+
+
+# Function to get the heat and gas energy (kWh) of a frame; zeros without raw meter data.
+# Totals of several frames add up, so the overall GUE can be kept up to date chunk by chunk.
+def energy_totals(df, previous=None):
+    result = gue_from_frame(df, previous)
+    if result is None:
+        return [0.0, 0.0]
+    return [float(result["annual"]["heat_kwh"].sum()), float(result["annual"]["gas_kwh"].sum())]
+
+
+# Function to get the GUE of summed energy totals; None without gas use
+def totals_gue(totals):
+    heat, gas = totals
+    if gas < MIN_GAS_KWH:
+        return None
+    return heat / gas
+
+
+# Function to get the energy-weighted GUE over all given frames; None without raw meter data
+def overall_gue(frames):
+    return totals_gue(np.sum([energy_totals(df) for df in frames], axis=0) if frames else [0.0, 0.0])
@@ -0,0 +1,181 @@
+import glob
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+import kpi_assets
+import kpi_store
+import kpi_summary
+import sites
+
+# Drop folder of the BMS/meter exports, one sub-folder per KPI component
+# (e.g. 0_BMS_drop/GAHP_GUE/chunk_0001.csv). Chunks may be new files or files that keep growing.
+DROP_DIR = "0_BMS_drop"
+
+# KPI file of each component the ingested rows are appended to
+STREAM_FILE = "bms_stream.csv"
+
+# Parse position of every drop file (kept out of the KPI share)
+STATE_DIR = os.path.join(".dashboard_cache", "ingest")
+STATE_FILE = "ingest_state.json"
+
+# Seconds between two scans of the drop folder
+POLL_SECONDS = 5.0
+
+
+# Function to append rows to a KPI file in the KPI CSV format, matching the columns it already has
+def append_rows(csv_path, rows):
+    if os.path.exists(csv_path) and os.path.getsize(csv_path) > 0:
+        header = pd.read_csv(csv_path, nrows=0, **kpi_store.CSV_OPTIONS).columns
+        rows = rows.reindex(columns=header)
+        write_header = False
+    else:
+        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+        write_header = True
+    with open(csv_path, "a", encoding="utf-8", newline="") as f:
+        rows.to_csv(f, index=False, header=write_header, **kpi_store.CSV_OPTIONS)
+
+
+# Watches the drop folder of one site and moves the rows appended to its chunks into the KPI store.
+# Only the bytes added since the last scan are parsed, and the overview metrics are updated from
+# the new rows alone (kpi_summary.append_to_summary), so history is never processed again.
+class Ingester:
+    def __init__(self, drop_dir=DROP_DIR, kpi_dir=kpi_assets.KPI_DIR, state_dir=STATE_DIR):
+        self.drop_dir = drop_dir
+        self.kpi_dir = kpi_dir
+        self.state_path = os.path.join(state_dir, STATE_FILE)
+        self.state = self._read_state()
+        self._lock = threading.Lock()
+
+    def _read_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    def _write_state(self):
+        temporary = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, separators=(",", ":"))
+            os.replace(temporary, self.state_path)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def _new_rows(self, chunk_path):
+        entry = self.state.get(chunk_path, {"offset": 0, "header": None})
+        header, tail = (entry.get(key) for key in ("header", "tail"))
+        rows, offset, header, tail = kpi_store.read_appended_rows(
+            chunk_path, entry["offset"], header.encode("latin-1") if header is not None else None,
+            tail.encode("latin-1") if tail is not None else None)
+        if rows is None:
+            # Chunk replaced by a new one under the same name: take it as a whole
+            rows, offset, header, tail = kpi_store.read_appended_rows(chunk_path, 0, None)
+        return rows, {"offset": offset, "header": header.decode("latin-1") if header is not None else None,
+                      "tail": tail.decode("latin-1") if tail is not None else None}
+
+    # Function to scan the drop folder once; returns the number of rows ingested per component.
+    # The parse positions of a component are saved right after its rows are appended, so a failure
+    # or restart never ingests the same rows twice; a component that fails is retried on the next scan.
+    def poll(self):
+        with self._lock:
+            batches = {}
+            for chunk_path in sorted(glob.glob(os.path.join(self.drop_dir, "**", "*.csv"), recursive=True)):
+                component = os.path.relpath(os.path.dirname(chunk_path), self.drop_dir).replace(os.sep, "/")
+                if component == ".":
+                    continue
+                try:
+                    rows, position = self._new_rows(chunk_path)
+                except (OSError, ValueError, pd.errors.ParserError):
+                    continue
+                parts, positions = batches.setdefault(component, ([], {}))
+                if rows is not None and not rows.empty:
+                    parts.append(rows)
+                positions[chunk_path] = position
+
+            ingested = {}
+            for component, (parts, positions) in batches.items():
+                try:
+                    count = self._store(component, parts, positions)
+                except (OSError, ValueError, pd.errors.ParserError):
+                    continue
+                if count:
+                    ingested[component] = count
+            return ingested
+
+    def _store(self, component, parts, positions):
+        if not parts:
+            if any(self.state.get(chunk_path) != position for chunk_path, position in positions.items()):
+                self.state.update(positions)
+                self._write_state()
+            return 0
+        rows = pd.concat(parts, ignore_index=True)
+        csv_path = os.path.join(self.kpi_dir, component, STREAM_FILE)
+        previous_signature = kpi_summary.input_signature(csv_path) if os.path.exists(csv_path) else None
+        append_rows(csv_path, rows)
+        self.state.update(positions)
+        self._write_state()
+        try:
+            kpi_summary.append_to_summary(self.kpi_dir, csv_path, rows, previous_signature)
+        except Exception:
+            # The summary no longer matches the file and is rebuilt by materialize_summary
+            pass
+        return len(rows)
+
+    # Function to keep ingesting until stop (a threading.Event) is set
+    def run(self, interval=POLL_SECONDS, stop=None, callback=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            ingested = self.poll()
+            if ingested and callback is not None:
+                callback(ingested)
+            stop.wait(interval)
+
+
+# Function to replay a KPI export into a drop folder in chunks of rows, as a BMS would deliver it.
+# With growing=True the rows are appended to one file, otherwise every chunk is a new file.
+def replay(source_csv, component, drop_dir=DROP_DIR, chunk_rows=96, interval=1.0, growing=False):
+    frame = kpi_store.read_kpi_csv(source_csv)
+    target_dir = os.path.join(drop_dir, component)
+    os.makedirs(target_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(source_csv))[0]
+    for number, start in enumerate(range(0, len(frame), chunk_rows)):
+        chunk = frame.iloc[start:start + chunk_rows]
+        target = os.path.join(target_dir, f"{name}.csv" if growing else f"{name}_{number:05d}.csv")
+        new_file = not os.path.exists(target)
+        temporary = target if growing else f"{target}.tmp"
+        with open(temporary, "a", encoding="utf-8", newline="") as f:
+            chunk.to_csv(f, index=False, header=new_file, **kpi_store.CSV_OPTIONS)
+        if not growing:
+            os.replace(temporary, target)
+        yield target, len(chunk)
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 3 and sys.argv[1] == "replay":
+        # python ingest.py replay <KPI csv> <component> [rows per chunk] [seconds between chunks]
+        chunk_rows = int(sys.argv[4]) if len(sys.argv) > 4 else 96
+        interval = float(sys.argv[5]) if len(sys.argv) > 5 else 1.0
+        for written, count in replay(sys.argv[2], sys.argv[3], chunk_rows=chunk_rows, interval=interval):
+            print(f"Wrote {count} rows to {written}")
+    else:
+        # python ingest.py [seconds between scans]: ingest the drop folder of every site
+        interval = float(sys.argv[1]) if len(sys.argv) > 1 else POLL_SECONDS
+        ingesters = [
+            (site, Ingester(os.path.join(site.root, DROP_DIR), site.kpi_dir, site.cache_path(STATE_DIR)))
+            for site in sites.discover_sites()
+        ]
+        while True:
+            for site, ingester in ingesters:
+                for component, count in ingester.poll().items():
+                    print(f"{site.name}: {count} rows into {component}")
+            time.sleep(interval)
@@ -0,0 +1,224 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Structured log of the dashboard reruns, one JSON object per line (kept out of the KPI share)
+LOG_PATH = os.path.join(".dashboard_cache", "perf", "reruns.jsonl")
+
+# Size at which the log is rotated to <log>.1
+LOG_MAX_BYTES = 20 * 1024 * 1024
+
+# Percentiles of the rerun wall time reported per view
+PERCENTILES = (50, 95)
+
+# Streamlit releases whose private script run context the payload counter hooks into (from, before).
+# Outside this range "messages sent" and "bytes sent" are simply not recorded.
+PAYLOAD_STREAMLIT_VERSIONS = ((1, 30), (2, 0))
+
+# Recorder of the rerun running on this thread. Threads without one (warm-up, CLI runs) record nothing.
+_local = threading.local()
+
+
+# Timings and counters of one rerun: stages are {name: [seconds, calls]}, counters {name: amount}.
+# Nested stages are timed independently, so a stage's time includes the stages it contains.
+class Recorder:
+    def __init__(self, view=None):
+        self.view = view
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self._restore = None
+
+    def add_stage(self, name, seconds):
+        entry = self.stages.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self):
+        return {
+            "time": self.started_at,
+            "view": self.view,
+            "wall_seconds": time.perf_counter() - self.start,
+            "stages": {name: {"seconds": seconds, "calls": calls} for name, (seconds, calls) in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+
+def current():
+    return getattr(_local, "recorder", None)
+
+
+def _payload_hook_supported():
+    try:
+        import streamlit
+        version = tuple(int(part) for part in streamlit.__version__.split(".")[:2])
+    except (ImportError, ValueError):
+        return False
+    return PAYLOAD_STREAMLIT_VERSIONS[0] <= version < PAYLOAD_STREAMLIT_VERSIONS[1]
+
+
+# Function to count the messages and bytes Streamlit sends to the browser during a rerun.
+# Best effort: it wraps the private ScriptRunContext._enqueue, so it only runs on the Streamlit
+# releases of PAYLOAD_STREAMLIT_VERSIONS and inside a script thread, and records nothing otherwise.
+# A wrapper left behind by a rerun that never reached end() removes itself on its next message.
+def _watch_payload(recorder):
+    if not _payload_hook_supported():
+        return
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        enqueue = ctx._enqueue
+    except Exception:
+        return
+    if not callable(enqueue):
+        return
+    original = getattr(enqueue, "__wrapped__", enqueue)
+
+    @functools.wraps(original)
+    def counting(msg):
+        if current() is not recorder:
+            restore()
+        else:
+            recorder.count("messages sent")
+            recorder.count("bytes sent", msg.ByteSize())
+        return original(msg)
+
+    ctx._enqueue = counting
+
+    def restore():
+        if ctx._enqueue is counting:
+            ctx._enqueue = original
+
+    recorder._restore = restore
+
+
+# Function to start recording the rerun of this thread
+def begin(view=None):
+    recorder = Recorder(view)
+    _local.recorder = recorder
+    _watch_payload(recorder)
+    return recorder
+
+
+# Function to stop recording, append the rerun to the log and return its record.
+# Extra fields (e.g. the site) are stored with the record.
+def end(log_path=LOG_PATH, **fields):
+    recorder = current()
+    if recorder is None:
+        return None
+    _local.recorder = None
+    if recorder._restore is not None:
+        recorder._restore()
+    record = recorder.record()
+    record.update(fields)
+    if log_path:
+        _append(log_path, record)
+    return record
+
+
+def _append(log_path, record):
+    try:
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        if os.path.exists(log_path) and os.path.getsize(log_path) > LOG_MAX_BYTES:
+            os.replace(log_path, f"{log_path}.1")
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    except OSError:
+        pass
+
+
+# Time a block as a stage of the current rerun
+@contextmanager
+def stage(name):
+    recorder = current()
+    if recorder is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add_stage(name, time.perf_counter() - start)
+
+
+# Decorator timing every call of a function as a stage named after it
+def timed(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with stage(function.__name__):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+# Function to add to a counter of the current rerun
+def count(name, amount=1):
+    recorder = current()
+    if recorder is not None:
+        recorder.count(name, amount)
+
+
+# Function to wrap a Streamlit cache decorator so the calls and misses of the cached function are counted,
+# e.g. @instrument.counted(st.cache_resource(show_spinner=False))
+def counted(cache_decorator):
+    def decorate(function):
+        @functools.wraps(function)
+        def load(*args, **kwargs):
+            count(f"{function.__name__} misses")
+            return function(*args, **kwargs)
+
+        cached = cache_decorator(load)
+
+        @functools.wraps(function)
+        def call(*args, **kwargs):
+            count(f"{function.__name__} calls")
+            return cached(*args, **kwargs)
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
+
+# Function to read the last records of the log
+def read_log(log_path=LOG_PATH, limit=5000):
+    try:
+        with open(log_path, "r", encoding="utf-8") as f:
+            lines = f.readlines()[-limit:]
+    except OSError:
+        return []
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+# Function to summarise the logged reruns per view: {view: {"reruns": n, "p50": s, "p95": s}}
+def view_percentiles(records, percentiles=PERCENTILES):
+    walls = {}
+    for record in records:
+        walls.setdefault(record.get("view"), []).append(record["wall_seconds"])
+    summary = {}
+    for view, values in sorted(walls.items(), key=lambda item: str(item[0])):
+        points = np.percentile(values, percentiles)
+        summary[view] = dict({"reruns": len(values)}, **{f"p{p}": float(v) for p, v in zip(percentiles, points)})
+    return summary
+
+
+if __name__ == "__main__":
+    import sys
+    # python instrument.py [log]: wall-time percentiles per view
+    log_path = sys.argv[1] if len(sys.argv) > 1 else LOG_PATH
+    for view, summary in view_percentiles(read_log(log_path)).items():
+        print(f"{str(view):<45}{summary['reruns']:>8} reruns" + "".join(
+            f"{summary[f'p{p}']:>10.3f} s p{p}" for p in PERCENTILES))
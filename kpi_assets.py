@@ -0,0 +1,264 @@
+import functools
+import glob
+import hashlib
+import importlib.util
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from itertools import product
+
+import instrument
+
+# PIL is imported by the image functions that use it, out of the cold start
+pil_available = importlib.util.find_spec("PIL") is not None
+
+# Default locations of the KPI plot library and the Sankey output
+KPI_DIR = "4_KPI"
+SANKEY_DIR = "3_Sankey_Diagram"
+
+# Width-bucketed, re-encoded copies of the plot library (kept out of the KPI share)
+DERIVATIVE_DIR = os.path.join(".dashboard_cache", "images")
+DERIVATIVE_WIDTHS = (320, 640, 960, 1280, 1600, 2000)
+DEFAULT_DISPLAY_WIDTH = 1280
+RASTER_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# Component name under which files of the Sankey directory are indexed
+SANKEY_COMPONENT = "Sankey"
+
+# Wildcard used for the index fields a lookup does not constrain
+ANY = "*"
+
+SEASONS = ("fall", "winter", "spring", "summer")
+
+# Plot kinds, recognised by a substring of the lower-cased file name.
+# A file gets every kind it matches, the same way the views used to filter globs.
+PLOT_KINDS = [
+    ("time_series", "time"),
+    ("boxplot", "boxplot"),
+    ("gue_map", "seasonal_powervstemp"),
+    ("temperature_scatter", "temperature_scatter"),
+    ("efficiency_vs_load", "efficiency_vs_load_by_season"),
+    ("comparison", "comparison"),
+    ("heating", "heat"),
+    ("cooling", "cool"),
+    ("rejection", "reject"),
+    ("absorption", "absorpt"),
+    ("temp_summary", "temp_summary_"),
+    ("co2_distribution", "co2_ida_distribution_"),
+    ("humidity_summary", "humidity_mean_summary_"),
+    ("energy_distribution", "energy_distribution_pie"),
+    ("sankey", "energy_sankey"),
+]
+
+# Monthly degree-day plots (the un-suffixed files belong to the latest year)
+MONTHLY_DEGREE_DAY_PLOTS = ("monthly_degree_days", "monthly_eui", "monthly_kwh_per_cdd", "monthly_kwh_per_hdd")
+
+# Per-room comfort plots: temp_<room>_<season> and combined_<room>_<season>
+ROOM_PATTERNS = [
+    ("temp_room", re.compile(r"^temp_(?!summary)([^_]+)_")),
+    ("combined_room", re.compile(r"^combined_([^_]+)_")),
+]
+
+SEASON_PATTERN = re.compile(r"_(" + "|".join(SEASONS) + r")$", re.IGNORECASE)
+YEAR_PATTERN = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+
+Asset = namedtuple("Asset", ["path", "component", "kinds", "season", "room", "year", "ext"])
+
+
+# Function to describe one file of the plot library
+def classify_asset(path, component):
+    name = os.path.basename(path)
+    stem, ext = os.path.splitext(name)
+    lower = stem.lower()
+
+    kinds = [kind for kind, needle in PLOT_KINDS if needle in lower]
+    if lower.startswith(MONTHLY_DEGREE_DAY_PLOTS):
+        kinds.append("monthly")
+
+    room = None
+    for kind, pattern in ROOM_PATTERNS:
+        match = pattern.match(stem)
+        if match:
+            kinds.append(kind)
+            room = match.group(1)
+            break
+
+    season_match = SEASON_PATTERN.search(stem)
+    season = season_match.group(1).lower() if season_match else None
+
+    year_match = YEAR_PATTERN.search(stem)
+    year = int(year_match.group(1)) if year_match else None
+
+    return Asset(path, component, tuple(kinds), season, room, year, ext.lower())
+
+
+# Index of every file below the KPI and Sankey directories.
+# Lookups are plain dictionary hits; the index rebuilds itself when a directory mtime changes.
+class AssetIndex:
+    def __init__(self, kpi_dir=KPI_DIR, sankey_dir=SANKEY_DIR, check_interval=2.0):
+        self.roots = [(kpi_dir, ""), (sankey_dir, SANKEY_COMPONENT)]
+        self.check_interval = check_interval
+        self.builds = 0
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._dir_mtimes = {}
+        self._lookup = {}
+        self._rooms = {}
+        self._paths = frozenset()
+        self._assets = []
+        self._build()
+
+    def _scan(self):
+        assets = []
+        dir_mtimes = {}
+        for root, base_component in self.roots:
+            pending = [(root, base_component)]
+            while pending:
+                directory, component = pending.pop()
+                try:
+                    dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+                    entries = list(os.scandir(directory))
+                except OSError:
+                    dir_mtimes[directory] = None
+                    continue
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir():
+                        sub_component = f"{component}/{entry.name}" if component else entry.name
+                        pending.append((os.path.join(directory, entry.name), sub_component))
+                    elif entry.is_file():
+                        assets.append(classify_asset(os.path.join(directory, entry.name), component))
+        assets.sort(key=lambda asset: asset.path)
+        return assets, dir_mtimes
+
+    def _build(self):
+        with instrument.stage("asset index scan"):
+            assets, dir_mtimes = self._scan()
+        lookup = {}
+        rooms = {}
+        for asset in assets:
+            if asset.room is not None:
+                for kind in asset.kinds:
+                    for season in (asset.season, ANY):
+                        rooms.setdefault((asset.component, kind, season), set()).add(asset.room)
+            for kind in asset.kinds + (ANY,):
+                for key in product((asset.season, ANY), (asset.room, ANY), (asset.year, ANY), (asset.ext, ANY)):
+                    lookup.setdefault((asset.component, kind) + key, []).append(asset.path)
+        self._lookup = {key: tuple(paths) for key, paths in lookup.items()}
+        self._rooms = {key: sorted(values) for key, values in rooms.items()}
+        self._paths = frozenset(os.path.normpath(asset.path) for asset in assets)
+        self._assets = assets
+        self._dir_mtimes = dir_mtimes
+        self._checked_at = time.monotonic()
+        self.builds += 1
+
+    def is_stale(self):
+        for directory, mtime in self._dir_mtimes.items():
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                return True
+        return False
+
+    # Rebuild the index if any indexed directory changed; checks are throttled to check_interval
+    def refresh(self, force=False):
+        if not force and time.monotonic() - self._checked_at < self.check_interval:
+            return False
+        with self._lock:
+            if not force and time.monotonic() - self._checked_at < self.check_interval:
+                return False
+            if force or self.is_stale():
+                self._build()
+                return True
+            self._checked_at = time.monotonic()
+            return False
+
+    def find(self, component, kind=ANY, season=ANY, room=ANY, year=ANY, ext=ANY):
+        return self._lookup.get((component, kind, season, room, year, ext), ())
+
+    def first(self, component, kind=ANY, season=ANY, room=ANY, year=ANY, ext=ANY):
+        paths = self.find(component, kind, season, room, year, ext)
+        return paths[0] if paths else None
+
+    def exists(self, path):
+        return os.path.normpath(path) in self._paths
+
+    def rooms(self, component, kind, season=ANY):
+        return list(self._rooms.get((component, kind, season), ()))
+
+    def assets(self):
+        return list(self._assets)
+
+
+# Function to get the smallest derivative width that covers a display width
+def width_bucket(width):
+    for bucket in DERIVATIVE_WIDTHS:
+        if bucket >= width:
+            return bucket
+    return DERIVATIVE_WIDTHS[-1]
+
+
+# Function to tell whether PIL can write WebP derivatives
+@functools.lru_cache(maxsize=None)
+def webp_available():
+    from PIL import features
+    return features.check("webp")
+
+
+def _render_variant(path, target, bucket):
+    from PIL import Image
+    with Image.open(path) as img:
+        img.load()
+        if img.width > bucket:
+            img = img.resize((bucket, max(1, round(img.height * bucket / img.width))), Image.LANCZOS)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if webp_available():
+            img.save(temporary, format="WEBP", quality=90, method=4)
+        else:
+            img.save(temporary, format="PNG", optimize=True)
+        os.replace(temporary, target)
+
+
+# Function to get the derivative of a plot sized for the requested display width.
+# Derivatives are created on first use and keyed by the source mtime and size, so an updated
+# plot gets a fresh one; the original path is returned whenever no derivative can be made.
+def image_variant(path, width=None, cache_dir=DERIVATIVE_DIR):
+    if not pil_available or not path.lower().endswith(RASTER_EXTENSIONS):
+        return path
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path
+    bucket = width_bucket(width or DEFAULT_DISPLAY_WIDTH)
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    version = f"{digest}_{stat.st_mtime_ns}_{stat.st_size}"
+    target = os.path.join(cache_dir, f"{version}_{bucket}{'.webp' if webp_available() else '.png'}")
+    if os.path.exists(target):
+        instrument.count("image variant hits")
+        return target
+    instrument.count("image variant misses")
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for stale in glob.glob(os.path.join(cache_dir, f"{digest}_*")):
+            if not os.path.basename(stale).startswith(version):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+        with instrument.stage("image decode"):
+            _render_variant(path, target, bucket)
+    except (OSError, ValueError):
+        return path
+    return target
+
+
+# Function to create the derivatives of many plots ahead of time (batch pre-warm)
+def prewarm_image_variants(paths, widths=DERIVATIVE_WIDTHS, cache_dir=DERIVATIVE_DIR):
+    return [image_variant(path, width, cache_dir) for path in paths for width in widths]
@@ -0,0 +1,446 @@
+import glob
+import hashlib
+import importlib.util
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import instrument
+import timeseries
+
+# pyarrow is imported by the sidecar functions that use it, out of the cold start
+parquet_available = importlib.util.find_spec("pyarrow") is not None
+
+# KPI exports use the European CSV dialect
+CSV_OPTIONS = {"sep": ";", "decimal": ","}
+
+# Parquet sidecars are written next to the CSV as <name>.csv.parquet
+SIDECAR_SUFFIX = ".parquet"
+SIDECAR_SOURCE_KEY = b"kpi_source"
+
+# Bump when the parsing of the exports changes so existing sidecars and pyramids are rewritten
+SIDECAR_VERSION = 2
+
+# Resolution pyramids are written next to the CSV as <name>.csv.<column>.pyramid.parquet
+PYRAMID_SUFFIX = ".pyramid.parquet"
+
+# KPI series that get a resolution pyramid: (KPI sub-folder, column).
+# Only single-series exports: the comfort exports hold one series per room, which the room store keeps.
+PYRAMID_SERIES = [
+    ("GAHP_GUE", "GUE"),
+    ("EHP_EER", "EER"),
+    ("Boiler1_Efficiency", "Efficiency"),
+    ("Boiler2_Efficiency", "Efficiency"),
+    ("DC", "Effectiveness"),
+]
+
+# Memory-mapped copies of the plotted series, kept out of the KPI share
+SERIES_DIR = os.path.join(".dashboard_cache", "series")
+
+# Memory budget of the shared DataFrame cache
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+
+# Identity of a file version: path, size and modification time
+def file_signature(path):
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+# Process-wide LRU of parsed DataFrames, bounded by their in-memory size.
+# Frames are shared between sessions and must be treated as read-only.
+class FrameCache:
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, frame, size=None):
+        if size is None:
+            size = int(frame.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        path = key[0]
+        with self._lock:
+            # A newer version of a file replaces every cached view of the older one
+            for old_key in list(self._versions.get(path, ())):
+                if old_key[1:3] != key[1:3]:
+                    self._discard(old_key)
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (frame, size)
+            self._versions.setdefault(path, set()).add(key)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+            versions = self._versions.get(key[0])
+            if versions is not None:
+                versions.discard(key)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry[0]
+
+    # Load through the cache; concurrent requests for the same key parse the file only once
+    def get_or_load(self, key, loader):
+        return self.get_or_extend(key, lambda frame: True, lambda frame: loader())
+
+    # Like get_or_load for entries that are filled in gradually: covers(frame) tells whether the
+    # cached frame holds what is needed, and extend(frame or None) returns a fuller frame to keep
+    def get_or_extend(self, key, covers, extend):
+        frame = self._lookup(key)
+        if frame is not None and covers(frame):
+            return self._hit(key, frame)
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            frame = self._lookup(key)
+            if frame is not None and covers(frame):
+                frame = self._hit(key, frame)
+            else:
+                with self._lock:
+                    self.misses += 1
+                instrument.count("frame cache misses")
+                frame = extend(frame)
+                if frame is not None:
+                    self.put(key, frame)
+        with self._lock:
+            self._loading.pop(key, None)
+        return frame
+
+    def _hit(self, key, frame):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        instrument.count("frame cache hits")
+        return frame
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+FRAME_CACHE = FrameCache()
+
+
+def sidecar_path(csv_path):
+    return csv_path + SIDECAR_SUFFIX
+
+
+# Function to turn the timestamp columns (timeseries.TIME_COLUMNS) into datetime columns
+def _convert_timestamps(df):
+    for column in timeseries.TIME_COLUMNS:
+        if column not in df.columns:
+            continue
+        if pd.api.types.is_object_dtype(df[column]) or pd.api.types.is_string_dtype(df[column]):
+            converted = timeseries.parse_times(df[column])
+            if converted.notna().sum() == df[column].notna().sum():
+                df[column] = converted
+    return df
+
+
+# Function to parse a KPI CSV and store it as a typed Parquet sidecar tagged with the CSV version
+def write_sidecar(csv_path):
+    df = _convert_timestamps(pd.read_csv(csv_path, **CSV_OPTIONS))
+    if not parquet_available:
+        return df
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    _write_tables(sidecar_path(csv_path), csv_path, [table])
+    return df
+
+
+# Function to atomically write tables (one row group each) tagged with the version of their CSV
+def _write_tables(target, csv_path, tables):
+    import pyarrow.parquet as pq
+    schema = tables[0].schema
+    metadata = dict(schema.metadata or {})
+    metadata[SIDECAR_SOURCE_KEY] = _source_tag(csv_path)
+    schema = schema.with_metadata(metadata)
+    temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with pq.ParquetWriter(temporary, schema) as writer:
+            for table in tables:
+                writer.write_table(table.replace_schema_metadata(metadata))
+        os.replace(temporary, target)
+    except OSError:
+        # Read-only KPI share: keep serving the data computed in memory
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def _source_tag(csv_path):
+    stat = os.stat(csv_path)
+    return f"{SIDECAR_VERSION}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+
+
+# Schema of a derived Parquet file if it was written for the current version of its CSV, else None
+def _current_schema(target, csv_path):
+    if not parquet_available or not os.path.exists(target):
+        return None
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    try:
+        schema = pq.read_schema(target)
+    except (OSError, pa.ArrowException):
+        return None
+    if (schema.metadata or {}).get(SIDECAR_SOURCE_KEY) != _source_tag(csv_path):
+        return None
+    return schema
+
+
+def _current_sidecar_schema(csv_path):
+    return _current_schema(sidecar_path(csv_path), csv_path)
+
+
+# Function to load a KPI table, reading only the requested columns from the sidecar
+def load_kpi_table(csv_path, columns=None):
+    schema = _current_sidecar_schema(csv_path)
+    if schema is not None:
+        import pyarrow.parquet as pq
+        wanted = None if columns is None else [name for name in schema.names if name in columns]
+        with instrument.stage("parquet read"):
+            instrument.count("bytes read", os.path.getsize(sidecar_path(csv_path)))
+            return pq.read_table(sidecar_path(csv_path), columns=wanted).to_pandas()
+    with instrument.stage("csv parse"):
+        instrument.count("bytes read", os.path.getsize(csv_path))
+        df = write_sidecar(csv_path)
+    if columns is not None:
+        df = df[[name for name in df.columns if name in columns]]
+    return df
+
+
+# Function to (re)generate the sidecars of every KPI CSV that changed
+def build_sidecars(kpi_dir="4_KPI"):
+    written = []
+    for csv_path in sorted(glob.glob(os.path.join(kpi_dir, "**", "*.csv"), recursive=True)):
+        if _current_sidecar_schema(csv_path) is None:
+            write_sidecar(csv_path)
+            written.append(csv_path)
+    return written
+
+
+def pyramid_path(csv_path, column):
+    return f"{csv_path}.{column}{PYRAMID_SUFFIX}"
+
+
+# Function to build the resolution pyramid of one KPI column and store it, one row group per level
+def write_pyramid(csv_path, column, series_dir=SERIES_DIR):
+    series = load_series_arrays(csv_path, column, series_dir)
+    if series is None:
+        return None
+    pyramid = timeseries.build_pyramid(*series)
+    if parquet_available:
+        import pyarrow as pa
+        tables = [
+            pa.Table.from_pandas(frame.assign(level=name), preserve_index=False)
+            for name, frame in pyramid.items()
+        ]
+        _write_tables(pyramid_path(csv_path, column), csv_path, tables)
+    return pyramid
+
+
+# Function to read one pyramid level of a KPI column, building the pyramid when it is missing or stale
+def read_pyramid_level(csv_path, column, level, series_dir=SERIES_DIR):
+    key = file_signature(csv_path) + (("pyramid", column, level),)
+
+    def load():
+        target = pyramid_path(csv_path, column)
+        if _current_schema(target, csv_path) is not None:
+            import pyarrow.parquet as pq
+            table = pq.read_table(target, filters=[("level", "=", level)])
+            return table.to_pandas().drop(columns="level")
+        pyramid = write_pyramid(csv_path, column, series_dir)
+        return None if pyramid is None else pyramid[level]
+
+    return FRAME_CACHE.get_or_load(key, load)
+
+
+# Function to (re)build the pyramids of every KPI series whose CSV changed
+def build_pyramids(kpi_dir="4_KPI"):
+    written = []
+    for folder, column in PYRAMID_SERIES:
+        for csv_path in sorted(glob.glob(os.path.join(kpi_dir, folder, "*.csv"))):
+            if _current_schema(pyramid_path(csv_path, column), csv_path) is not None:
+                continue
+            if write_pyramid(csv_path, column) is not None:
+                written.append(pyramid_path(csv_path, column))
+    return written
+
+
+def _series_version(csv_path, column):
+    stat = os.stat(csv_path)
+    digest = hashlib.sha1(f"{os.path.abspath(csv_path)}|{column}".encode()).hexdigest()[:16]
+    return digest, f"{digest}_{stat.st_mtime_ns}_{stat.st_size}"
+
+
+def _save_array(target, array):
+    temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as f:
+        np.save(f, array)
+    os.replace(temporary, target)
+
+
+# Function to write the sorted (timestamps, values) of one KPI column as .npy files
+def write_series_arrays(csv_path, column, cache_dir=SERIES_DIR):
+    df = load_kpi_table(csv_path, columns=timeseries.TIME_COLUMNS + (column,))
+    series = timeseries.series_arrays(df, column)
+    if series is None:
+        return None
+    digest, version = _series_version(csv_path, column)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for stale in glob.glob(os.path.join(cache_dir, f"{digest}_*")):
+            if not os.path.basename(stale).startswith(version):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+        _save_array(os.path.join(cache_dir, f"{version}_values.npy"), series[1])
+        _save_array(os.path.join(cache_dir, f"{version}_timestamps.npy"), series[0])
+    except OSError:
+        pass
+    return series
+
+
+# Function to get one KPI column as memory-mapped (timestamps, values) arrays.
+# Every process maps the same files, so concurrent sessions share the OS page cache
+# instead of holding their own parsed copy; the arrays are rebuilt when the CSV changes.
+def load_series_arrays(csv_path, column, cache_dir=SERIES_DIR):
+    _, version = _series_version(csv_path, column)
+    timestamps_path = os.path.join(cache_dir, f"{version}_timestamps.npy")
+    values_path = os.path.join(cache_dir, f"{version}_values.npy")
+    if not os.path.exists(timestamps_path):
+        series = write_series_arrays(csv_path, column, cache_dir)
+        if series is None or not os.path.exists(timestamps_path):
+            return series
+    try:
+        return np.load(timestamps_path, mmap_mode="r"), np.load(values_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return timeseries.series_arrays(load_kpi_table(csv_path, columns=timeseries.TIME_COLUMNS + (column,)), column)
+
+
+# Function to (re)build the memory-mapped arrays of every plotted KPI series
+def build_series_arrays(kpi_dir="4_KPI", cache_dir=SERIES_DIR):
+    written = []
+    for folder, column in PYRAMID_SERIES:
+        for csv_path in sorted(glob.glob(os.path.join(kpi_dir, folder, "*.csv"))):
+            _, version = _series_version(csv_path, column)
+            if os.path.exists(os.path.join(cache_dir, f"{version}_timestamps.npy")):
+                continue
+            if write_series_arrays(csv_path, column, cache_dir) is not None:
+                written.append(f"{csv_path} [{column}]")
+    return written
+
+
+# Function to parse the complete rows appended to a CSV since byte offset.
+# Returns (rows, new offset, header line, last line read). rows is None when the file was rewritten
+# rather than appended to: it shrank, its header changed, or the bytes before offset are no longer
+# the last line read (tail), as in a regenerated export that grew past the old offset.
+def read_appended_rows(csv_path, offset=0, header=None, tail=None):
+    with open(csv_path, "rb") as f:
+        first_line = f.readline()
+        start = max(offset, len(first_line))
+        if offset:
+            rewritten = os.fstat(f.fileno()).st_size < offset or first_line != header
+            if not rewritten and tail:
+                if offset - len(tail) < len(first_line):
+                    rewritten = True
+                else:
+                    f.seek(offset - len(tail))
+                    rewritten = f.read(len(tail)) != tail
+            if rewritten:
+                return None, 0, None, None
+        f.seek(start)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    if end == 0:
+        return pd.DataFrame(), start, first_line, tail
+    last_line = data[data.rfind(b"\n", 0, end - 1) + 1:end]
+    rows = pd.read_csv(io.BytesIO(first_line + data[:end]), **CSV_OPTIONS)
+    return _convert_timestamps(rows), start + end, first_line, last_line
+
+
+# Column names of a KPI export, from its sidecar when current or else from the CSV header
+def _source_columns(csv_path):
+    schema = _current_sidecar_schema(csv_path)
+    if schema is not None:
+        return tuple(schema.names)
+    return tuple(pd.read_csv(csv_path, nrows=0, **CSV_OPTIONS).columns)
+
+
+# Columns of the export that were requested but are not in the cached frame yet
+def _missing_columns(frame, columns):
+    wanted = frame.attrs["source_columns"]
+    if columns is not None:
+        wanted = [name for name in wanted if name in columns]
+    return [name for name in wanted if name not in frame.columns]
+
+
+# Function to read a KPI CSV, parsing it only when the file changed since the last read.
+# One frame is cached per file version; requests for other columns load only the missing ones into it.
+def read_kpi_csv(path, columns=None):
+    columns = tuple(columns) if columns is not None else None
+
+    def extend(frame):
+        if frame is None:
+            frame = load_kpi_table(path, columns)
+            frame.attrs["source_columns"] = _source_columns(path)
+            return frame
+        missing = _missing_columns(frame, columns)
+        extended = pd.concat([frame, load_kpi_table(path, missing)], axis=1)
+        extended.attrs["source_columns"] = frame.attrs["source_columns"]
+        return extended
+
+    frame = FRAME_CACHE.get_or_extend(file_signature(path), lambda frame: not _missing_columns(frame, columns), extend)
+    if columns is None:
+        return frame[list(frame.attrs["source_columns"])]
+    return frame[[name for name in frame.columns if name in columns]]
+
+
+if __name__ == "__main__":
+    import sys
+    kpi_dir = sys.argv[1] if len(sys.argv) > 1 else "4_KPI"
+    for written_path in build_sidecars(kpi_dir):
+        print(f"Wrote {sidecar_path(written_path)}")
+    for written_path in build_pyramids(kpi_dir):
+        print(f"Wrote {written_path}")
+    for written_series in build_series_arrays(kpi_dir):
+        print(f"Mapped {written_series}")
@@ -0,0 +1,287 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import boiler_load
+import drycooler
+import gahp_gue
+import kpi_assets
+import kpi_store
+import timeseries
+
+# Summary of the overview KPIs, materialized next to the KPI folders
+SUMMARY_FILE = "kpi_summary.json"
+
+# Bump when a reducer or a metric definition changes so every value is recomputed
+SUMMARY_VERSION = 7
+
+# CO2 limits (ppm) of the IDA classes 1-4 and the optimal relative humidity band (%)
+IDA_LIMITS = [400, 600, 1000]
+IDA_LABELS = {1: "Optimal", 2: "Good", 3: "Moderate", 4: "Low"}
+HUMIDITY_RANGE = (30, 60)
+
+# Overview KPIs: where their inputs live, the column and reduction used, and the value
+# shown when no data is available. Percent metrics are stored in %; their column_unit says
+# whether the export column holds % or a fraction. Metrics with an engine are computed from
+# raw meter data when the export has it; engines see every export of the component, the
+# kind only narrows the column fallback.
+SUMMARY_METRICS = {
+    "eui": {"component": "EUI", "column": "Total_EUI", "reduce": "last", "default": 20.68},
+    "spi_heating": {"component": "SPI", "column": "Heating_SPI", "reduce": "last", "default": 94.8, "column_unit": "%"},
+    "gue": {"component": "GAHP_GUE", "column": "GUE", "reduce": "mean", "engine": "gahp_gue", "default": 1.32},
+    "eer": {"component": "EHP_EER", "column": "EER", "reduce": "mean", "default": 2.75},
+    "boiler1_eff": {"component": "Boiler1_Efficiency", "column": "Efficiency", "reduce": "mean", "engine": "boiler_efficiency", "default": 70.6, "column_unit": "%"},
+    "boiler2_eff": {"component": "Boiler2_Efficiency", "column": "Efficiency", "reduce": "mean", "engine": "boiler_efficiency", "default": 73.3, "column_unit": "%"},
+    "dc_rejection": {"component": "DC", "kind": "rejection", "column": "Effectiveness", "reduce": "mean", "engine": "dc_rejection", "default": 49.0, "column_unit": "fraction"},
+    "dc_absorption": {"component": "DC", "kind": "absorption", "column": "Effectiveness", "reduce": "mean", "engine": "dc_absorption", "default": 30.0, "column_unit": "fraction"},
+    "comfort": {"component": "Comfort_results/CO2_and_Humidity", "column": "CO2", "reduce": "iaq_status", "default": "Optimal (mostly IDA 1)"},
+    "humidity_status": {"component": "Comfort_results/CO2_and_Humidity", "column": "RH", "reduce": "humidity_status", "default": "Optimal (mostly within 30-60%)"},
+}
+
+
+# Function to count the samples of each IDA class (1-4)
+def _iaq_totals(values):
+    return np.bincount(np.digitize(values, IDA_LIMITS), minlength=4)[:4].astype(float).tolist()
+
+
+def _iaq_status(totals):
+    if sum(totals) == 0:
+        return None
+    mostly = int(np.argmax(totals)) + 1
+    return f"{IDA_LABELS[mostly]} (mostly IDA {mostly})"
+
+
+def _humidity_totals(values):
+    low, high = HUMIDITY_RANGE
+    return [float(np.sum((values >= low) & (values <= high))), float(values.size)]
+
+
+def _humidity_status(totals):
+    within, count = totals
+    if count == 0:
+        return None
+    low, high = HUMIDITY_RANGE
+    share = within / count * 100
+    if share >= 50:
+        return f"Optimal (mostly within {low}-{high}%)"
+    return f"Outside optimal range ({share:.0f}% within {low}-{high}%)"
+
+
+def _add(a, b):
+    return [x + y for x, y in zip(a, b)]
+
+
+# Factor from the column unit of a percent metric to %
+COLUMN_UNITS = {"%": 1, "fraction": 100}
+
+# Engines computing a metric from raw meter data: (columns to read, totals of one frame given the
+# last timestamp before it, value of summed totals or None)
+ENGINES = {
+    "gahp_gue": (gahp_gue.RAW_COLUMNS, gahp_gue.energy_totals, gahp_gue.totals_gue),
+    "boiler_efficiency": (boiler_load.RAW_COLUMNS, boiler_load.frame_energy, boiler_load.totals_efficiency),
+    "dc_rejection": (drycooler.RAW_COLUMNS, lambda df, previous: drycooler.effectiveness_totals(df, "rejection", previous),
+                     drycooler.totals_effectiveness),
+    "dc_absorption": (drycooler.RAW_COLUMNS, lambda df, previous: drycooler.effectiveness_totals(df, "absorption", previous),
+                      drycooler.totals_effectiveness),
+}
+
+# Column reductions kept as running totals: (totals of some values, merge of two totals, value or None).
+# Totals of consecutive chunks merge to the totals of the whole series.
+REDUCERS = {
+    "last": (lambda values: [float(values[-1]), 1.0], lambda a, b: b if b[1] else a, lambda totals: totals[0] if totals[1] else None),
+    "mean": (lambda values: [float(np.sum(values)), float(values.size)], _add, lambda totals: totals[0] / totals[1] if totals[1] else None),
+    "iaq_status": (_iaq_totals, _add, _iaq_status),
+    "humidity_status": (_humidity_totals, _add, _humidity_status),
+}
+
+
+# Function to compute the running totals of one overview KPI in a frame.
+# The column fallback only counts for files of the metric's kind. Engine totals also keep the
+# latest timestamp seen, so rows appended later are weighted from the real gap to it.
+def frame_totals(spec, df, path, previous=None):
+    totals = {}
+    if "engine" in spec:
+        totals["engine"] = ENGINES[spec["engine"]][1](df, previous)
+        latest = timeseries.last_time(df, previous)
+        if latest is not None:
+            totals["last_time"] = latest
+    if "kind" in spec and spec["kind"] not in kpi_assets.classify_asset(path, spec["component"]).kinds:
+        return totals
+    if spec["column"] in df.columns:
+        values = pd.to_numeric(df[spec["column"]], errors="coerce").dropna().to_numpy()
+        if values.size:
+            totals["column"] = REDUCERS[spec["reduce"]][0](values)
+    return totals
+
+
+# Function to merge the totals of two files, or of a file and rows appended to it
+def merge_totals(spec, a, b):
+    merged = dict(a)
+    for key, totals in b.items():
+        if key not in merged:
+            merged[key] = totals
+        elif key == "engine":
+            merged[key] = _add(merged[key], totals)
+        elif key == "last_time":
+            merged[key] = max(merged[key], totals)
+        else:
+            merged[key] = REDUCERS[spec["reduce"]][1](merged[key], totals)
+    return merged
+
+
+# Function to get the value of one overview KPI from its totals; None when the data is unusable
+def totals_value(spec, totals):
+    if "engine" in totals:
+        value = ENGINES[spec["engine"]][2](totals["engine"])
+        if value is not None:
+            return value
+    if "column" not in totals:
+        return None
+    value = REDUCERS[spec["reduce"]][2](totals["column"])
+    if value is not None and "column_unit" in spec:
+        value *= COLUMN_UNITS[spec["column_unit"]]
+    return value
+
+
+def _metric_columns(spec):
+    columns = ENGINES[spec["engine"]][0] if "engine" in spec else ()
+    return tuple(columns) + (spec["column"],)
+
+
+# Function to compute the running totals of one overview KPI in a KPI file
+def file_totals(spec, path):
+    return frame_totals(spec, kpi_store.read_kpi_csv(path, columns=_metric_columns(spec)), path)
+
+
+# Function to compute one overview KPI from its input files; None when the data is unusable
+def compute_metric(spec, input_paths):
+    totals = {}
+    for path in input_paths:
+        totals = merge_totals(spec, totals, file_totals(spec, path))
+    return totals_value(spec, totals)
+
+
+def read_summary_file(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if summary.get("version") != SUMMARY_VERSION:
+        return {}
+    return summary
+
+
+def _write_summary_file(path, summary):
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, separators=(",", ":"))
+        os.replace(temporary, path)
+    except OSError:
+        # Read-only KPI share: the summary is still returned, just not persisted
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+# Version of an input file as stored in the summary: [size, mtime_ns]
+def input_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _entry(spec, inputs):
+    totals = {}
+    for path in sorted(inputs, key=lambda path: inputs[path]["order"]):
+        totals = merge_totals(spec, totals, inputs[path]["totals"])
+    value = totals_value(spec, totals)
+    return {
+        "value": spec["default"] if value is None else value,
+        "source": "default" if value is None else "data",
+        "inputs": inputs,
+    }
+
+
+# Function to bring the summary file up to date and return the overview KPIs.
+# Running totals are kept per input file, so only files that changed are read again.
+def materialize_summary(index, kpi_dir=kpi_assets.KPI_DIR, path=None):
+    path = path or os.path.join(kpi_dir, SUMMARY_FILE)
+    previous = read_summary_file(path).get("metrics", {})
+    metrics = {}
+    changed = set(previous) != set(SUMMARY_METRICS)
+    for name, spec in SUMMARY_METRICS.items():
+        kind = kpi_assets.ANY if "engine" in spec else spec.get("kind", kpi_assets.ANY)
+        stored = previous.get(name, {}).get("inputs", {})
+        inputs = {}
+        for order, input_path in enumerate(index.find(spec["component"], kind, ext=".csv")):
+            try:
+                signature = input_signature(input_path)
+            except OSError:
+                continue
+            entry = stored.get(input_path)
+            if entry is None or entry["signature"] != signature:
+                try:
+                    entry = {"signature": signature, "totals": file_totals(spec, input_path)}
+                except Exception:
+                    entry = {"signature": signature, "totals": {}}
+                changed = True
+            inputs[input_path] = dict(entry, order=order)
+        changed = changed or set(inputs) != set(stored)
+        metrics[name] = _entry(spec, inputs)
+    if changed:
+        _write_summary_file(path, {"version": SUMMARY_VERSION, "metrics": metrics})
+    return {name: entry["value"] for name, entry in metrics.items()}
+
+
+# Function to get the version of the overview KPIs: (path, size, mtime_ns) of the summary file and of
+# every input file. materialize_summary returns the same values as long as it does not change.
+def summary_version(index, kpi_dir=kpi_assets.KPI_DIR, path=None):
+    path = path or os.path.join(kpi_dir, SUMMARY_FILE)
+    inputs = sorted({input_path for spec in SUMMARY_METRICS.values() for input_path in index.find(spec["component"], ext=".csv")})
+    version = []
+    for input_path in [path] + inputs:
+        try:
+            version.append((input_path, *input_signature(input_path)))
+        except OSError:
+            version.append((input_path, None, None))
+    return tuple(version)
+
+
+# Function to fold rows appended to a KPI file into the summary without reading the file again.
+# previous_signature is the file's [size, mtime_ns] before the append (None for a new file);
+# metrics whose stored totals are not of that version are left for materialize_summary.
+def append_to_summary(kpi_dir, csv_path, rows, previous_signature, path=None):
+    path = path or os.path.join(kpi_dir, SUMMARY_FILE)
+    summary = read_summary_file(path)
+    metrics = summary.get("metrics", {})
+    updated = []
+    for name, entry in metrics.items():
+        spec = SUMMARY_METRICS[name]
+        component = os.path.normpath(os.path.join(kpi_dir, spec["component"]))
+        if os.path.dirname(os.path.normpath(csv_path)) != component:
+            continue
+        stored = entry["inputs"].get(csv_path)
+        if stored is None and previous_signature is None:
+            stored = {"totals": {}, "order": len(entry["inputs"])}
+        elif stored is None or stored["signature"] != previous_signature:
+            continue
+        appended = frame_totals(spec, rows, csv_path, stored["totals"].get("last_time"))
+        totals = merge_totals(spec, stored["totals"], appended)
+        inputs = dict(entry["inputs"])
+        inputs[csv_path] = {"signature": input_signature(csv_path), "totals": totals, "order": stored["order"]}
+        metrics[name] = _entry(spec, inputs)
+        updated.append(name)
+    if updated:
+        _write_summary_file(path, {"version": SUMMARY_VERSION, "metrics": metrics})
+    return updated
+
+
+if __name__ == "__main__":
+    import sys
+    kpi_dir = sys.argv[1] if len(sys.argv) > 1 else kpi_assets.KPI_DIR
+    summary = materialize_summary(kpi_assets.AssetIndex(kpi_dir), kpi_dir)
+    for name, value in summary.items():
+        print(f"{name}: {value}")
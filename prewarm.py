@@ -0,0 +1,97 @@
+import glob
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import kpi_assets
+import kpi_store
+import kpi_summary
+import room_store
+import sites
+
+# Derivative widths the dashboard requests (logo, columns, pie, full-width and map plots)
+IMAGE_WIDTHS = (320, 640, 960, 1280, 1600)
+
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+
+# Function to list the warm-up tasks of the on-disk caches: [(name, callable)].
+# These caches are shared by every server process, so the CLI run fills them for all of them.
+# cache_dir is the root of the derived data of the site (see sites.Site.cache_dir).
+def disk_tasks(kpi_dir=kpi_assets.KPI_DIR, sankey_dir=kpi_assets.SANKEY_DIR, widths=IMAGE_WIDTHS, cache_dir=sites.CACHE_ROOT):
+    index = kpi_assets.AssetIndex(kpi_dir, sankey_dir)
+    series_dir = os.path.join(cache_dir, os.path.basename(kpi_store.SERIES_DIR))
+    room_store_dir = os.path.join(cache_dir, os.path.basename(room_store.ROOM_STORE_DIR))
+    derivative_dir = os.path.join(cache_dir, os.path.basename(kpi_assets.DERIVATIVE_DIR))
+    tasks = [("overview metrics", lambda: kpi_summary.materialize_summary(index, kpi_dir))]
+
+    for csv_path in sorted(glob.glob(os.path.join(kpi_dir, "**", "*.csv"), recursive=True)):
+        tasks.append((f"table {csv_path}", lambda path=csv_path: kpi_store.load_kpi_table(path)))
+    for folder, column in kpi_store.PYRAMID_SERIES:
+        for csv_path in sorted(glob.glob(os.path.join(kpi_dir, folder, "*.csv"))):
+            tasks.append((f"series {csv_path} [{column}]", lambda path=csv_path, name=column: kpi_store.read_pyramid_level(
+                path, name, "1D", series_dir)))
+
+    comfort = list(index.find("Comfort_results/Temperature", ext=".csv")) + list(index.find("Comfort_results/CO2_and_Humidity", ext=".csv"))
+    if comfort:
+        tasks.append(("comfort room store", lambda: room_store.comfort_tables(room_store.ensure_room_store(comfort, room_store_dir))))
+
+    for asset in index.assets():
+        if asset.ext in kpi_assets.RASTER_EXTENSIONS:
+            tasks.append((f"image {asset.path}", lambda path=asset.path: [kpi_assets.image_variant(path, width, derivative_dir) for width in widths]))
+    return tasks
+
+
+# Function to run warm-up tasks on a thread pool; returns [(name, seconds, error or None)].
+# A failing task is reported and does not stop the others.
+def run_tasks(tasks, workers=DEFAULT_WORKERS):
+    def run(task):
+        name, function = task
+        start = time.perf_counter()
+        try:
+            function()
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return name, time.perf_counter() - start, error
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, tasks))
+
+
+# Function to warm caches in a daemon thread (e.g. at server start); returns the thread.
+# Each stage is a callable returning its task list; it is called in the thread, so listing the
+# tasks (index scans, header reads) costs the caller nothing. Stages run one after the other,
+# so later tasks find what earlier ones built; the report of the run is stored on the thread
+# as .report once it is done.
+def start_background(*stages, workers=DEFAULT_WORKERS):
+    def target():
+        report = []
+        for stage in stages:
+            try:
+                tasks = stage()
+            except Exception as e:
+                report.append((getattr(stage, "__name__", "stage"), 0.0, f"{type(e).__name__}: {e}"))
+                continue
+            report.extend(run_tasks(tasks, workers))
+        thread.report = report
+
+    thread = threading.Thread(target=target, name="dashboard-prewarm", daemon=True)
+    thread.report = None
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    import sys
+    # Warm every site, or only the sites named on the command line
+    start = time.perf_counter()
+    report = []
+    for site in sites.discover_sites():
+        if len(sys.argv) > 1 and site.key not in sys.argv[1:]:
+            continue
+        report.extend(run_tasks(disk_tasks(site.kpi_dir, site.sankey_dir, cache_dir=site.cache_dir)))
+    for name, seconds, error in sorted(report, key=lambda item: -item[1]):
+        print(f"{seconds:8.2f} s  {name}" + (f"  FAILED {error}" if error else ""))
+    print(f"Warmed {len(report)} caches in {time.perf_counter() - start:.2f} s")
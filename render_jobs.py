@@ -0,0 +1,385 @@
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")  # no display in the render workers
+    import matplotlib.pyplot as plt
+    matplotlib_available = True
+except ImportError:
+    matplotlib_available = False
+
+try:
+    from PIL import Image
+    pil_available = True
+except ImportError:
+    pil_available = False
+
+import comfort_classes
+import degree_days
+import energy_signature
+import gahp_gue
+import kpi_assets
+import kpi_store
+import room_store
+import sites
+import timeseries
+
+# Bump when a renderer changes so every plot is drawn again
+RENDER_VERSION = 1
+
+# PNG text chunk holding the hash of the inputs a plot was drawn from
+HASH_KEY = "kpi_input_hash"
+
+# File name of the seasonal GUE map in the plot library
+GUE_MAP_FILE = "GAHP_Seasonal_PowerVStemp.png"
+
+DEFAULT_WORKERS = os.cpu_count() or 2
+DPI = 100
+
+# Colours of the dashboard theme
+PRIMARY = "#d93e29"
+SECONDARY = "#00205b"
+
+# One plot of the library: where it goes, the renderer (a name in RENDERERS), its arguments and input hash.
+# Arguments are small and picklable: paths and names the worker loads itself, or already reduced tables.
+RenderJob = namedtuple("RenderJob", ["target", "renderer", "args", "input_hash"])
+
+
+def _hash(*parts):
+    digest = hashlib.sha1(f"v{RENDER_VERSION}".encode())
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part).tobytes())
+        elif isinstance(part, pd.DataFrame):
+            digest.update(pd.util.hash_pandas_object(part).to_numpy().tobytes())
+        else:
+            digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+
+# Function to hash the content of input files (not their mtime, so a touched file is not re-rendered)
+def _file_hash(paths, *extra):
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return _hash(digest.hexdigest(), *extra)
+
+
+# Input hash a plot was drawn from, or None when it is missing or was not drawn by this module
+def stored_hash(target):
+    if not pil_available or not os.path.exists(target):
+        return None
+    try:
+        with Image.open(target) as img:
+            return img.text.get(HASH_KEY)
+    except (OSError, ValueError):
+        return None
+
+
+def _save(fig, target, input_hash):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        fig.savefig(temporary, format="png", dpi=DPI, bbox_inches="tight", metadata={HASH_KEY: input_hash})
+        os.replace(temporary, target)
+    finally:
+        plt.close(fig)
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+# Room stores opened by a worker process, by directory
+_stores = {}
+
+
+def _store(root):
+    store = _stores.get(root)
+    if store is None:
+        store = room_store.RoomStore(root)
+        _stores[root] = store
+    return store
+
+
+def render_room_temperature(target, input_hash, root, room, season):
+    timestamps, values = _store(root).series(room, "temperature", season=season)
+    setpoint = comfort_classes.SEASON_SETPOINTS[season.title()]
+    fig, ax = plt.subplots(figsize=(12, 4.5))
+    for limit, alpha in zip(reversed(comfort_classes.TEMPERATURE_LIMITS), (0.08, 0.12, 0.18)):
+        ax.axhspan(setpoint - limit, setpoint + limit, color="#2ecc71", alpha=alpha, linewidth=0)
+    ax.plot(np.asarray(timestamps), np.asarray(values), color=PRIMARY, linewidth=0.6)
+    ax.set_title(f"Room {room} - Indoor Temperature ({season.title()})", color=SECONDARY)
+    ax.set_ylabel("Temperature (°C)")
+    ax.grid(alpha=0.3)
+    fig.autofmt_xdate()
+    _save(fig, target, input_hash)
+
+
+def render_room_combined(target, input_hash, root, room, season):
+    store = _store(root)
+    fig, (co2_ax, rh_ax) = plt.subplots(2, 1, figsize=(12, 7), sharex=True)
+    if room in store.rooms("co2"):
+        timestamps, values = store.series(room, "co2", season=season)
+        co2_ax.plot(np.asarray(timestamps), np.asarray(values), color=PRIMARY, linewidth=0.6)
+        for limit in comfort_classes.IDA_LIMITS:
+            co2_ax.axhline(limit, color="#7f8c8d", linestyle="--", linewidth=0.8)
+    co2_ax.set_ylabel("CO₂ (ppm)")
+    co2_ax.set_title(f"Room {room} - CO₂ and Relative Humidity ({season.title()})", color=SECONDARY)
+    if room in store.rooms("humidity"):
+        timestamps, values = store.series(room, "humidity", season=season)
+        rh_ax.axhspan(*comfort_classes.HUMIDITY_RANGE, color="#2ecc71", alpha=0.15, linewidth=0)
+        rh_ax.plot(np.asarray(timestamps), np.asarray(values), color="#3498db", linewidth=0.6)
+    rh_ax.set_ylabel("Relative humidity (%)")
+    for ax in (co2_ax, rh_ax):
+        ax.grid(alpha=0.3)
+    fig.autofmt_xdate()
+    _save(fig, target, input_hash)
+
+
+def render_boiler_boxplot(target, input_hash, boiler, paths):
+    frame = pd.concat([kpi_store.read_kpi_csv(path) for path in paths], ignore_index=True)
+    timestamps = timeseries.time_values(frame)
+    values = pd.to_numeric(frame["Efficiency"], errors="coerce").to_numpy()
+    if np.nanmax(values) <= 1.5:
+        values = values * 100  # efficiency stored as a fraction
+    months = pd.DatetimeIndex(timestamps).to_period("M")
+    groups = pd.Series(values).groupby(np.asarray(months.astype(str)))
+    labels = sorted(groups.groups)
+    fig, ax = plt.subplots(figsize=(12, 5))
+    ax.boxplot([groups.get_group(label).dropna().to_numpy() for label in labels], showfliers=False)
+    ax.set_xticks(np.arange(1, len(labels) + 1), labels)
+    ax.set_title(f"Boiler {boiler} Efficiency per Month", color=SECONDARY)
+    ax.set_ylabel("Efficiency (%)")
+    ax.grid(alpha=0.3, axis="y")
+    plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+    _save(fig, target, input_hash)
+
+
+def render_gue_map(target, input_hash, paths):
+    hourly = []
+    for path in paths:
+        df = kpi_store.read_kpi_csv(path)
+        result = gahp_gue.gue_from_frame(df)
+        outdoor = timeseries.pick_column(df, degree_days.OUTDOOR_COLUMNS)
+        if result is None or outdoor is None:
+            continue
+        temperature = pd.Series(pd.to_numeric(df[outdoor], errors="coerce").to_numpy(),
+                                index=pd.DatetimeIndex(timeseries.time_values(df))).resample("h").mean()
+        hourly.append(result["hourly"].join(temperature.rename("outdoor"), how="inner"))
+    table = pd.concat(hourly).dropna(subset=["gue", "outdoor"])
+    seasons, _ = timeseries.season_codes(table.index.values)
+    fig, axes = plt.subplots(2, 2, figsize=(12, 9), sharex=True, sharey=True)
+    for code, ax in enumerate(axes.flat):
+        part = table[seasons == code]
+        points = ax.scatter(part["outdoor"], part["heat_kwh"], c=part["gue"], cmap="RdYlGn", vmin=0.8, vmax=1.6, s=6)
+        ax.set_title(timeseries.SEASON_NAMES[code], color=SECONDARY)
+        ax.grid(alpha=0.3)
+    for ax in axes[1]:
+        ax.set_xlabel("Outdoor temperature (°C)")
+    for ax in axes[:, 0]:
+        ax.set_ylabel("Heat output (kWh/h)")
+    fig.colorbar(points, ax=axes, label="GUE")
+    fig.suptitle("GAHP Heat Output vs. Outdoor Temperature per Season", color=SECONDARY)
+    _save(fig, target, input_hash)
+
+
+def render_degree_day_year(target, input_hash, year, monthly):
+    labels = monthly.index.strftime("%b %Y")
+    positions = np.arange(len(labels))
+    fig, ax = plt.subplots(figsize=(12, 5))
+    ax.bar(positions - 0.2, monthly["hdd"], width=0.4, label="HDD", color="#1f77b4")
+    ax.bar(positions + 0.2, monthly["cdd"], width=0.4, label="CDD", color="#d62728")
+    ax.set_xticks(positions, labels, rotation=45, ha="right")
+    ax.set_title(f"Monthly Degree Days {degree_days.year_label(year)}", color=SECONDARY)
+    ax.set_ylabel("Degree days (K·day)")
+    ax.legend()
+    ax.grid(alpha=0.3, axis="y")
+    _save(fig, target, input_hash)
+
+
+def render_degree_day_comparison(target, input_hash, cumulative, totals):
+    fig, (line_ax, bar_ax) = plt.subplots(1, 2, figsize=(14, 5))
+    for year in cumulative.columns:
+        line_ax.plot(cumulative.index, cumulative[year], label=year)
+    line_ax.set_title("Cumulative HDD by Day of the Academic Year", color=SECONDARY)
+    line_ax.set_xlabel("Days since 1 September")
+    line_ax.set_ylabel("HDD (K·day)")
+    line_ax.legend()
+    positions = np.arange(len(totals))
+    bar_ax.bar(positions - 0.2, totals["HDD"], width=0.4, label="HDD", color="#1f77b4")
+    bar_ax.bar(positions + 0.2, totals["CDD"], width=0.4, label="CDD", color="#d62728")
+    bar_ax.set_xticks(positions, totals.index, rotation=20, ha="right")
+    bar_ax.set_title("Year and School Comparison", color=SECONDARY)
+    bar_ax.legend()
+    for ax in (line_ax, bar_ax):
+        ax.grid(alpha=0.3)
+    _save(fig, target, input_hash)
+
+
+def render_signature(target, input_hash, path, mode):
+    df = kpi_store.read_kpi_csv(path)
+    fit = energy_signature.fit_frame(df, mode, samples=0)
+    temperature = pd.to_numeric(df[timeseries.pick_column(df, degree_days.OUTDOOR_COLUMNS)], errors="coerce")
+    load = pd.to_numeric(df[timeseries.pick_column(df, energy_signature.LOAD_COLUMNS[mode])], errors="coerce")
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.scatter(temperature, load, s=6, alpha=0.4, color="#3498db", label="Readings")
+    if fit is not None:
+        grid = np.linspace(np.nanmin(temperature), np.nanmax(temperature), 200)
+        ax.plot(grid, energy_signature.predict(fit, grid, mode), color=PRIMARY, linewidth=2,
+                label=f"Fit (balance point {fit['balance_point']:.1f} °C, R² {fit['r2']:.2f})")
+    ax.set_title(f"{mode.title()} Energy Signature", color=SECONDARY)
+    ax.set_xlabel("Outdoor temperature (°C)")
+    ax.set_ylabel("Load (kW)")
+    ax.legend()
+    ax.grid(alpha=0.3)
+    _save(fig, target, input_hash)
+
+
+RENDERERS = {
+    "room_temperature": render_room_temperature,
+    "room_combined": render_room_combined,
+    "boiler_boxplot": render_boiler_boxplot,
+    "gue_map": render_gue_map,
+    "degree_day_year": render_degree_day_year,
+    "degree_day_comparison": render_degree_day_comparison,
+    "signature": render_signature,
+}
+
+
+def _room_jobs(index, kpi_dir, root):
+    paths = list(index.find("Comfort_results/Temperature", ext=".csv")) + list(index.find("Comfort_results/CO2_and_Humidity", ext=".csv"))
+    if not paths:
+        return []
+    store = room_store.ensure_room_store(paths, root)
+    jobs = []
+    for season in (name.lower() for name in timeseries.SEASON_NAMES):
+        mask = np.asarray(store.mask(season))
+        if not mask.any():
+            continue
+        times = np.asarray(store.timestamps)[mask]
+        for room in store.rooms("temperature"):
+            values = np.asarray(store.series(room, "temperature")[1])[mask]
+            if np.isfinite(values).any():
+                target = os.path.join(kpi_dir, "Comfort_results", "Temperature", f"temp_{room}_{season}.png")
+                jobs.append(RenderJob(target, "room_temperature", (root, room, season), _hash(times, values, season)))
+        for room in sorted(set(store.rooms("co2")) | set(store.rooms("humidity"))):
+            parts = [np.asarray(store.series(room, variable)[1])[mask] for variable in ("co2", "humidity") if room in store.rooms(variable)]
+            if any(np.isfinite(part).any() for part in parts):
+                target = os.path.join(kpi_dir, "Comfort_results", "CO2_and_Humidity", f"combined_{room}_{season}.png")
+                jobs.append(RenderJob(target, "room_combined", (root, room, season), _hash(times, *parts, season)))
+    return jobs
+
+
+def _boiler_jobs(index, kpi_dir):
+    jobs = []
+    for n in (1, 2):
+        component = f"Boiler{n}_Efficiency"
+        paths = [path for path in index.find(component, ext=".csv")
+                 if "Efficiency" in kpi_store.read_kpi_csv(path, columns=["Efficiency"]).columns]
+        if paths:
+            jobs.append(RenderJob(os.path.join(kpi_dir, component, f"Boiler{n}_boxplot.png"), "boiler_boxplot",
+                                  (n, tuple(paths)), _file_hash(paths)))
+    return jobs
+
+
+def _gue_jobs(index, kpi_dir):
+    paths = [path for path in index.find("GAHP_GUE", ext=".csv") if degree_days.has_outdoor_temperature(path)]
+    if not paths:
+        return []
+    # Redraw the map the library already has, whatever the case of its name, so the view shows the new one
+    existing = index.find("GAHP_GUE", "gue_map", ext=".png")
+    target = existing[0] if existing else os.path.join(kpi_dir, "GAHP_GUE", GUE_MAP_FILE)
+    return [RenderJob(target, "gue_map", (tuple(paths),), _file_hash(paths))]
+
+
+def _degree_day_jobs(index, kpi_dir):
+    sources = [path for path in index.find("Degree_Days", ext=".csv") if degree_days.has_outdoor_temperature(path)]
+    if not sources:
+        return []
+    engine = degree_days.DegreeDayTracker(sources[0], degree_days.DegreeDayEngine()).refresh()
+    jobs = []
+    for year in engine.years():
+        monthly = engine.monthly(year)
+        target = os.path.join(kpi_dir, "Degree_Days", f"monthly_degree_days_{year}.png")
+        jobs.append(RenderJob(target, "degree_day_year", (year, monthly), _hash(year, monthly)))
+    cumulative = engine.year_over_year("hdd")
+    totals = engine.annual()
+    for name, reference in degree_days.SCHOOL_REFERENCE.items():
+        totals.loc[name] = [reference["HDD"], reference["CDD"]]
+    target = os.path.join(kpi_dir, "Degree_Days", "degree_days_comparison.png")
+    jobs.append(RenderJob(target, "degree_day_comparison", (cumulative, totals), _hash(cumulative, totals)))
+    return jobs
+
+
+def _signature_jobs(index, kpi_dir):
+    jobs = []
+    for path in index.find("Energy_signature", ext=".csv")[:1]:
+        df = kpi_store.read_kpi_csv(path)
+        for mode in ("heating", "cooling"):
+            if timeseries.pick_column(df, energy_signature.LOAD_COLUMNS[mode]) is None:
+                continue
+            target = os.path.join(kpi_dir, "Energy_signature", f"{mode}_signature.png")
+            jobs.append(RenderJob(target, "signature", (path, mode), _file_hash([path], mode)))
+    return jobs
+
+
+# Function to list every plot the KPI data supports, with the hash of the inputs it would be drawn from
+def list_jobs(kpi_dir=kpi_assets.KPI_DIR, sankey_dir=kpi_assets.SANKEY_DIR, room_store_dir=room_store.ROOM_STORE_DIR):
+    index = kpi_assets.AssetIndex(kpi_dir, sankey_dir)
+    return (_room_jobs(index, kpi_dir, room_store_dir) + _boiler_jobs(index, kpi_dir) + _gue_jobs(index, kpi_dir)
+            + _degree_day_jobs(index, kpi_dir) + _signature_jobs(index, kpi_dir))
+
+
+# Function to keep the jobs whose plot is missing or was drawn from other inputs
+def stale_jobs(jobs):
+    return [job for job in jobs if stored_hash(job.target) != job.input_hash]
+
+
+def _run(job):
+    start = time.perf_counter()
+    try:
+        RENDERERS[job.renderer](job.target, job.input_hash, *job.args)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return job.target, time.perf_counter() - start, error
+
+
+# Function to render jobs on a process pool; returns [(target, seconds, error or None)].
+# Stale jobs only unless force is set; a failing plot is reported and does not stop the others.
+def render(jobs, workers=DEFAULT_WORKERS, force=False):
+    if not matplotlib_available:
+        raise RuntimeError("matplotlib is required to render the plot library")
+    pending = jobs if force else stale_jobs(jobs)
+    if not pending:
+        return []
+    if workers <= 1:
+        return [_run(job) for job in pending]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run, pending, chunksize=max(1, len(pending) // (workers * 4))))
+
+
+if __name__ == "__main__":
+    import sys
+    # python render_jobs.py [--force] [site ...]: render the plot library of every site, or the named ones
+    force = "--force" in sys.argv
+    names = [arg for arg in sys.argv[1:] if arg != "--force"]
+    for site in sites.discover_sites():
+        if names and site.key not in names:
+            continue
+        start = time.perf_counter()
+        jobs = list_jobs(site.kpi_dir, site.sankey_dir, site.cache_path(room_store.ROOM_STORE_DIR))
+        report = render(jobs, force=force)
+        for target, seconds, error in report:
+            if error:
+                print(f"FAILED {target}: {error}")
+        print(f"{site.name}: rendered {len(report)} of {len(jobs)} plots in {time.perf_counter() - start:.2f} s")
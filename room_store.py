@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+
+import comfort_classes
+import kpi_store
+import timeseries
+
+# Columnar store of the indoor sensor data (kept out of the KPI share). Every build goes to its own
+# directory, named by the hash of its sources, and a pointer file names the current one; stores still
+# open on an older build keep working, and older builds are removed once nothing holds them.
+ROOM_STORE_DIR = os.path.join(".dashboard_cache", "room_store")
+CURRENT_FILE = "current"
+
+# Bump when the layout of the store changes so existing stores are rebuilt
+STORE_VERSION = 2
+
+MANIFEST_FILE = "manifest.json"
+TIMESTAMPS_FILE = "timestamps.npy"
+
+# Precomputed masks: weekday occupancy (9:00-17:00), office hours on any day, and each season
+MASK_NAMES = ["occupancy", "office_hours"] + [name.lower() for name in timeseries.SEASON_NAMES]
+
+
+def _mask_path(root, name):
+    return os.path.join(root, f"mask_{name}.npy")
+
+
+def _series_path(root, variable, room):
+    return os.path.join(root, variable, f"{room}.npy")
+
+
+# Room-by-time store: one float32 array per room and variable on a shared timestamp index.
+# Arrays are memory-mapped, so slicing a room or season reads only the pages it touches.
+class RoomStore:
+    def __init__(self, root):
+        self.root = root
+        with open(os.path.join(root, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.timestamps = np.load(os.path.join(root, TIMESTAMPS_FILE), mmap_mode="r")
+        self._arrays = {}
+        self._lock = threading.Lock()
+
+    @property
+    def variables(self):
+        return sorted(self.manifest["rooms"])
+
+    def rooms(self, variable=None):
+        if variable is not None:
+            return list(self.manifest["rooms"].get(variable, []))
+        return sorted({room for rooms in self.manifest["rooms"].values() for room in rooms})
+
+    def _load(self, path):
+        with self._lock:
+            array = self._arrays.get(path)
+            if array is None:
+                array = np.load(path, mmap_mode="r")
+                self._arrays[path] = array
+            return array
+
+    def mask(self, name):
+        return self._load(_mask_path(self.root, name))
+
+    def _selection(self, season=None, occupied=False):
+        selection = None
+        if season is not None:
+            selection = np.asarray(self.mask(season.lower()))
+        if occupied:
+            occupancy = np.asarray(self.mask("occupancy"))
+            selection = occupancy if selection is None else selection & occupancy
+        return selection
+
+    # Function to get one room's series, optionally limited to a season and the occupancy window
+    def series(self, room, variable, season=None, occupied=False):
+        values = self._load(_series_path(self.root, variable, room))
+        selection = self._selection(season, occupied)
+        if selection is None:
+            return self.timestamps, values
+        return self.timestamps[selection], values[selection]
+
+    # Function to get the time-by-room matrix of one variable
+    def matrix(self, variable, season=None, occupied=False):
+        rooms = self.rooms(variable)
+        selection = self._selection(season, occupied)
+        columns = [self._load(_series_path(self.root, variable, room)) for room in rooms]
+        if selection is not None:
+            columns = [column[selection] for column in columns]
+        timestamps = self.timestamps if selection is None else self.timestamps[selection]
+        matrix = np.column_stack(columns) if columns else np.empty((len(timestamps), 0), dtype=np.float32)
+        return np.asarray(timestamps), rooms, matrix
+
+
+def _source_signatures(paths):
+    return [list(kpi_store.file_signature(path)) for path in sorted(paths)]
+
+
+# Name of the build directory of a set of comfort exports
+def _build_key(paths):
+    sources = json.dumps([STORE_VERSION, _source_signatures(paths)])
+    return hashlib.sha1(sources.encode()).hexdigest()[:16]
+
+
+def _complete(build):
+    return os.path.exists(os.path.join(build, MANIFEST_FILE))
+
+
+# Builds of one process wait for each other, so a store is never built twice at the same time
+_build_lock = threading.Lock()
+
+
+def _save(path, array):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, array)
+
+
+# Function to build the store from the comfort exports into a fresh directory
+def build_room_store(paths, root=ROOM_STORE_DIR):
+    key = _build_key(paths)
+    arranged = {variable: [] for variable in comfort_classes.VARIABLE_COLUMNS}
+    for path in sorted(paths):
+        df = kpi_store.read_kpi_csv(path)
+        variables = comfort_classes.source_variables(path)
+        for variable in variables:
+            part = comfort_classes.room_matrix(df, variable, bare_rooms=len(variables) == 1)
+            if part is not None:
+                arranged[variable].append(part)
+
+    all_times = [part[0] for parts in arranged.values() for part in parts]
+    timestamps = np.unique(np.concatenate(all_times)) if all_times else np.array([], dtype="datetime64[ns]")
+
+    temporary = os.path.join(root, f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+    shutil.rmtree(temporary, ignore_errors=True)
+    os.makedirs(temporary)
+    _save(os.path.join(temporary, TIMESTAMPS_FILE), timestamps)
+
+    office_hours = comfort_classes.occupancy_mask(timestamps)
+    _save(_mask_path(temporary, "office_hours"), office_hours)
+    _save(_mask_path(temporary, "occupancy"), comfort_classes.occupancy_mask(timestamps, weekdays_only=True))
+    seasons, _ = timeseries.season_codes(timestamps)
+    for code, name in enumerate(timeseries.SEASON_NAMES):
+        _save(_mask_path(temporary, name.lower()), seasons == code)
+
+    rooms = {}
+    for variable, parts in arranged.items():
+        columns = {}
+        for times, part_rooms, matrix in parts:
+            positions = np.searchsorted(timestamps, times)
+            for j, room in enumerate(part_rooms):
+                column = columns.get(room)
+                if column is None:
+                    column = np.full(timestamps.size, np.nan, dtype=np.float32)
+                    columns[room] = column
+                column[positions] = matrix[:, j]
+        for room, column in columns.items():
+            _save(_series_path(temporary, variable, room), column)
+        if columns:
+            rooms[variable] = sorted(columns)
+
+    manifest = {"version": STORE_VERSION, "sources": _source_signatures(paths), "rooms": rooms}
+    with open(os.path.join(temporary, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    build = os.path.join(root, key)
+    if not _complete(build):
+        shutil.rmtree(build, ignore_errors=True)
+    try:
+        os.replace(temporary, build)
+    except OSError:
+        # Built meanwhile by another process
+        shutil.rmtree(temporary, ignore_errors=True)
+    _switch(root, key)
+    remove_old_builds(root)
+    return RoomStore(build)
+
+
+def _switch(root, key):
+    temporary = os.path.join(root, f"{CURRENT_FILE}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(key)
+    os.replace(temporary, os.path.join(root, CURRENT_FILE))
+
+
+# Function to remove the builds other than the current one (and files of older layouts).
+# Builds still memory-mapped somewhere cannot be removed on every platform; they are left
+# for a later call. Builds in progress (*.tmp) are not touched.
+def remove_old_builds(root=ROOM_STORE_DIR):
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            current = f.read().strip()
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name in (current, CURRENT_FILE) or entry.name.endswith(".tmp"):
+            continue
+        try:
+            if entry.is_dir():
+                # The manifest goes first, so a partly removed build is never taken for a complete one
+                manifest = os.path.join(entry.path, MANIFEST_FILE)
+                if os.path.exists(manifest):
+                    os.remove(manifest)
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+        except OSError:
+            continue
+
+
+# Function to open the store, rebuilding it when the comfort exports changed
+def ensure_room_store(paths, root=ROOM_STORE_DIR):
+    build = os.path.join(root, _build_key(paths))
+    with _build_lock:
+        if not _complete(build):
+            return build_room_store(paths, root)
+        return RoomStore(build)
+
+
+# Function to classify every room and season of the store: {variable: class-share table}
+def comfort_tables(store):
+    occupied = np.asarray(store.mask("office_hours"))
+    tables = {}
+    for variable in store.variables:
+        timestamps, rooms, matrix = store.matrix(variable)
+        tables[variable] = comfort_classes.class_shares(variable, timestamps, rooms, matrix, occupied=occupied)
+    return tables
@@ -0,0 +1,101 @@
+import json
+import os
+
+import kpi_assets
+
+# Partitioned layout: sites/<site>/4_KPI and sites/<site>/3_Sankey_Diagram, with an optional
+# sites/<site>/site.json ({"name": ..., "room_types": {room: type}}). Without a sites
+# directory the dashboard serves the single building laid out in the working directory.
+SITES_DIR = "sites"
+SITE_CONFIG = "site.json"
+
+# Derived data of every site lives below its own cache directory
+CACHE_ROOT = ".dashboard_cache"
+
+# Name and room types of the building served from the working directory
+DEFAULT_SITE_NAME = "Building Z"
+DEFAULT_ROOM_TYPES = {
+    # Meeting & break spaces
+    "241": "Meeting or break space",
+    "243": "Meeting or break space",
+    "225": "Meeting or break space",
+
+    # PC rooms
+    "445": "PC Room",
+    "424": "PC Room",
+    "423": "PC Room",
+    "422": "PC Room",
+    "421": "PC Room",
+    "522": "PC Room",
+    "521": "PC Room",
+
+    # Offices
+    "345": "Office",
+    "332": "Office",
+    "328": "Office",
+    "327": "Office",
+    "324": "Office",
+
+    # Teaching rooms
+    "223": "Teaching Room",
+    "221": "Teaching Room",
+    "126": "Teaching Room",
+    "125": "Teaching Room",
+
+    # Laboratories
+    "543": "Laboratory",
+    "524": "Laboratory",
+    "171": "Laboratory",
+    "143": "Laboratory",
+    "123": "Laboratory",
+}
+
+
+# One building: where its exports live and where its derived data is cached
+class Site:
+    def __init__(self, key, name, root, cache_dir, room_types=None):
+        self.key = key
+        self.name = name
+        self.root = root
+        self.kpi_dir = os.path.normpath(os.path.join(root, kpi_assets.KPI_DIR))
+        self.sankey_dir = os.path.normpath(os.path.join(root, kpi_assets.SANKEY_DIR))
+        self.cache_dir = cache_dir
+        self.room_types = room_types or {}
+
+    def cache_path(self, default_dir):
+        # Per-site counterpart of a module's default cache directory (e.g. kpi_store.SERIES_DIR)
+        return os.path.join(self.cache_dir, os.path.basename(default_dir))
+
+    @property
+    def legacy(self):
+        return self.root == "."
+
+    def __repr__(self):
+        return f"Site({self.key!r}, {self.name!r})"
+
+
+def _read_config(root):
+    try:
+        with open(os.path.join(root, SITE_CONFIG), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# Function to list the sites of the working directory, sorted by name
+def discover_sites(sites_dir=SITES_DIR, cache_root=CACHE_ROOT):
+    sites = []
+    if os.path.isdir(sites_dir):
+        for entry in sorted(os.scandir(sites_dir), key=lambda entry: entry.name):
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            if not os.path.isdir(os.path.join(entry.path, kpi_assets.KPI_DIR)):
+                continue
+            config = _read_config(entry.path)
+            sites.append(Site(entry.name, config.get("name", entry.name.replace("_", " ")), entry.path,
+                              os.path.join(cache_root, SITES_DIR, entry.name), config.get("room_types")))
+    if not sites:
+        config = _read_config(".")
+        sites.append(Site("", config.get("name", DEFAULT_SITE_NAME), ".", cache_root,
+                          config.get("room_types", DEFAULT_ROOM_TYPES)))
+    return sorted(sites, key=lambda site: site.name.lower())
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import boiler_load
+
+
+def two_boilers():
+    timestamps = pd.date_range("2023-01-02", periods=6, freq="h").values
+    boilers = np.repeat(["B1", "B2"], 6)
+    heat = np.array([0.0, 52.0, 55.0, 0.0, 95.0, 0.0,
+                     0.0, 12.0, 12.0, 12.0, 0.0, 0.0])
+    gas = np.array([0.0, 60.0, 60.0, 0.0, 100.0, 0.0,
+                    0.0, 15.0, 15.0, 15.0, 0.0, 0.0])
+    return boilers, np.concatenate([timestamps, timestamps]), gas, heat
+
+
+def test_part_load_bins_and_cycles():
+    table = boiler_load.load_bins(*two_boilers(), rated={"B1": 100.0, "B2": 50.0})
+    assert table.index.tolist() == [
+        ("B1", "Winter 2023", "50%-60%"), ("B1", "Winter 2023", "90%-100%"), ("B2", "Winter 2023", "20%-30%"),
+    ]
+    # Each reading is credited the hour since the previous one of the same boiler
+    assert table["hours"].tolist() == [2.0, 1.0, 3.0]
+    assert table["heat_kwh"].tolist() == [107.0, 95.0, 36.0]
+    assert table["gas_kwh"].tolist() == [120.0, 100.0, 45.0]
+    assert table["efficiency"].tolist() == pytest.approx([107.0 / 1.2, 95.0, 80.0])
+    # B1 fires twice, B2 once
+    assert table["cycles"].tolist() == [1, 1, 1]
+    assert table["cycles"].groupby(level="boiler").sum().to_dict() == {"B1": 2, "B2": 1}
+
+
+def test_rating_defaults_to_the_observed_output():
+    table = boiler_load.load_bins(*two_boilers())
+    # B2 always runs at its 99th percentile: every firing hour falls in the top bin
+    assert table.loc[("B2", "Winter 2023")].index.tolist() == ["90%-100%"]
+
+
+def test_energy_totals_ignore_the_firing_threshold_and_chunking():
+    boilers, timestamps, gas, heat = two_boilers()
+    df = pd.DataFrame({"Timestamp": timestamps[:6], "Gas_Input": gas[:6], "Heat_Output": heat[:6]})
+    assert boiler_load.energy_totals([df]) == pytest.approx([202.0, 220.0])
+    previous = pd.Timestamp(timestamps[2]).value
+    chunks = np.add(boiler_load.frame_energy(df.iloc[:3]), boiler_load.frame_energy(df.iloc[3:], previous))
+    assert chunks == pytest.approx([202.0, 220.0])
+    assert boiler_load.overall_efficiency([df]) == pytest.approx(202.0 / 220.0 * 100)
+    assert boiler_load.energy_totals([df.drop(columns="Heat_Output")]) == [0.0, 0.0]
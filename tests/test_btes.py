@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+import btes
+import kpi_store
+
+KW_PER_K = btes.FLUID_KW_PER_M3H_K
+
+
+def rows(start, delta_t):
+    n = len(delta_t)
+    return pd.DataFrame({
+        "Timestamp": pd.date_range(start, periods=n, freq="h").strftime("%Y-%m-%d %H:%M"),
+        "BTES_Supply_Temp": [10.0 + d for d in delta_t],
+        "BTES_Return_Temp": [10.0] * n,
+        "BTES_Flow": [1.0] * n,
+    })
+
+
+def test_appended_rows_are_integrated_like_a_full_pass(tmp_path):
+    path = str(tmp_path / "btes.csv")
+    state_dir = str(tmp_path / "state")
+    rows("2023-01-01 00:00", [2, 2, 2]).to_csv(path, index=False, **kpi_store.CSV_OPTIONS)
+    tracker = btes.BTESTracker(path, state_dir)
+    assert tracker.refresh() == 3
+    rows("2023-01-01 03:00", [-1, -1, -1]).to_csv(path, mode="a", header=False, index=False, **kpi_store.CSV_OPTIONS)
+    assert tracker.refresh() == 3
+
+    # The first reading is credited no time; the first appended one the hour since the last reading
+    daily = tracker.daily()
+    assert daily["charge_kwh"].iloc[0] == pytest.approx(2 * 2 * KW_PER_K)
+    assert daily["discharge_kwh"].iloc[0] == pytest.approx(3 * KW_PER_K)
+    assert daily["soc_kwh"].iloc[-1] == pytest.approx(KW_PER_K)
+    assert tracker.annual().loc[2023, "balance_kwh"] == pytest.approx(KW_PER_K)
+
+    full = str(tmp_path / "full.csv")
+    rows("2023-01-01 00:00", [2, 2, 2, -1, -1, -1]).to_csv(full, index=False, **kpi_store.CSV_OPTIONS)
+    whole = btes.BTESTracker(full, state_dir)
+    whole.refresh()
+    pd.testing.assert_frame_equal(whole.daily(), daily)
+
+
+def test_state_survives_a_restart_and_a_rewrite_starts_over(tmp_path):
+    path = str(tmp_path / "btes.csv")
+    state_dir = str(tmp_path / "state")
+    rows("2023-01-01 00:00", [2, 2, 2]).to_csv(path, index=False, **kpi_store.CSV_OPTIONS)
+    btes.BTESTracker(path, state_dir).refresh()
+
+    restarted = btes.BTESTracker(path, state_dir)
+    assert restarted.refresh() == 0
+    assert restarted.daily()["charge_kwh"].iloc[0] == pytest.approx(2 * 2 * KW_PER_K)
+
+    rows("2023-02-01 00:00", [1, 1, 1, 1]).to_csv(path, index=False, **kpi_store.CSV_OPTIONS)
+    assert restarted.refresh() == 4
+    assert restarted.daily().index.tolist() == [pd.Timestamp("2023-02-01")]
+    assert restarted.daily()["charge_kwh"].iloc[0] == pytest.approx(3 * KW_PER_K)
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import comfort_classes
+
+
+def monday_hours():
+    # Monday 2 January 2023, one reading per hour; 09:00-16:00 are occupied
+    return pd.date_range("2023-01-02", periods=24, freq="h")
+
+
+def test_classify_each_variable():
+    winter = np.zeros(4, dtype=int)
+    temperature = np.array([[21.5], [22.0], [22.5], [25.0]], dtype=np.float32)
+    assert comfort_classes.classify("temperature", temperature, winter)[:, 0].tolist() == [0, 0, 1, 3]
+    co2 = np.array([[350.0], [500.0], [800.0], [np.nan]], dtype=np.float32)
+    assert comfort_classes.classify("co2", co2)[:, 0].tolist() == [0, 1, 2, -1]
+    humidity = np.array([[20.0], [30.0], [60.0], [61.0]], dtype=np.float32)
+    assert comfort_classes.classify("humidity", humidity)[:, 0].tolist() == [0, 1, 1, 2]
+
+
+def test_class_shares_count_occupied_hours_only():
+    timestamps = monday_hours()
+    df = pd.DataFrame({
+        "Timestamp": timestamps,
+        "CO2_241": 500.0,
+        # Half of the occupied hours above 1000 ppm, the night always clean
+        "CO2_242": np.where(timestamps.hour >= 13, 1200.0, 350.0),
+    })
+    table = comfort_classes.class_shares("co2", *comfort_classes.room_matrix(df, "co2"))
+    assert table.index.tolist() == [("Winter", "241"), ("Winter", "242")]
+    assert table["samples"].tolist() == [8, 8]
+    assert table.loc[("Winter", "241"), "IDA 2"] == 100.0
+    assert table.loc[("Winter", "242"), ["IDA 1", "IDA 4"]].tolist() == [50.0, 50.0]
+
+
+def test_long_and_wide_exports_give_the_same_matrix():
+    timestamps = monday_hours()[:3]
+    wide = pd.DataFrame({"Timestamp": timestamps, "RH_241": [35.0, 40.0, 45.0], "RH_242": [50.0, 55.0, 65.0]})
+    long = pd.DataFrame({
+        "Timestamp": np.repeat(timestamps, 2),
+        "Room": ["241", "242"] * 3,
+        "RH": [35.0, 50.0, 40.0, 55.0, 45.0, 65.0],
+    })
+    wide_t, wide_rooms, wide_matrix = comfort_classes.room_matrix(wide, "humidity")
+    long_t, long_rooms, long_matrix = comfort_classes.room_matrix(long, "humidity")
+    assert wide_rooms == long_rooms == ["241", "242"]
+    assert np.array_equal(wide_t, long_t)
+    assert np.array_equal(wide_matrix, long_matrix)
+
+
+def test_merge_shares_weights_by_samples():
+    index = pd.MultiIndex.from_tuples([("Winter", "241")], names=["season", "room"])
+    labels = comfort_classes.CLASS_LABELS["co2"]
+    first = pd.DataFrame([[100.0, 0.0, 0.0, 0.0, 10]], index=index, columns=labels + ["samples"])
+    second = pd.DataFrame([[0.0, 100.0, 0.0, 0.0, 30]], index=index, columns=labels + ["samples"])
+    merged = comfort_classes.merge_shares("co2", [first, second])
+    assert merged.loc[("Winter", "241"), ["IDA 1", "IDA 2", "samples"]].tolist() == pytest.approx([25.0, 75.0, 40])
+
+
+def test_bare_room_columns_only_count_in_single_variable_folders():
+    df = pd.DataFrame({"Timestamp": monday_hours(), "241": 21.0})
+    temperature = os.path.join("Comfort_results", "Temperature", "rooms.csv")
+    mixed = os.path.join("Comfort_results", "CO2_and_Humidity", "rooms.csv")
+    assert list(comfort_classes.comfort_tables({temperature: df})) == ["temperature"]
+    assert comfort_classes.comfort_tables({mixed: df}) == {}
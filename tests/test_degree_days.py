@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import degree_days
+import kpi_store
+
+
+def readings():
+    timestamps = pd.to_datetime([
+        "2022-08-31 06:00", "2022-08-31 18:00",  # academic year 2021-2022, mean 16
+        "2022-09-01 06:00", "2022-09-01 18:00",  # mean 12
+        "2022-09-02 12:00",                      # 30
+        "2022-09-03 00:00", "2022-09-03 12:00",  # mean 18, on the base
+    ])
+    return timestamps, np.array([14.0, 18.0, 10.0, 14.0, 30.0, 17.0, 19.0])
+
+
+def test_degree_days_of_a_known_series():
+    engine = degree_days.DegreeDayEngine(heating_base=18.0, cooling_base=24.0)
+    engine.update(*readings())
+    daily = engine.daily()
+    assert daily["temperature"].tolist() == [16.0, 12.0, 30.0, 18.0]
+    assert daily["hdd"].tolist() == [2.0, 6.0, 0.0, 0.0]
+    assert daily["cdd"].tolist() == [0.0, 0.0, 6.0, 0.0]
+    assert engine.years() == [2021, 2022]
+    annual = engine.annual()
+    assert annual.loc["2021-2022"].tolist() == [2.0, 0.0]
+    assert annual.loc["2022-2023"].tolist() == [6.0, 6.0]
+    assert engine.monthly(2022)["hdd"].tolist() == [6.0]
+
+
+def test_incremental_updates_match_a_single_pass():
+    timestamps, values = readings()
+    single = degree_days.DegreeDayEngine()
+    single.update(timestamps, values)
+    chunked = degree_days.DegreeDayEngine()
+    # Split inside a day, and repeat readings that were already counted
+    for lo, hi in ((0, 3), (2, 4), (4, 7)):
+        chunked.update(timestamps[lo:hi], values[lo:hi])
+    assert chunked.totals == pytest.approx(single.totals)
+    pd.testing.assert_frame_equal(chunked.daily(), single.daily())
+
+
+def test_tracker_follows_an_appended_weather_export(tmp_path):
+    path = str(tmp_path / "weather.csv")
+    timestamps, values = readings()
+    rows = pd.DataFrame({"Timestamp": timestamps.strftime("%Y-%m-%d %H:%M"), "Outdoor_Temperature": values})
+    rows.iloc[:4].to_csv(path, index=False, **kpi_store.CSV_OPTIONS)
+    assert degree_days.has_outdoor_temperature(path)
+
+    tracker = degree_days.DegreeDayTracker(path, degree_days.DegreeDayEngine())
+    assert tracker.refresh().totals == pytest.approx({2021: [2.0, 0.0], 2022: [6.0, 0.0]})
+    rows.iloc[4:].to_csv(path, mode="a", header=False, index=False, **kpi_store.CSV_OPTIONS)
+    assert tracker.refresh().totals == pytest.approx({2021: [2.0, 0.0], 2022: [6.0, 6.0]})
+
+    # A rewritten export starts a fresh engine
+    rows.iloc[2:4].to_csv(path, index=False, **kpi_store.CSV_OPTIONS)
+    assert tracker.refresh().totals == pytest.approx({2022: [6.0, 0.0]})
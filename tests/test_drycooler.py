@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import drycooler
+
+
+def test_modes_follow_the_coil_and_ambient_temperatures():
+    inlet = np.array([30.0, 10.0, 20.0, 20.0, 20.0])
+    outlet = np.array([25.0, 14.0, 20.2, 18.0, 18.0])
+    ambient = np.array([20.0, 15.0, 10.0, 19.5, 25.0])
+    modes = drycooler.detect_modes(inlet, outlet, ambient)
+    # Rejection, absorption, no temperature change, no approach, cooled towards warmer air
+    assert modes.tolist() == [drycooler.REJECTION, drycooler.ABSORPTION, drycooler.IDLE, drycooler.IDLE, drycooler.IDLE]
+
+
+def frame():
+    return pd.DataFrame({
+        "Timestamp": pd.date_range("2023-07-01", periods=4, freq="h").strftime("%Y-%m-%d %H:%M"),
+        "DC_Inlet_Temp": [30.0, 30.0, 30.0, 10.0],
+        "DC_Outlet_Temp": [25.0, 25.0, 28.0, 14.0],
+        "Ambient_Temperature": [20.0, 20.0, 20.0, 15.0],
+        "DC_Flow": [2.0, 2.0, 2.0, 1.0],
+    })
+
+
+def test_effectiveness_is_heat_weighted():
+    result = drycooler.analyse_frame(frame())
+    assert result["modes"].tolist() == [1, 1, 1, 2]
+    assert result["effectiveness"].tolist() == pytest.approx([0.5, 0.5, 0.2, 0.8])
+    # The first reading is credited no time
+    assert result["heat_kwh"].tolist() == pytest.approx([0.0, 5 * 2 * 1.163, 2 * 2 * 1.163, 4 * 1.163])
+    summary = drycooler.mode_summary(result)
+    assert summary.loc["rejection", "effectiveness"] == pytest.approx((0.5 * 5 + 0.2 * 2) / 7 * 100)
+    assert summary.loc["rejection", "hours"] == 2.0
+    assert drycooler.overall_effectiveness([frame()], "absorption") == pytest.approx(80.0)
+
+
+def test_totals_of_chunks_match_the_whole_frame():
+    df = frame()
+    previous = pd.Timestamp("2023-07-01 01:00").value
+    for mode in ("rejection", "absorption"):
+        chunks = np.add(drycooler.effectiveness_totals(df.iloc[:2], mode),
+                        drycooler.effectiveness_totals(df.iloc[2:], mode, previous))
+        assert chunks == pytest.approx(drycooler.effectiveness_totals(df, mode))
+    assert drycooler.effectiveness_totals(df.drop(columns="Ambient_Temperature"), "rejection") == [0.0, 0.0]
+
+
+def test_daily_comparison_with_the_ehp():
+    ehp = pd.DataFrame({
+        "Timestamp": pd.date_range("2023-07-01", periods=4, freq="h"),
+        "Cooling_Output": [10.0, 10.0, 10.0, 10.0],
+        "Electric_Input": [3.0, 3.0, 3.0, 3.0],
+    })
+    table = drycooler.daily_comparison(drycooler.analyse_frame(frame()), ehp)
+    assert table.index.tolist() == [pd.Timestamp("2023-07-01")]
+    assert table["dc_active_hours"].iloc[0] == 3.0
+    assert table["ehp_cooling_kwh"].iloc[0] == pytest.approx(30.0)
+    assert table["ehp_electricity_kwh"].iloc[0] == pytest.approx(9.0)
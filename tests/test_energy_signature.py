@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import energy_signature
+
+
+def synthetic(mode, balance_point, rate, baseload, noise=0.0, n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    temperature = rng.uniform(-5, 30, n)
+    fit = {"balance_point": balance_point, "rate": rate, "baseload": baseload}
+    return temperature, energy_signature.predict(fit, temperature, mode) + rng.normal(0, noise, n)
+
+
+@pytest.mark.parametrize("mode, balance_point, rate, baseload", [
+    ("heating", 14.4, 3.8, 5.0),
+    ("cooling", 21.0, 0.6, 6.0),
+])
+def test_exact_signature_is_recovered(mode, balance_point, rate, baseload):
+    temperature, load = synthetic(mode, balance_point, rate, baseload)
+    fit = energy_signature.fit_signature(temperature, load, mode, samples=0)
+    assert fit["balance_point"] == pytest.approx(balance_point, abs=energy_signature.BALANCE_STEP / 2)
+    assert fit["rate"] == pytest.approx(rate, rel=1e-6)
+    assert fit["baseload"] == pytest.approx(baseload, rel=1e-6)
+    assert fit["r2"] == pytest.approx(1.0)
+    assert fit["samples"] == 2000
+
+
+def test_bootstrap_interval_covers_the_true_breakpoint():
+    temperature, load = synthetic("heating", 12.0, 2.0, 4.0, noise=1.0)
+    fit = energy_signature.fit_signature(temperature, load, "heating", samples=100, seed=1)
+    low, high = fit["balance_point_ci"]
+    assert low <= 12.0 <= high
+    assert fit["rate_ci"][0] < fit["rate"] < fit["rate_ci"][1]
+    # The same seed gives the same intervals
+    again = energy_signature.fit_signature(temperature, load, "heating", samples=100, seed=1)
+    assert again["balance_point_ci"] == fit["balance_point_ci"]
+
+
+def test_fit_frame_needs_temperature_and_load():
+    temperature, load = synthetic("heating", 15.0, 3.0, 2.0, n=50)
+    df = pd.DataFrame({"Outdoor_Temperature": temperature, "Heating_Load": load})
+    assert energy_signature.fit_frame(df, "heating", samples=0)["balance_point"] == pytest.approx(15.0, abs=0.05)
+    assert energy_signature.fit_frame(df, "cooling", samples=0) is None
+    assert energy_signature.fit_signature(temperature[:5], load[:5], samples=0) is None
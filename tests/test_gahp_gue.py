@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import gahp_gue
+
+
+def test_gue_is_energy_weighted():
+    timestamps = pd.date_range("2023-01-01", periods=4, freq="h")
+    # Each reading is credited the hour since the previous one; the first gets none
+    result = gahp_gue.compute_gue(timestamps, [10.0, 20.0, 0.0, 10.0], [12.0, 20.0, 0.0, 15.0])
+    annual = result["annual"]
+    assert annual.loc[2023, "gas_kwh"] == pytest.approx(30.0)
+    assert annual.loc[2023, "heat_kwh"] == pytest.approx(35.0)
+    # Sum of heat over sum of gas, not the mean of the ratios (1.0 and 1.5)
+    assert annual.loc[2023, "gue"] == pytest.approx(35.0 / 30.0)
+
+
+def test_energy_inputs_are_summed_per_hour_and_day():
+    timestamps = pd.to_datetime(["2023-01-01 00:10", "2023-01-01 00:40", "2023-01-01 05:00", "2023-01-02 00:00"])
+    result = gahp_gue.compute_gue(timestamps, [4.0, 6.0, 10.0, 5.0], [5.0, 7.0, 14.0, 4.0], power=False)
+    hourly = result["hourly"]
+    assert hourly["gas_kwh"].tolist() == [10.0, 10.0, 5.0]
+    assert hourly["samples"].tolist() == [2, 1, 1]
+    daily = result["daily"]
+    assert daily["gue"].tolist() == pytest.approx([26.0 / 20.0, 4.0 / 5.0])
+    assert result["seasonal"].index.tolist() == ["Winter 2023"]
+
+
+def test_hours_without_gas_have_no_gue():
+    result = gahp_gue.compute_gue(pd.to_datetime(["2023-01-01 00:00"]), [0.0], [1.0], power=False)
+    assert np.isnan(result["hourly"]["gue"].iloc[0])
+    assert gahp_gue.totals_gue([1.0, 0.0]) is None
+
+
+def test_totals_of_frames_add_up():
+    df = pd.DataFrame({
+        "Timestamp": ["2023-01-01 00:00", "2023-01-01 00:30", "2023-01-01 01:00"],
+        "Gas_Input": [10.0, 10.0, 20.0],
+        "Heat_Output": [13.0, 13.0, 26.0],
+    })
+    assert gahp_gue.energy_totals(df) == pytest.approx([19.5, 15.0])
+    # The second half continues the series from the last timestamp of the first
+    first, second = df.iloc[:2], df.iloc[2:]
+    previous = pd.Timestamp("2023-01-01 00:30").value
+    totals = np.add(gahp_gue.energy_totals(first), gahp_gue.energy_totals(second, previous))
+    assert totals == pytest.approx([19.5, 15.0])
+    assert gahp_gue.overall_gue([first, second]) == pytest.approx(1.3)
+    assert gahp_gue.energy_totals(df.drop(columns="Gas_Input")) == [0.0, 0.0]
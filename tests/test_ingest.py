@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ingest
+import kpi_assets
+import kpi_store
+import kpi_summary
+
+COMPONENT = "GAHP_GUE"
+
+
+def write_export(path, rows, seed=0, irregular=False):
+    rng = np.random.default_rng(seed)
+    gas = rng.uniform(0, 40, rows).round(2)
+    if irregular:
+        # Gaps of 5 minutes to 3 hours, so some exceed the longest credited interval
+        times = pd.Timestamp("2023-01-01") + pd.to_timedelta(np.cumsum(rng.integers(5, 180, rows)), unit="min")
+    else:
+        times = pd.date_range("2023-01-01", periods=rows, freq="h")
+    df = pd.DataFrame({
+        "Timestamp": times.strftime("%Y-%m-%d %H:%M"),
+        "Gas_Input": gas,
+        "Heat_Output": (gas * rng.uniform(1.1, 1.5, rows)).round(2),
+        "GUE": rng.uniform(1.1, 1.5, rows).round(3),
+    })
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=False, **kpi_store.CSV_OPTIONS)
+    return df
+
+
+def summary_values(path):
+    return {name: entry["value"] for name, entry in kpi_summary.read_summary_file(path)["metrics"].items()}
+
+
+def full_recompute(tmp_path, kpi_dir):
+    return kpi_summary.materialize_summary(kpi_assets.AssetIndex(kpi_dir, str(tmp_path / "none")), kpi_dir,
+                                           path=str(tmp_path / "full_summary.json"))
+
+
+def make_layout(tmp_path, component=COMPONENT, irregular=False, rows=1000):
+    kpi_dir = str(tmp_path / "4_KPI")
+    write_export(os.path.join(kpi_dir, component, "history.csv"), 200, seed=1, irregular=irregular)
+    kpi_summary.materialize_summary(kpi_assets.AssetIndex(kpi_dir, str(tmp_path / "none")), kpi_dir)
+    source = str(tmp_path / "export.csv")
+    write_export(source, rows, seed=2, irregular=irregular)
+    ingester = ingest.Ingester(str(tmp_path / "drop"), kpi_dir, str(tmp_path / "state"))
+    return tmp_path, kpi_dir, source, ingester
+
+
+@pytest.fixture
+def layout(tmp_path):
+    return make_layout(tmp_path)
+
+
+@pytest.mark.parametrize("component", [COMPONENT, "Boiler1_Efficiency"])
+@pytest.mark.parametrize("rows, chunk_rows, growing, irregular", [
+    (1000, 137, False, False),
+    (1000, 137, True, False),
+    (1000, 137, False, True),
+    (60, 1, False, False),
+    (60, 1, True, True),
+])
+def test_chunked_replay_matches_full_recompute(tmp_path, component, rows, chunk_rows, growing, irregular):
+    tmp_path, kpi_dir, source, ingester = make_layout(tmp_path, component, irregular, rows)
+    total = 0
+    for _ in ingest.replay(source, component, str(tmp_path / "drop"), chunk_rows=chunk_rows, interval=0, growing=growing):
+        total += ingester.poll().get(component, 0)
+    assert total == rows
+
+    stream = kpi_store.read_kpi_csv(os.path.join(kpi_dir, component, ingest.STREAM_FILE))
+    assert len(stream) == rows
+    incremental = summary_values(os.path.join(kpi_dir, kpi_summary.SUMMARY_FILE))
+    assert incremental == pytest.approx(full_recompute(tmp_path, kpi_dir))
+
+
+def test_failed_summary_update_does_not_ingest_rows_twice(layout, monkeypatch):
+    tmp_path, kpi_dir, source, ingester = layout
+    chunks = ingest.replay(source, COMPONENT, str(tmp_path / "drop"), chunk_rows=400, interval=0)
+    next(chunks)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("summary unavailable")
+
+    monkeypatch.setattr(kpi_summary, "append_to_summary", fail)
+    assert ingester.poll() == {COMPONENT: 400}
+    monkeypatch.undo()
+
+    # A restarted ingester resumes from the saved positions
+    restarted = ingest.Ingester(str(tmp_path / "drop"), kpi_dir, str(tmp_path / "state"))
+    assert restarted.poll() == {}
+    for _ in chunks:
+        restarted.poll()
+    stream = kpi_store.read_kpi_csv(os.path.join(kpi_dir, COMPONENT, ingest.STREAM_FILE))
+    assert len(stream) == 1000
+
+    index = kpi_assets.AssetIndex(kpi_dir, str(tmp_path / "none"))
+    assert kpi_summary.materialize_summary(index, kpi_dir) == pytest.approx(full_recompute(tmp_path, kpi_dir))
@@ -0,0 +1,59 @@
+import os
+
+import kpi_assets
+
+
+def touch(root, *parts):
+    path = os.path.join(root, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").close()
+    return path
+
+
+def test_classify_asset():
+    asset = kpi_assets.classify_asset(os.path.join("4_KPI", "GAHP_GUE", "GUE_Seasonal_PowerVStemp.png"), "GAHP_GUE")
+    assert asset.kinds == ("gue_map",) and asset.ext == ".png"
+
+    asset = kpi_assets.classify_asset("temp_241B_winter.png", "Comfort_results/Temperature")
+    assert "temp_room" in asset.kinds
+    assert (asset.room, asset.season, asset.year) == ("241B", "winter", None)
+    summary = kpi_assets.classify_asset("temp_summary_winter.png", "Comfort_results/Temperature")
+    assert "temp_room" not in summary.kinds and summary.room is None
+
+    asset = kpi_assets.classify_asset("monthly_degree_days_2021.png", "Degree_Days")
+    assert "monthly" in asset.kinds and asset.year == 2021
+    # A file gets every kind it matches
+    assert kpi_assets.classify_asset("dc_heat_rejection.png", "DC").kinds == ("heating", "rejection")
+
+
+def test_index_lookups(tmp_path):
+    kpi_dir, sankey_dir = str(tmp_path / "4_KPI"), str(tmp_path / "3_Sankey_Diagram")
+    series = touch(kpi_dir, "Boiler1_Efficiency", "Boiler1_time_series.png")
+    csv = touch(kpi_dir, "Boiler1_Efficiency", "b1.csv")
+    room = touch(kpi_dir, "Comfort_results", "Temperature", "temp_241_winter.png")
+    touch(kpi_dir, "Comfort_results", "Temperature", "temp_242_summer.png")
+    touch(kpi_dir, "Boiler1_Efficiency", ".hidden.png")
+    sankey = touch(sankey_dir, "energy_sankey.html")
+
+    index = kpi_assets.AssetIndex(kpi_dir, sankey_dir)
+    assert index.find("Boiler1_Efficiency") == (series, csv)
+    assert index.find("Boiler1_Efficiency", ext=".csv") == (csv,)
+    assert index.first("Boiler1_Efficiency", "time_series") == series
+    assert index.find("Comfort_results/Temperature", "temp_room", season="winter", room="241") == (room,)
+    assert index.rooms("Comfort_results/Temperature", "temp_room") == ["241", "242"]
+    assert index.rooms("Comfort_results/Temperature", "temp_room", season="summer") == ["242"]
+    assert index.find(kpi_assets.SANKEY_COMPONENT, "sankey") == (sankey,)
+    assert index.exists(csv) and not index.exists(os.path.join(kpi_dir, "missing.csv"))
+
+
+def test_index_rebuilds_when_a_directory_changes(tmp_path):
+    kpi_dir = str(tmp_path / "4_KPI")
+    first = touch(kpi_dir, "EHP_EER", "eer.csv")
+    index = kpi_assets.AssetIndex(kpi_dir, str(tmp_path / "none"), check_interval=0)
+    assert not index.refresh()
+
+    second = touch(kpi_dir, "EHP_EER", "stream.csv")
+    os.utime(os.path.dirname(second), ns=(0, 1))
+    assert index.refresh()
+    assert index.find("EHP_EER", ext=".csv") == (first, second)
+    assert index.builds == 2
@@ -0,0 +1,50 @@
+import kpi_store
+
+HEADER = "Timestamp;Value\n"
+
+
+def write(path, lines, mode="w"):
+    with open(path, mode, encoding="utf-8", newline="") as f:
+        f.write("".join(lines))
+
+
+def test_appended_rows_are_read_once(tmp_path):
+    path = str(tmp_path / "export.csv")
+    write(path, [HEADER, "2023-01-01 00:00;1\n", "2023-01-01 01:00;2\n"])
+    rows, offset, header, tail = kpi_store.read_appended_rows(path)
+    assert rows["Value"].tolist() == [1, 2]
+
+    write(path, ["2023-01-01 02:00;3\n", "2023-01-01 03:00;4"], mode="a")
+    rows, offset, header, tail = kpi_store.read_appended_rows(path, offset, header, tail)
+    # The unterminated last line waits for its newline
+    assert rows["Value"].tolist() == [3]
+    write(path, ["\n"], mode="a")
+    rows, offset, header, tail = kpi_store.read_appended_rows(path, offset, header, tail)
+    assert rows["Value"].tolist() == [4]
+
+
+def test_regenerated_export_with_same_header_is_detected(tmp_path):
+    path = str(tmp_path / "export.csv")
+    write(path, [HEADER, "2023-01-01 00:00;1\n", "2023-01-01 01:00;2\n"])
+    _, offset, header, tail = kpi_store.read_appended_rows(path)
+
+    # Rewritten from scratch, larger than before
+    write(path, [HEADER] + [f"2024-01-01 0{hour}:00;{hour + 10}\n" for hour in range(6)])
+    rows, offset, header, tail = kpi_store.read_appended_rows(path, offset, header, tail)
+    assert rows is None and offset == 0
+
+
+def test_frame_cache_keeps_one_frame_per_file_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(kpi_store, "FRAME_CACHE", kpi_store.FrameCache())
+    path = str(tmp_path / "export.csv")
+    write(path, ["Timestamp;Gas;Heat\n", "2023-01-01 00:00;1;2\n", "2023-01-01 01:00;3;4\n"])
+
+    assert kpi_store.read_kpi_csv(path, columns=["Gas", "Missing"]).columns.tolist() == ["Gas"]
+    # Other columns are loaded into the same entry
+    assert kpi_store.read_kpi_csv(path, columns=["Timestamp", "Heat"]).columns.tolist() == ["Timestamp", "Heat"]
+    full = kpi_store.read_kpi_csv(path)
+    assert full.columns.tolist() == ["Timestamp", "Gas", "Heat"]
+    assert full["Heat"].tolist() == [2, 4]
+    assert kpi_store.read_kpi_csv(path, columns=["Gas"])["Gas"].tolist() == [1, 3]
+    stats = kpi_store.FRAME_CACHE.stats()
+    assert stats["entries"] == 1 and stats["misses"] == 2 and stats["hits"] == 2
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import comfort_classes
+import kpi_store
+import room_store
+
+
+def write_exports(kpi_dir, co2_offset=0.0):
+    timestamps = pd.date_range("2023-01-02", periods=48, freq="h")
+    paths = {
+        os.path.join(kpi_dir, "Temperature", "temperature.csv"): pd.DataFrame({
+            "Timestamp": timestamps.strftime("%Y-%m-%d %H:%M"), "241": 21.0, "242": 23.5,
+        }),
+        # Every other hour only, so the rooms share the union of the timestamps
+        os.path.join(kpi_dir, "CO2_and_Humidity", "air.csv"): pd.DataFrame({
+            "Timestamp": timestamps[::2].strftime("%Y-%m-%d %H:%M"), "CO2_241": 500.0 + co2_offset, "RH_241": 40.0,
+        }),
+    }
+    for path, df in paths.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_csv(path, index=False, **kpi_store.CSV_OPTIONS)
+    return sorted(paths)
+
+
+def test_store_aligns_rooms_on_shared_timestamps(tmp_path):
+    paths = write_exports(str(tmp_path / "Comfort_results"))
+    store = room_store.ensure_room_store(paths, str(tmp_path / "store"))
+    assert store.variables == ["co2", "humidity", "temperature"]
+    assert store.rooms("temperature") == ["241", "242"]
+    assert store.timestamps.size == 48
+
+    timestamps, co2 = store.series("241", "co2")
+    assert np.isnan(co2[1]) and co2[0] == 500.0
+    timestamps, rooms, matrix = store.matrix("temperature", season="Winter", occupied=True)
+    # Monday and Tuesday, 09:00-16:00
+    assert matrix.shape == (16, 2)
+    assert np.all(matrix[:, 1] == 23.5)
+
+
+def test_store_tables_match_the_frame_classification(tmp_path):
+    paths = write_exports(str(tmp_path / "Comfort_results"))
+    store = room_store.ensure_room_store(paths, str(tmp_path / "store"))
+    from_store = room_store.comfort_tables(store)
+    from_frames = comfort_classes.comfort_tables({path: kpi_store.read_kpi_csv(path) for path in paths})
+    assert set(from_store) == set(from_frames) == {"temperature", "co2", "humidity"}
+    for variable, table in from_frames.items():
+        assert from_store[variable].equals(table.astype(from_store[variable].dtypes))
+
+
+def test_changed_exports_get_a_new_build(tmp_path):
+    root = str(tmp_path / "store")
+    paths = write_exports(str(tmp_path / "Comfort_results"))
+    first = room_store.ensure_room_store(paths, root)
+    assert room_store.ensure_room_store(paths, root).root == first.root
+
+    write_exports(str(tmp_path / "Comfort_results"), co2_offset=600.0)
+    second = room_store.ensure_room_store(paths, root)
+    assert second.root != first.root
+    assert second.series("241", "co2")[1][0] == 1100.0
+    with open(os.path.join(root, room_store.CURRENT_FILE), encoding="utf-8") as f:
+        assert f.read() == os.path.basename(second.root)
+    room_store.remove_old_builds(root)
+    assert not os.path.exists(os.path.join(first.root, room_store.MANIFEST_FILE))
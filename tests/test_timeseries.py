@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import timeseries
+
+
+def series(n, seed=0):
+    timestamps = pd.date_range("2023-01-01", periods=n, freq="min").values
+    return timestamps, np.random.default_rng(seed).normal(size=n).cumsum()
+
+
+def test_minmax_keeps_the_extremes_of_every_bucket():
+    values = np.array([3.0, 1.0, 2.0, 9.0, 5.0, 4.0, 0.0, 7.0])
+    # Two buckets of four samples: lowest and highest of each, in time order
+    assert timeseries.minmax_picks(values, 4).tolist() == [1, 3, 6, 7]
+    assert timeseries.minmax_picks(values, 8).tolist() == list(range(8))
+
+
+def test_minmax_skips_missing_values():
+    values = np.array([np.nan, np.nan, 1.0, 2.0, np.nan, np.nan])
+    assert timeseries.minmax_picks(values, 4).tolist() == [2, 3]
+
+
+def test_lttb_keeps_the_endpoints_and_the_requested_point_count():
+    timestamps, values = series(10_000)
+    picked_t, picked_v = timeseries.lttb_downsample(timestamps, values, 500)
+    assert picked_t.size == picked_v.size == 500
+    assert picked_t[0] == timestamps[0] and picked_t[-1] == timestamps[-1]
+    assert np.all(np.diff(picked_t.astype(np.int64)) > 0)
+    # Every pick is an original sample
+    positions = np.searchsorted(timestamps, picked_t)
+    assert np.array_equal(values[positions], picked_v)
+
+
+def test_lttb_picks_a_spike():
+    timestamps = pd.date_range("2023-01-01", periods=1000, freq="min").values
+    values = np.zeros(1000)
+    values[637] = 50.0
+    picked_t, picked_v = timeseries.lttb_downsample(timestamps, values, 20)
+    assert 50.0 in picked_v
+
+
+def test_downsample_counts_the_samples_of_the_window():
+    timestamps, values = series(1440)
+    start, end = pd.Timestamp("2023-01-01 06:00"), pd.Timestamp("2023-01-01 11:59")
+    x, y, samples = timeseries.downsample(timestamps, values, start, end, 100)
+    assert samples == 360
+    assert x.size <= 100
+    assert x[0] >= np.datetime64(start) and x[-1] <= np.datetime64(end)
+    x, y, samples = timeseries.downsample(timestamps, values, start, end, 100, method="lttb")
+    assert x.size == 100 and samples == 360
+
+
+def test_pyramid_levels_aggregate_the_raw_samples():
+    timestamps = pd.date_range("2023-01-31 23:00", periods=180, freq="min").values
+    values = np.arange(180, dtype=float)
+    values[5] = np.nan
+    pyramid = timeseries.build_pyramid(timestamps, values)
+    assert list(pyramid) == [name for name, _ in timeseries.PYRAMID_LEVELS]
+    for level in pyramid.values():
+        assert level.columns.tolist() == timeseries.PYRAMID_COLUMNS
+        assert level["count"].sum() == 179
+
+    hourly = pyramid["1h"]
+    assert hourly["start"].tolist() == list(pd.date_range("2023-01-31 23:00", periods=3, freq="h"))
+    assert hourly["count"].tolist() == [59, 60, 60]
+    assert hourly["min"].tolist() == [0.0, 60.0, 120.0]
+    assert hourly["max"].tolist() == [59.0, 119.0, 179.0]
+    assert hourly["mean"].iloc[1] == pytest.approx(89.5)
+    # Calendar months: the first hour falls in January, the rest in February
+    assert pyramid["1M"]["count"].tolist() == [59, 120]
+    assert pyramid["1M"]["sum"].sum() == pytest.approx(np.nansum(values))
+
+
+def test_pick_level_chooses_the_coarsest_fitting_level():
+    assert timeseries.pick_level(np.timedelta64(30, "s")) is None
+    assert timeseries.pick_level(np.timedelta64(20, "m")) == "15min"
+    assert timeseries.pick_level(np.timedelta64(2, "D")) == "1D"
+    assert timeseries.pick_level(np.timedelta64(60, "D")) == "1M"
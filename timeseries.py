@@ -0,0 +1,266 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Column names under which the KPI exports store their timestamps
+TIME_COLUMNS = ("Timestamp", "timestamp", "Datetime", "DateTime", "datetime", "Date", "date", "Time", "time")
+
+# Timestamps starting with the year are ISO 8601; any other layout is read day first,
+# as the European exports write them (dd/mm/yyyy)
+ISO_PATTERN = re.compile(r"\s*\d{4}-")
+
+# Meteorological seasons, named like the season selectors of the dashboard
+SEASON_NAMES = ("Winter", "Spring", "Summer", "Fall")
+MONTH_TO_SEASON = np.array([0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0])  # January .. December
+
+# Longest sample interval (h) credited to a reading; longer gaps are outages and get only this much
+MAX_SAMPLE_HOURS = 1.0
+
+
+# Function to pick the first column of a frame that exists among the candidates
+def pick_column(df, candidates):
+    for name in candidates:
+        if name in df.columns:
+            return name
+    return None
+
+
+# Function to parse the timestamps of an export column; values that do not parse become NaT
+def parse_times(values):
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    sample = values.dropna()
+    if not sample.empty and ISO_PATTERN.match(str(sample.iloc[0])):
+        return pd.to_datetime(values, errors="coerce", format="ISO8601")
+    return pd.to_datetime(values, errors="coerce", dayfirst=True)
+
+
+# Function to get the timestamps of a KPI frame as datetime64[ns], or None
+def time_values(df):
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df.index.values.astype("datetime64[ns]")
+    column = pick_column(df, TIME_COLUMNS)
+    if column is None:
+        return None
+    return parse_times(df[column]).values.astype("datetime64[ns]")
+
+
+# Calendar fields of datetime64 values, without building a DatetimeIndex
+def calendar_fields(timestamps):
+    t = np.asarray(timestamps, dtype="datetime64[ns]")
+    years = t.astype("datetime64[Y]").astype(np.int64) + 1970
+    months = t.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    return years, months
+
+
+# Season index (0=Winter .. 3=Fall) and season year; December counts towards the next winter
+def season_codes(timestamps):
+    years, months = calendar_fields(timestamps)
+    seasons = MONTH_TO_SEASON[months - 1]
+    season_years = years + (months == 12)
+    return seasons, season_years
+
+
+def season_label(season, season_year):
+    return f"{SEASON_NAMES[season]} {season_year}"
+
+
+# Hours represented by each sample: the interval since the previous reading, capped at max_hours.
+# previous is the last timestamp before these samples (None at the start of a series), so the
+# hours of consecutive chunks match those of the whole series. Unparsed timestamps get no time.
+def sample_hours(timestamps, previous=None, max_hours=MAX_SAMPLE_HOURS):
+    t = np.asarray(timestamps, dtype="datetime64[ns]")
+    hours = np.zeros(t.size)
+    known = np.flatnonzero(~np.isnat(t))
+    if known.size == 0:
+        return hours
+    t = t[known].astype(np.int64)
+    start = t[0] if previous is None else np.datetime64(previous, "ns").astype(np.int64)
+    hours[known] = np.clip(np.diff(t, prepend=start) / 3.6e12, 0.0, max_hours)
+    return hours
+
+
+# Function to get the latest timestamp of a frame as nanoseconds, or previous when it has none
+def last_time(df, previous=None):
+    timestamps = time_values(df)
+    if timestamps is None:
+        return previous
+    timestamps = timestamps[~np.isnat(timestamps)]
+    if timestamps.size == 0:
+        return previous
+    latest = int(timestamps.max().astype(np.int64))
+    return latest if previous is None else max(latest, previous)
+
+
+# Function to get a sorted (timestamps, values) pair for one numeric column of a KPI frame
+def series_arrays(df, column):
+    timestamps = time_values(df)
+    if timestamps is None or column not in df.columns:
+        return None
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+    keep = ~np.isnat(timestamps)
+    timestamps, values = timestamps[keep], values[keep]
+    if timestamps.size > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, values = timestamps[order], values[order]
+    return timestamps, values
+
+
+# Function to merge the sorted (timestamps, values) pairs of several files of one series, in time order
+def merge_series(parts):
+    parts = [part for part in parts if part is not None]
+    if len(parts) <= 1:
+        return parts[0] if parts else None
+    timestamps = np.concatenate([part[0] for part in parts])
+    values = np.concatenate([part[1] for part in parts])
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], values[order]
+
+
+# Min/max bucketing: positions of the lowest and highest sample of each bucket, in time order
+def minmax_picks(values, max_points):
+    n = values.size
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(max_points // 2, 1)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = values
+    grid = padded.reshape(buckets, size)
+    filled = ~np.all(np.isnan(grid), axis=1)
+    low = np.argmin(np.where(np.isnan(grid), np.inf, grid), axis=1)
+    high = np.argmax(np.where(np.isnan(grid), -np.inf, grid), axis=1)
+    offsets = np.arange(buckets) * size
+    picks = np.unique(np.concatenate([(offsets + low)[filled], (offsets + high)[filled]]))
+    return picks[picks < n]
+
+
+def minmax_downsample(timestamps, values, max_points):
+    picks = minmax_picks(values, max_points)
+    return timestamps[picks], values[picks]
+
+
+# Largest-Triangle-Three-Buckets: keeps the visual shape with max_points samples
+def lttb_downsample(timestamps, values, max_points):
+    n = values.size
+    if n <= max_points or max_points < 3:
+        return timestamps, values
+    finite = np.isfinite(values)
+    if not finite.all():
+        timestamps, values = timestamps[finite], values[finite]
+        n = values.size
+        if n <= max_points:
+            return timestamps, values
+    x = timestamps.astype(np.int64).astype(float)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    picks = np.empty(max_points, dtype=np.int64)
+    picks[0], picks[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        avg_y = values[stop:next_stop].mean() if next_stop > stop else values[-1]
+        area = np.abs((x[previous] - avg_x) * (values[start:stop] - values[previous])
+                      - (x[previous] - x[start:stop]) * (avg_y - values[previous]))
+        previous = start + int(np.argmax(area))
+        picks[bucket + 1] = previous
+    return timestamps[picks], values[picks]
+
+
+DOWNSAMPLERS = {"minmax": minmax_downsample, "lttb": lttb_downsample}
+
+
+# Function to cut a sorted series to [start, end] and reduce it to at most max_points samples.
+# Returns the reduced series and the number of samples in the window.
+def downsample(timestamps, values, start, end, max_points, method="minmax"):
+    lo = np.searchsorted(timestamps, np.datetime64(start, "ns"), side="left")
+    hi = np.searchsorted(timestamps, np.datetime64(end, "ns"), side="right")
+    window_t, window_v = timestamps[lo:hi], values[lo:hi]
+    reduced_t, reduced_v = DOWNSAMPLERS[method](window_t, window_v, max_points)
+    return reduced_t, reduced_v, hi - lo
+
+
+# Resolution pyramid: bucket width of each level (None = calendar month), finest first
+PYRAMID_LEVELS = [
+    ("1min", np.timedelta64(1, "m")),
+    ("15min", np.timedelta64(15, "m")),
+    ("1h", np.timedelta64(1, "h")),
+    ("1D", np.timedelta64(1, "D")),
+    ("1M", None),
+]
+PYRAMID_COLUMNS = ["start", "sum", "mean", "min", "max", "count"]
+
+
+def _bucket_codes(starts, width):
+    if width is None:
+        return starts.astype("datetime64[M]").astype(np.int64)
+    return starts.astype(np.int64) // width.astype("timedelta64[ns]").astype(np.int64)
+
+
+def _bucket_starts(codes, width):
+    if width is None:
+        return codes.astype("datetime64[M]").astype("datetime64[ns]")
+    return (codes * width.astype("timedelta64[ns]").astype(np.int64)).astype("datetime64[ns]")
+
+
+# Regroup sorted buckets (or raw samples, which are buckets of one) into coarser buckets
+def _aggregate(starts, sums, mins, maxs, counts, width):
+    codes = _bucket_codes(starts, width)
+    edges = np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1])
+    sums = np.add.reduceat(sums, edges)
+    counts = np.add.reduceat(counts, edges)
+    level = pd.DataFrame({
+        "start": _bucket_starts(codes[edges], width),
+        "sum": sums,
+        "mean": sums / counts,
+        "min": np.minimum.reduceat(mins, edges),
+        "max": np.maximum.reduceat(maxs, edges),
+        "count": counts,
+    })
+    return level
+
+
+# Function to build every pyramid level of a sorted series; each level is derived from the one below
+def build_pyramid(timestamps, values):
+    keep = np.isfinite(values)
+    starts, values = np.asarray(timestamps, dtype="datetime64[ns]")[keep], values[keep]
+    if values.size == 0:
+        empty = pd.DataFrame({
+            "start": np.array([], dtype="datetime64[ns]"), "sum": np.array([]), "mean": np.array([]),
+            "min": np.array([]), "max": np.array([]), "count": np.array([], dtype=np.int64),
+        })
+        return {name: empty for name, _ in PYRAMID_LEVELS}
+    pyramid = {}
+    level = (starts, values, values, values, np.ones(values.size, dtype=np.int64))
+    for name, width in PYRAMID_LEVELS:
+        frame = _aggregate(*level, width)
+        pyramid[name] = frame
+        level = (frame["start"].to_numpy(), frame["sum"].to_numpy(), frame["min"].to_numpy(),
+                 frame["max"].to_numpy(), frame["count"].to_numpy())
+    return pyramid
+
+
+# Function to merge one pyramid level of several files of a series. Buckets start on fixed
+# boundaries, so buckets of the same start are combined into one.
+def merge_levels(frames, level):
+    frames = [frame for frame in frames if frame is not None and len(frame)]
+    if len(frames) <= 1:
+        return frames[0] if frames else None
+    combined = pd.concat(frames).sort_values("start", kind="stable")
+    return _aggregate(combined["start"].to_numpy(), combined["sum"].to_numpy(), combined["min"].to_numpy(),
+                      combined["max"].to_numpy(), combined["count"].to_numpy(), dict(PYRAMID_LEVELS)[level])
+
+
+# Function to choose the coarsest level whose buckets are no wider than the requested resolution.
+# Returns None when even the finest level is too coarse (use the raw samples).
+def pick_level(resolution):
+    resolution = np.timedelta64(resolution, "ns")
+    chosen = None
+    for name, width in PYRAMID_LEVELS:
+        width = np.timedelta64(28, "D") if width is None else width
+        if width <= resolution:
+            chosen = name
+    return chosen